@@ -5,6 +5,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 import time
 
+from engines.momentum_index import SIGNAL_WEIGHTS
+
 
 # CONFIG & STYLE
 
@@ -25,65 +27,112 @@ st.markdown("""
 API_URL = "http://127.0.0.1:8080"
 DATA_PATH = "data/demo_cases_bulk.csv"
 
-
-# CONSTANTS & SIGNAL WEIGHTS
-
-SIGNAL_WEIGHTS = {
-    "CALL_ANSWERED": 1.5,
-    "SMS_REPLIED": 1.0,
-    "PROMISE_TO_PAY": 4.0,
-    "PAYMENT_DATE_CONFIRMED": 4.5,
-    "PARTIAL_PAYMENT": 6.0,
-    "BROKEN_PROMISE": -4.0,
-    "NO_RESPONSE_7_DAYS": -1.5
-}
+# Rows per table / worklist page (fetched from the server, never the whole portfolio)
+PAGE_SIZE = 50
+# Cached API reads expire after this many seconds
+CACHE_TTL = 30
 
 
 # SESSION STATE SETUP
 
 if "signals" not in st.session_state:
     st.session_state.signals = {}
-if "processed_data" not in st.session_state:
-    st.session_state.processed_data = None
+if "data_version" not in st.session_state:
+    # Bumped whenever the server-side scores change, so cached queries are refetched
+    st.session_state.data_version = None
+if "cursors" not in st.session_state:
+    # Page cursor per view (None = first page)
+    st.session_state.cursors = {}
 
 
 # DATA LOADING & API CALLS
 
 def load_and_process_data():
-    
+    # Submits the portfolio once; the scored cases stay on the server and are queried per view
     try:
         raw_df = pd.read_csv(DATA_PATH)
-        
-        
-        payload = {"cases": [], "signals": []}
-        
-        for _, row in raw_df.iterrows():
-            features = row.drop("case_id").to_dict()
-            payload["cases"].append({"case_id": row["case_id"], "features": features})
-            
-        for cid, sigs in st.session_state.signals.items():
-            for s, w in sigs:
-                payload["signals"].append({"case_id": cid, "signal_type": s, "weight": w})
-        
+
+        features = raw_df.drop(columns="case_id")
+        payload = {
+            "case_ids": raw_df["case_id"].astype(str).tolist(),
+            "features": {col: features[col].astype(float).tolist() for col in features.columns},
+            "signals": [
+                {"case_id": cid, "signal_type": s, "weight": w}
+                for cid, sigs in st.session_state.signals.items() for s, w in sigs
+            ],
+            "sop_mode": "reference",
+        }
+
         # Call API
-        response = requests.post(f"{API_URL}/allocate", json=payload)
+        response = requests.post(f"{API_URL}/allocate/columnar", json=payload)
         response.raise_for_status()
-        
-        # Merge Results
-        result_df = pd.DataFrame(response.json())
-        final_df = pd.merge(raw_df, result_df, on="case_id")
-        
-        st.session_state.processed_data = final_df
-        return final_df
+
+        st.session_state.data_version = time.time()
+        st.session_state.cursors = {}
+        return True
     except Exception as e:
         st.error(f"⚠️ System Offline: {e}")
-        return pd.DataFrame()
+        return False
 
 
-if st.session_state.processed_data is None:
-    df = load_and_process_data()
-else:
-    df = st.session_state.processed_data
+def push_signal(case_id, signal_type, weight):
+    # Delta update: the backend re-scores and re-allocates only this case
+    try:
+        payload = {"signals": [{"case_id": case_id, "signal_type": signal_type, "weight": weight}]}
+        response = requests.post(f"{API_URL}/signals", json=payload)
+        response.raise_for_status()
+        st.session_state.data_version = time.time()
+    except Exception as e:
+        st.error(f"⚠️ Signal update failed: {e}")
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_kpis(data_version, assigned_dca=None):
+    params = {"assigned_dca": assigned_dca} if assigned_dca else {}
+    response = requests.get(f"{API_URL}/cases/kpis", params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def fetch_cases(data_version, assigned_dca=None, cursor=None, limit=PAGE_SIZE):
+    params = {"limit": limit}
+    if assigned_dca:
+        params["assigned_dca"] = list(assigned_dca)
+    if cursor:
+        params["cursor"] = cursor
+    response = requests.get(f"{API_URL}/cases", params=params)
+    response.raise_for_status()
+    page = response.json()
+    return pd.DataFrame(page["cases"]), page["next_cursor"]
+
+
+def page_controls(view, next_cursor):
+    # Keyset pagination: keep the cursor stack per view, step forward / back to the start
+    stack = st.session_state.cursors.setdefault(view, [])
+    c_prev, c_next = st.columns(2)
+    if stack and c_prev.button("⏮ First page", key=f"first_{view}"):
+        st.session_state.cursors[view] = []
+        st.rerun()
+    if next_cursor and c_next.button("Next page ▶", key=f"next_{view}"):
+        stack.append(next_cursor)
+        st.rerun()
+
+
+def current_cursor(view):
+    stack = st.session_state.cursors.get(view, [])
+    return stack[-1] if stack else None
+
+
+if st.session_state.data_version is None:
+    load_and_process_data()
+version = st.session_state.data_version
+
+try:
+    kpis = fetch_kpis(version)
+except Exception as e:
+    st.error(f"⚠️ System Offline: {e}")
+    kpis = {"n_cases": 0, "exposure": 0.0, "mean_score": 0.0, "escalations": 0, "by_action_type": {}, "by_dca": {}}
 
 
 # SIDEBAR: ROLE SELECTION (SECURITY REQUIREMENT)
@@ -116,11 +165,11 @@ if user_role == "FedEx HQ (Admin)":
     
     with tab1:
         st.markdown("### 📊 Portfolio Health Overview")
-        if not df.empty:
+        if kpis["n_cases"]:
             
-            tot_amnt = df["loan_amnt"].sum()
-            avg_score = df["final_priority_score"].mean()
-            high_priority_count = df[df["action_type"] == "IMMEDIATE_ESCALATION"].shape[0]
+            tot_amnt = kpis["exposure"]
+            avg_score = kpis["mean_score"]
+            high_priority_count = kpis["escalations"]
             
            
             try:
@@ -146,13 +195,15 @@ if user_role == "FedEx HQ (Admin)":
             c1, c2 = st.columns(2)
             with c1:
                 st.markdown("#### 🎯 Risk Segmentation")
-                fig_risk = px.pie(df, names="action_type", title="Strategy Distribution", 
+                df_actions = pd.DataFrame({"action_type": list(kpis["by_action_type"]), "cases": list(kpis["by_action_type"].values())})
+                fig_risk = px.pie(df_actions, names="action_type", values="cases", title="Strategy Distribution", 
                                   color="action_type", hole=0.4,
                                   color_discrete_map={"IMMEDIATE_ESCALATION":"#FF6600", "STANDARD_QUEUE":"#4D148C", "DIGITAL_ONLY":"#999999"})
                 st.plotly_chart(fig_risk, use_container_width=True)
             with c2:
                 st.markdown("#### 💰 Allocation Value")
-                fig_bar = px.bar(df, x="assigned_dca", y="loan_amnt", color="assigned_dca", 
+                df_value = pd.DataFrame({"assigned_dca": list(kpis["by_dca"]), "loan_amnt": [d["exposure"] for d in kpis["by_dca"].values()]})
+                fig_bar = px.bar(df_value, x="assigned_dca", y="loan_amnt", color="assigned_dca", 
                                  title="Assigned Value ($)", 
                                  color_discrete_sequence=px.colors.qualitative.Bold)
                 st.plotly_chart(fig_bar, use_container_width=True)
@@ -162,20 +213,29 @@ if user_role == "FedEx HQ (Admin)":
         st.markdown("### ⚡ Centralized Case Allocation")
         
         c_side, c_main = st.columns([1, 3])
+
+        all_dcas = list(kpis["by_dca"])
+        with c_main:
+            filter_status = st.multiselect("Filter DCA", all_dcas, default=all_dcas)
+            try:
+                view_df, next_cursor = fetch_cases(version, tuple(filter_status), current_cursor("ops"))
+            except Exception as e:
+                st.error(f"⚠️ System Offline: {e}")
+                view_df, next_cursor = pd.DataFrame(), None
         
         with c_side:
             st.success("📡 **Signal Injection**")
             st.caption("Simulate debtor interaction.")
             
-            case_select = st.selectbox("Select Case ID", df["case_id"].unique(), index=0)
+            case_select = st.selectbox("Select Case ID", view_df["case_id"] if not view_df.empty else [], index=0)
             signal_select = st.selectbox("Signal Type", list(SIGNAL_WEIGHTS.keys()))
             
-            if st.button("Inject Signal"):
+            if st.button("Inject Signal") and case_select is not None:
                 weight = SIGNAL_WEIGHTS[signal_select]
                 st.session_state.signals.setdefault(case_select, [])
                 st.session_state.signals[case_select].append((signal_select, weight))
                 with st.spinner("Recalculating..."):
-                    load_and_process_data()
+                    push_signal(case_select, signal_select, weight)
                 st.rerun()
 
             if st.button("Reset Signals"):
@@ -190,16 +250,15 @@ if user_role == "FedEx HQ (Admin)":
                     st.caption(f"**{cid}**: {len(sigs)} events")
 
         with c_main:
-            filter_status = st.multiselect("Filter DCA", df["assigned_dca"].unique(), default=df["assigned_dca"].unique())
-            view_df = df[df["assigned_dca"].isin(filter_status)]
-            
-            st.dataframe(
+            # Rows arrive filtered and sorted by final_priority_score from the server
+            if not view_df.empty:
+                st.dataframe(
                 view_df[["case_id", "loan_amnt", "ml_score", "graph_score", "final_priority_score", "assigned_dca", "action_type"]]
-                .sort_values("final_priority_score", ascending=False)
                 .style.format({"ml_score": "{:.2f}", "graph_score": "{:.2f}", "final_priority_score": "{:.2f}", "loan_amnt": "${:,.0f}"})
                 .applymap(lambda x: 'background-color: #FF0800' if x == "DCA_TOP" else '', subset=['assigned_dca'])
                 , use_container_width=True, height=500
-            )
+                )
+            page_controls("ops", next_cursor)
 
  
     with tab3:
@@ -230,13 +289,19 @@ elif user_role == "DCA Agent (External)":
     st.markdown("---")
     
     
-    my_cases = df[df["assigned_dca"] == dca_login].copy()
+    # Only this agency's KPIs and one page of its worklist leave the server
+    try:
+        my_kpis = fetch_kpis(version, dca_login)
+        my_cases, next_cursor = fetch_cases(version, (dca_login,), current_cursor(dca_login))
+    except Exception as e:
+        st.error(f"⚠️ System Offline: {e}")
+        my_kpis, my_cases, next_cursor = {"n_cases": 0, "escalations": 0}, pd.DataFrame(), None
     
     col_a, col_b = st.columns([1, 2])
     
     with col_a:
-        st.metric("My Assigned Cases", len(my_cases))
-        st.metric("Priority Cases", len(my_cases[my_cases['action_type'] == 'IMMEDIATE_ESCALATION']))
+        st.metric("My Assigned Cases", my_kpis["n_cases"])
+        st.metric("Priority Cases", my_kpis["escalations"])
     
     with col_b:
         st.warning("⚠️ **Compliance Alert:** Please complete SOPs for Priority Cases within 2 hours.")
@@ -245,7 +310,7 @@ elif user_role == "DCA Agent (External)":
     
    
     if not my_cases.empty:
-        for idx, row in my_cases.sort_values("final_priority_score", ascending=False).iterrows():
+        for idx, row in my_cases.iterrows():
             with st.expander(f"{row['case_id']} | Score: {row['final_priority_score']:.2f} | {row['action_type']}"):
                 c1, c2 = st.columns(2)
                 with c1:
@@ -260,5 +325,6 @@ elif user_role == "DCA Agent (External)":
                     
                     st.text_area("Agent Notes", placeholder="Enter call disposition...", key=f"note_{row['case_id']}")
                     st.button("Submit Update", key=f"btn_{row['case_id']}")
+        page_controls(dca_login, next_cursor)
     else:
         st.info("No active cases assigned.")
\ No newline at end of file
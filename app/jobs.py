@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from app.serialization import encode_ndjson
+from app.streaming import RESPONSE_FIELDS
+from services.case_store import allocate_and_store
+
+# Jobs scored at once; the interactive endpoints keep Starlette's own thread pool
+JOB_WORKERS = int(os.environ.get("DCA_JOB_WORKERS", 2))
+# Queued (not yet running) jobs accepted before POST /allocate/jobs answers 429
+MAX_PENDING_JOBS = int(os.environ.get("DCA_MAX_PENDING_JOBS", 16))
+# Cases scored + allocated per step; the case store lock is released between steps
+JOB_CHUNK_SIZE = int(os.environ.get("DCA_JOB_CHUNK_SIZE", 50_000))
+# Finished jobs (and their spooled results) kept for polling
+MAX_FINISHED_JOBS = 100
+
+JOB_DIR = os.environ.get("DCA_JOB_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "jobs"))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobQueueFull(RuntimeError):
+    pass
+
+
+class Job:
+    def __init__(self, df_cases: pd.DataFrame, signals: dict, momentum_mode: str, allocation_mode: str, directory: str):
+        self.job_id = uuid.uuid4().hex
+        self.df_cases = df_cases
+        self.signals = signals
+        self.momentum_mode = momentum_mode
+        self.allocation_mode = allocation_mode
+        self.path = os.path.join(directory, f"{self.job_id}.ndjson")
+
+        self.status = QUEUED
+        self.n_cases = len(df_cases)
+        self.processed = 0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "n_cases": self.n_cases,
+            "processed": self.processed,
+            "progress": self.processed / self.n_cases if self.n_cases else 1.0,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """
+    Background allocation jobs on a bounded worker pool.
+
+    A job runs the same path as /allocate (scores, allocation, case store) one chunk
+    at a time, appending each chunk's results to an NDJSON spool file, and checks
+    for cancellation between chunks. Chunks already committed stay allocated.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = MAX_PENDING_JOBS,
+                 directory: str = JOB_DIR, chunk_size: int = JOB_CHUNK_SIZE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._finished_order = []
+        self._executor = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="allocation-job")
+        return self._executor
+
+    def submit(self, df_cases: pd.DataFrame, signals: dict, momentum_mode: str = "sum",
+               allocation_mode: str = "greedy") -> Job:
+        os.makedirs(self.directory, exist_ok=True)
+        job = Job(df_cases, signals, momentum_mode, allocation_mode, self.directory)
+
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == QUEUED)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already queued")
+            self._jobs[job.job_id] = job
+            job.future = self._pool().submit(self._run, job)
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str):
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.cancel_event.set()
+        # Queued jobs never start; running ones stop after their current chunk
+        if job.future is not None and job.future.cancel():
+            self._finish(job, CANCELLED)
+        return job
+
+    def shutdown(self) -> None:
+        with self._lock:
+            jobs = list(self._jobs.values())
+            executor, self._executor = self._executor, None
+        for job in jobs:
+            job.cancel_event.set()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        part = job.path + ".part"
+        try:
+            with open(part, "wb") as spool:
+                for start in range(0, job.n_cases, self.chunk_size):
+                    if job.cancel_event.is_set():
+                        break
+                    chunk = job.df_cases.iloc[start:start + self.chunk_size]
+                    signals = {cid: job.signals[cid] for cid in chunk["case_id"] if cid in job.signals}
+
+                    allocated = allocate_and_store(chunk, signals, momentum_mode=job.momentum_mode,
+                                                   allocation_mode=job.allocation_mode)
+                    spool.write(encode_ndjson(allocated, RESPONSE_FIELDS))
+                    spool.flush()
+                    job.processed += len(chunk)
+
+            os.replace(part, job.path)
+            self._finish(job, CANCELLED if job.cancel_event.is_set() and job.processed < job.n_cases else SUCCEEDED)
+        except Exception as e:
+            print(f"⚠️ Allocation job {job.job_id} failed: {e}")
+            job.error = str(e)
+            self._finish(job, FAILED)
+
+    def _finish(self, job: Job, status: str) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        # Inputs are no longer needed once the job is done
+        job.df_cases, job.signals = None, None
+
+        with self._lock:
+            self._finished_order.append(job.job_id)
+            while len(self._finished_order) > MAX_FINISHED_JOBS:
+                old = self._jobs.pop(self._finished_order.pop(0), None)
+                if old is not None:
+                    for path in (old.path, old.path + ".part"):
+                        if os.path.exists(path):
+                            os.remove(path)
+
+
+# GLOBAL JOB MANAGER
+JOB_MANAGER = JobManager()
@@ -1,6 +1,12 @@
-from fastapi import FastAPI
+import time
+
+from fastapi import FastAPI, Request, Response
 from app.routes import router
-from services.allocation_service import load_dca_profiles
+from services.allocation_service import load_dca_profiles, DCA_LEDGER
+from services.warmup import READINESS, start_warm_up
+from services.metrics import REQUEST_SECONDS
+from services.parallel_scoring import shutdown_pool
+from app.jobs import JOB_MANAGER
 
 app = FastAPI(
     title="DCA Priority & Allocation Engine",
@@ -10,11 +16,37 @@ app = FastAPI(
 
 app.include_router(router)
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template so path parameters don't explode cardinality
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint=getattr(route, "path", "unmatched"))
+    return response
+
 @app.on_event("startup")
 def startup_event():
     # Load DCA profiles into global memory on startup
     load_dca_profiles()
+    # Model load + engine warm-up run in the background; GET /ready turns 200 when done
+    start_warm_up()
 
 @app.get("/")
 def health_check():
-    return {"status": "OK", "message": "DCA Priority Engine is running"}
\ No newline at end of file
+    return {"status": "OK", "message": "DCA Priority Engine is running"}
+
+@app.get("/ready")
+def readiness_check(response: Response):
+    """Readiness probe: 503 until the startup warm-up has finished (a failed warm-up is retried)."""
+    if not READINESS["ready"]:
+        start_warm_up()
+        response.status_code = 503
+    return READINESS
+
+@app.on_event("shutdown")
+def shutdown_event():
+    JOB_MANAGER.shutdown()
+    shutdown_pool()
+    # Snapshot capacity state so the next startup skips log replay
+    DCA_LEDGER.close()
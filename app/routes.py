@@ -1,42 +1,297 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+import base64
+import binascii
+import json
+import os
+import numpy as np
 import pandas as pd
 
-from app.schemas import AllocationRequest, AllocationResponse
-from services.scoring_service import compute_scores
-from services.allocation_service import allocate_cases_with_state, get_dca_status
+from typing import List, Optional, Union
+from pydantic import TypeAdapter
+
+from app.schemas import (
+    AllocationRequest, AllocationResponse, ColumnarAllocationRequest, ColumnarAllocationResponse, SignalDeltaRequest,
+    AllocationBatchResponse, AllocationRefResponse, CasePage, CaseKpiResponse, JobStatus,
+)
+from app.jobs import JOB_MANAGER, JobQueueFull, FINISHED
+from app.serialization import encode_records, dumps, render_model
+from app.streaming import (
+    STREAM_CHUNK_SIZE, MAX_STREAM_CHUNK_SIZE, NDJSON_MEDIA_TYPE, ARROW_MEDIA_TYPES, ARROW_FILE_MEDIA_TYPE, StreamFormatError,
+    DuplexStreamingResponse, iter_ndjson_chunks, iter_arrow_chunks, score_and_allocate_chunk,
+)
+from engines.graph_engine import MOMENTUM_MODES
+from services.allocation_service import get_dca_status, ALLOCATION_MODES
+from services.case_store import CASE_STORE, allocate_and_store, apply_signal_deltas
+from services.scoring_service import SOP_TEMPLATES
+from services.metrics import stage_timer, render_metrics, render_gauge, render_counter, BATCH_CASES
+from services.score_cache import GRAPH_CACHE, SCORE_CACHE
+from services.profiler import maybe_profile, get_profile
 
 router = APIRouter()
 
-@router.post("/allocate", response_model=list[AllocationResponse])
-def allocate_endpoint(payload: AllocationRequest):
-    # 1. Convert cases to DataFrame
+# Objective sum(priority x agency score) of the assignment just made
+OBJECTIVE_HEADER = "X-Allocation-Objective"
+
+MAX_PAGE_SIZE = 1000
+
+# /allocate response models, applied inside the "serialize" stage instead of after the endpoint returns
+INLINE_RESPONSE = TypeAdapter(list[AllocationResponse])
+REFERENCE_RESPONSE = TypeAdapter(AllocationBatchResponse)
+
+def _signals_by_case(signal_inputs) -> dict:
+    signals = {}
+    for s in signal_inputs:
+        event = (s.signal_type, s.weight) if s.timestamp is None else (s.signal_type, s.weight, s.timestamp.timestamp())
+        signals.setdefault(s.case_id, []).append(event)
+    return signals
+
+def _columnar_frame(payload: ColumnarAllocationRequest) -> pd.DataFrame:
+    # Each feature list maps straight onto one NumPy array (None -> NaN)
+    columns = {"case_id": np.asarray(payload.case_ids, dtype=object)}
+    for col, values in payload.features.items():
+        arr = np.asarray(values, dtype=np.float64)
+        dtype = payload.dtypes.get(col, "float64")
+        # Integer / bool columns can't hold NaN: keep those as float64
+        if dtype.startswith("float") or not np.isnan(arr).any():
+            arr = arr.astype(dtype)
+        columns[col] = arr
+    return pd.DataFrame(columns, copy=False)
+
+def _sop_templates() -> dict:
+    return {tier: list(steps) for tier, steps in SOP_TEMPLATES.items()}
+
+def _encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str):
+    try:
+        score, case_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), str(case_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.post("/allocate", response_model=Union[list[AllocationResponse], AllocationBatchResponse])
+def allocate_endpoint(payload: AllocationRequest, response: Response, fast: bool = False, profile: bool = False):
+    """
+    fast=true encodes the result columns straight to JSON bytes (same AllocationResponse
+    contract, but without re-validating every record through Pydantic). Either way the
+    body is rendered inside the "serialize" stage timer.
+    profile=true runs the sampling profiler; fetch the result via X-Profile-Id.
+    """
+    extra_headers = {}
+    with maybe_profile(profile) as prof:
+        result = _allocate(payload, fast, extra_headers)
+
+    if "profile_id" in prof:
+        extra_headers["X-Profile-Id"] = prof["profile_id"]
+    headers = result.headers if isinstance(result, Response) else response.headers
+    headers.update(extra_headers)
+    return result
+
+def _cases_frame(payload: AllocationRequest) -> pd.DataFrame:
     records = []
     for c in payload.cases:
         record = {"case_id": c.case_id}
-        
+
         # DYNAMIC LOADING: We trust the JSON payload to contain the correct model features
         # (loan_amnt, int_rate, dti, etc.)
         record.update(c.features)
-        
+
         records.append(record)
 
-    df_cases = pd.DataFrame(records)
+    return pd.DataFrame(records)
+
+def _allocate(payload: AllocationRequest, fast: bool, headers: dict):
+    # 1. Convert cases to DataFrame
+    with stage_timer("parse"):
+        df_cases = _cases_frame(payload)
+
+        # 2. Convert signals to dictionary
+        signals = _signals_by_case(payload.signals)
+
+    BATCH_CASES.observe(len(df_cases), stage="request")
     if df_cases.empty:
-        return []
+        return [] if payload.sop_mode == "inline" else {"sop_templates": _sop_templates(), "cases": []}
 
-    # 2. Convert signals to dictionary
-    signals = {}
-    for s in payload.signals:
-        signals.setdefault(s.case_id, []).append((s.signal_type, s.weight))
+    # 3. Compute scores (ML + Graph) + 4. Allocate DCAs (Stateful, kept in the case store)
+    allocated = allocate_and_store(df_cases, signals, momentum_mode=payload.momentum_mode,
+                                   allocation_mode=payload.allocation_mode)
+    headers[OBJECTIVE_HEADER] = repr(allocated.attrs["allocation_objective"])
+
+    with stage_timer("serialize"):
+        if payload.sop_mode == "reference":
+            fields = list(AllocationRefResponse.model_fields)
+            if fast:
+                body = b'{"sop_templates":' + dumps(_sop_templates()) + b',"cases":' + encode_records(allocated, fields) + b"}"
+            else:
+                body = render_model(REFERENCE_RESPONSE, {"sop_templates": _sop_templates(),
+                                                         "cases": allocated[fields].to_dict(orient="records")})
+        elif fast:
+            body = encode_records(allocated, AllocationResponse.model_fields)
+        else:
+            body = render_model(INLINE_RESPONSE, allocated.to_dict(orient="records"))
 
-    # 3. Compute scores (ML + Graph)
-    scored_cases = compute_scores(df_cases, signals)
+    return Response(content=body, media_type="application/json")
 
-    # 4. Allocate DCAs (Stateful)
-    allocated = allocate_cases_with_state(scored_cases)
+@router.post("/allocate/columnar", response_model=ColumnarAllocationResponse, response_model_exclude_none=True)
+def allocate_columnar_endpoint(payload: ColumnarAllocationRequest, http_response: Response):
+    """Same pipeline as /allocate, with column-oriented request and response bodies."""
+    columns = [f for f in ColumnarAllocationResponse.model_fields if f not in ("sop_steps", "sop_templates")]
+    if payload.sop_mode == "inline":
+        columns.append("sop_steps")
 
+    df_cases = _columnar_frame(payload)
+    if df_cases.empty:
+        response = {field: [] for field in columns}
+    else:
+        allocated = allocate_and_store(df_cases, _signals_by_case(payload.signals), momentum_mode=payload.momentum_mode,
+                                       allocation_mode=payload.allocation_mode)
+        response = {field: allocated[field].tolist() for field in columns}
+        http_response.headers[OBJECTIVE_HEADER] = repr(allocated.attrs["allocation_objective"])
+
+    if payload.sop_mode == "reference":
+        response["sop_templates"] = _sop_templates()
+    return response
+
+@router.post("/allocate/stream")
+async def allocate_stream_endpoint(request: Request,
+                                   chunk_size: int = Query(STREAM_CHUNK_SIZE, ge=1, le=MAX_STREAM_CHUNK_SIZE),
+                                   momentum_mode: str = "sum", allocation_mode: str = "greedy"):
+    """
+    Bulk allocation for very large portfolios.
+    Body: NDJSON (one case per line), Arrow IPC stream or Arrow IPC file. Results are streamed back as NDJSON,
+    one fixed-size chunk at a time, so memory stays flat regardless of portfolio size.
+    """
+    # Validated up front: once streaming starts the status code can no longer change
+    if momentum_mode not in MOMENTUM_MODES:
+        raise HTTPException(status_code=422, detail=f"momentum_mode must be one of {', '.join(MOMENTUM_MODES)}")
+    if allocation_mode not in ALLOCATION_MODES:
+        raise HTTPException(status_code=422, detail=f"allocation_mode must be one of {', '.join(ALLOCATION_MODES)}")
+
+    content_type = request.headers.get("content-type", NDJSON_MEDIA_TYPE).split(";")[0].strip()
+    if content_type in ARROW_MEDIA_TYPES:
+        chunks = iter_arrow_chunks(request.stream(), chunk_size, file_format=content_type == ARROW_FILE_MEDIA_TYPE)
+    else:
+        chunks = iter_ndjson_chunks(request.stream(), chunk_size)
+
+    async def results():
+        try:
+            async for df_cases, signals in chunks:
+                # Scoring is CPU-bound: keep it off the event loop
+                yield await run_in_threadpool(score_and_allocate_chunk, df_cases, signals, momentum_mode, allocation_mode)
+        except StreamFormatError as e:
+            # Headers are already sent; report the error in-band and stop
+            yield (json.dumps({"error": str(e)}) + "\n").encode("utf-8")
+
+    return DuplexStreamingResponse(results(), media_type=NDJSON_MEDIA_TYPE)
+
+def _job_status(job) -> dict:
+    status = job.to_dict()
+    if job.status in FINISHED and os.path.exists(job.path):
+        status["results_url"] = f"/allocate/jobs/{job.job_id}/results"
+    return status
+
+def _get_job(job_id: str):
+    job = JOB_MANAGER.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return job
+
+@router.post("/allocate/jobs", response_model=JobStatus, status_code=202)
+def submit_job_endpoint(payload: AllocationRequest):
+    """
+    Background /allocate for very large portfolios: returns a job id immediately.
+    Poll GET /allocate/jobs/{id}; results are spooled to disk as NDJSON.
+    """
+    try:
+        job = JOB_MANAGER.submit(_cases_frame(payload), _signals_by_case(payload.signals),
+                                 momentum_mode=payload.momentum_mode, allocation_mode=payload.allocation_mode)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=f"Job queue is full ({e}); retry later")
+    return _job_status(job)
+
+@router.get("/allocate/jobs/{job_id}", response_model=JobStatus)
+def job_status_endpoint(job_id: str):
+    return _job_status(_get_job(job_id))
+
+@router.get("/allocate/jobs/{job_id}/results")
+def job_results_endpoint(job_id: str):
+    """NDJSON, one AllocationResponse per line (partial for cancelled jobs)."""
+    job = _get_job(job_id)
+    if job.status not in FINISHED or not os.path.exists(job.path):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}; results are not available")
+    return FileResponse(job.path, media_type=NDJSON_MEDIA_TYPE)
+
+@router.post("/allocate/jobs/{job_id}/cancel", response_model=JobStatus)
+def cancel_job_endpoint(job_id: str):
+    """Stops the job after its current chunk; cases already allocated keep their agency."""
+    _get_job(job_id)
+    return _job_status(JOB_MANAGER.cancel(job_id))
+
+@router.post("/signals", response_model=list[AllocationResponse])
+def signals_endpoint(payload: SignalDeltaRequest):
+    """
+    Signal delta for cases already submitted via /allocate (to this worker: the case store
+    is per process, only capacity and assignments are shared between workers).
+    Only the affected cases are re-scored and moved between agencies.
+    """
+    allocated = apply_signal_deltas(_signals_by_case(payload.signals))
+    if allocated.empty:
+        raise HTTPException(status_code=404, detail="None of the signalled cases are known to this worker's case store")
     return allocated.to_dict(orient="records")
 
+@router.get("/cases", response_model=CasePage)
+def cases_endpoint(
+    assigned_dca: Optional[List[str]] = Query(None),
+    action_type: Optional[List[str]] = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+):
+    """
+    Scored cases from the case store, filtered server-side and sorted by final_priority_score.
+    Keyset pagination: follow next_cursor until it is null.
+    """
+    after = _decode_cursor(cursor) if cursor else None
+    page, last_key = CASE_STORE.query(assigned_dca, action_type, after=after, limit=limit)
+
+    next_cursor = dumps(_encode_cursor(last_key)) if last_key is not None else b"null"
+    body = b'{"cases":' + encode_records(page, page.columns) + b',"next_cursor":' + next_cursor + b"}"
+    return Response(content=body, media_type="application/json")
+
+@router.get("/cases/kpis", response_model=CaseKpiResponse)
+def case_kpis_endpoint(assigned_dca: Optional[List[str]] = Query(None), action_type: Optional[List[str]] = Query(None)):
+    """Exposure, mean priority and escalation counts, aggregated server-side."""
+    return CASE_STORE.kpis(assigned_dca, action_type)
+
+@router.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition: stage/request histograms, per-DCA load gauges, score / graph cache counters."""
+    snapshot = get_dca_status()
+    lines = render_gauge("dca_current_load", "Cases currently assigned per DCA.",
+                         [({"dca_id": d["dca_id"]}, d["current_load"]) for d in snapshot])
+    lines += render_gauge("dca_max_capacity", "Maximum cases per DCA.",
+                          [({"dca_id": d["dca_id"]}, d["max_capacity"]) for d in snapshot])
+
+    cache = SCORE_CACHE.stats()
+    lines += render_counter("dca_score_cache_hits_total", "Cases whose ML score came from the cache.", [({}, cache["hits"])])
+    lines += render_counter("dca_score_cache_misses_total", "Cases scored because they were not cached.", [({}, cache["misses"])])
+    lines += render_gauge("dca_score_cache_entries", "Entries held in the score cache.", [({}, cache["entries"])])
+
+    graph = GRAPH_CACHE.stats()
+    lines += render_counter("dca_graph_cache_hits_total", "Batches whose graph momentum came from the cache.", [({}, graph["hits"])])
+    lines += render_counter("dca_graph_cache_misses_total", "Batches whose graph momentum was computed.", [({}, graph["misses"])])
+    return Response(content=render_metrics(lines), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/profiles/{profile_id}")
+def profile_endpoint(profile_id: str):
+    """Collapsed stacks from a profile=true request (flamegraph input)."""
+    text = get_profile(profile_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired profile id")
+    return Response(content=text, media_type="text/plain")
+
 @router.get("/dca-capacity")
 def get_capacity_status():
     """Helper to visualize load balancing"""
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, model_validator
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Literal
 
 class CaseInput(BaseModel):
     case_id: str
@@ -9,10 +10,59 @@ class SignalInput(BaseModel):
     case_id: str
     signal_type: str 
     weight: float
+    # Event time (epoch seconds / ISO 8601); defaults to arrival time
+    timestamp: Optional[datetime] = None
 
 class AllocationRequest(BaseModel):
     cases: List[CaseInput]
     signals: List[SignalInput] = []
+    # "sum" = raw signal weights, "propagate" = spread across linked cases
+    momentum_mode: Literal["sum", "propagate"] = "sum"
+    # "optimal": capacity-constrained assignment maximizing sum(priority x agency score)
+    allocation_mode: Literal["greedy", "optimal"] = "greedy"
+    # "inline" = sop_steps on every case, "reference" = SOP table once + sop_tier per case
+    sop_mode: Literal["inline", "reference"] = "inline"
+
+class SignalDeltaRequest(BaseModel):
+    # New signal events for cases already held in the server-side case store
+    signals: List[SignalInput]
+
+# Numeric dtypes a columnar feature may declare
+FeatureDType = Literal["float64", "float32", "int64", "int32", "int16", "int8", "bool"]
+
+class ColumnarAllocationRequest(BaseModel):
+    """
+    Column-oriented alternative to AllocationRequest:
+    features[column][i] belongs to case_ids[i]; missing values are null.
+    """
+    case_ids: List[str]
+    features: Dict[str, List[Optional[float]]] = {}
+    dtypes: Dict[str, FeatureDType] = {}
+    signals: List[SignalInput] = []
+    momentum_mode: Literal["sum", "propagate"] = "sum"
+    # "optimal": capacity-constrained assignment maximizing sum(priority x agency score)
+    allocation_mode: Literal["greedy", "optimal"] = "greedy"
+    sop_mode: Literal["inline", "reference"] = "inline"
+
+    @model_validator(mode="after")
+    def check_column_lengths(self):
+        n = len(self.case_ids)
+        for col, values in self.features.items():
+            if len(values) != n:
+                raise ValueError(f"Feature column '{col}' has {len(values)} values, expected {n}")
+        return self
+
+class ColumnarAllocationResponse(BaseModel):
+    case_id: List[str]
+    ml_score: List[float]
+    graph_score: List[float]
+    final_priority_score: List[float]
+    assigned_dca: List[str]
+    sop_tier: List[int]
+    action_type: List[str]
+    # Exactly one of these is set, depending on sop_mode
+    sop_steps: Optional[List[List[str]]] = None
+    sop_templates: Optional[Dict[int, List[str]]] = None
 
 class AllocationResponse(BaseModel):
     case_id: str
@@ -21,4 +71,49 @@ class AllocationResponse(BaseModel):
     final_priority_score: float
     assigned_dca: str
     sop_steps: List[str]
-    action_type: str
\ No newline at end of file
+    action_type: str
+
+class AllocationRefResponse(BaseModel):
+    case_id: str
+    ml_score: float
+    graph_score: float
+    final_priority_score: float
+    assigned_dca: str
+    sop_tier: int
+    action_type: str
+
+class AllocationBatchResponse(BaseModel):
+    # sop_mode="reference": SOP steps are sent once and referenced by tier
+    sop_templates: Dict[int, List[str]]
+    cases: List[AllocationRefResponse]
+
+class CasePage(BaseModel):
+    # Resident cases (features + latest scores), highest priority first
+    cases: List[Dict[str, Any]]
+    # Pass back as ?cursor= for the next page; null on the last page
+    next_cursor: Optional[str] = None
+
+class DcaKpi(BaseModel):
+    cases: int
+    exposure: float
+
+class CaseKpiResponse(BaseModel):
+    n_cases: int
+    exposure: float
+    mean_score: float
+    escalations: int
+    by_action_type: Dict[str, int]
+    by_dca: Dict[str, DcaKpi]
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed", "cancelled"]
+    n_cases: int
+    processed: int
+    progress: float
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # NDJSON results (AllocationResponse per line), available once the job has finished
+    results_url: Optional[str] = None
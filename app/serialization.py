@@ -0,0 +1,75 @@
+import json
+import math
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the column encoder below
+    orjson = None
+
+
+def _encode_column(values: pd.Series) -> list:
+    """JSON-encodes one column at a time (one encoder call per distinct object for interned values)."""
+    if pd.api.types.is_bool_dtype(values.dtype):
+        return ["true" if v else "false" for v in values.tolist()]
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return list(map(str, values.tolist()))
+    if pd.api.types.is_float_dtype(values.dtype):
+        # NaN / inf are not valid JSON
+        return [repr(v) if math.isfinite(v) else "null" for v in values.tolist()]
+
+    # Object columns: cache by identity so interned SOP tuples / repeated ids are encoded once
+    cache = {}
+    out = []
+    for v in values.tolist():
+        key = id(v)
+        encoded = cache.get(key)
+        if encoded is None:
+            encoded = json.dumps(list(v) if isinstance(v, tuple) else v, ensure_ascii=False)
+            cache[key] = encoded
+        out.append(encoded)
+    return out
+
+
+def _encode_rows(df: pd.DataFrame, fields) -> list:
+    template = "{" + ",".join(f"{json.dumps(f)}:%s" for f in fields) + "}"
+    columns = [_encode_column(df[f]) for f in fields]
+    return [template % row for row in zip(*columns)]
+
+
+def encode_records(df: pd.DataFrame, fields) -> bytes:
+    """
+    Encodes df[fields] straight to a JSON array of objects, skipping
+    DataFrame -> dicts -> Pydantic re-validation.
+    """
+    fields = list(fields)
+    if orjson is not None:
+        columns = [df[f].tolist() for f in fields]
+        return orjson.dumps([dict(zip(fields, row)) for row in zip(*columns)])
+
+    return ("[" + ",".join(_encode_rows(df, fields)) + "]").encode("utf-8")
+
+
+def encode_ndjson(df: pd.DataFrame, fields) -> bytes:
+    fields = list(fields)
+    if orjson is not None:
+        columns = [df[f].tolist() for f in fields]
+        return b"".join(orjson.dumps(dict(zip(fields, row))) + b"\n" for row in zip(*columns))
+
+    return "".join(row + "\n" for row in _encode_rows(df, fields)).encode("utf-8")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        # Non-str keys (e.g. the int SOP tiers) are written as strings, as json.dumps does
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def render_model(adapter, obj) -> bytes:
+    """
+    Validates obj against a response model (pydantic TypeAdapter) and encodes it to JSON:
+    what FastAPI does with a response_model once the endpoint returns, done here so it can be timed.
+    """
+    return adapter.dump_json(adapter.validate_python(obj))
@@ -0,0 +1,275 @@
+import asyncio
+import collections
+import io
+import json
+import os
+import tempfile
+import threading
+
+import pandas as pd
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from app.schemas import AllocationResponse
+from app.serialization import encode_ndjson
+from services.scoring_service import compute_scores
+from services.allocation_service import allocate_cases_with_state
+
+# Cases scored + allocated per step of a streaming request
+STREAM_CHUNK_SIZE = 5000
+# Largest chunk_size a client may ask for (one chunk is held in memory at a time)
+MAX_STREAM_CHUNK_SIZE = int(os.environ.get("DCA_MAX_STREAM_CHUNK_SIZE", 50_000))
+# Arrow stream bytes received but not yet decoded before reading the body pauses
+ARROW_PIPE_BYTES = 8 * 1024 * 1024
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+ARROW_MEDIA_TYPES = (ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE)
+
+RESPONSE_FIELDS = list(AllocationResponse.model_fields)
+
+
+class StreamFormatError(ValueError):
+    pass
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body iterator is still reading the request body.
+    On ASGI < 2.4 StreamingResponse polls receive() for disconnects, which would
+    swallow the remaining request body chunks, so only the send side is driven here.
+    """
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+        if self.background is not None:
+            await self.background()
+
+
+def _case_record(line: dict, signals: dict) -> dict:
+    """
+    One NDJSON line = one case:
+    {"case_id": "C1", "features": {...}, "signals": [{"signal_type": "...", "weight": 1.5}]}
+    """
+    if not isinstance(line, dict) or "case_id" not in line:
+        raise StreamFormatError("Every NDJSON line needs a case_id")
+
+    record = {"case_id": line["case_id"]}
+    record.update(line.get("features") or {})
+
+    for s in line.get("signals") or []:
+        signals.setdefault(line["case_id"], []).append((s["signal_type"], float(s["weight"])))
+
+    return record
+
+
+def _parse_line(raw: bytes, signals: dict) -> dict:
+    try:
+        line = json.loads(raw)
+    except ValueError as e:
+        raise StreamFormatError(f"Invalid NDJSON line: {e}") from e
+
+    try:
+        return _case_record(line, signals)
+    except StreamFormatError:
+        raise
+    except (KeyError, TypeError, ValueError) as e:
+        raise StreamFormatError(f"Invalid case record for {line.get('case_id')}: {e}") from e
+
+
+async def iter_ndjson_chunks(byte_stream, chunk_size: int = STREAM_CHUNK_SIZE):
+    """Parses an async NDJSON byte stream into (DataFrame, signals) chunks without buffering the body."""
+    records, signals = [], {}
+    pending = b""
+
+    async for block in byte_stream:
+        pending += block
+        *lines, pending = pending.split(b"\n")
+
+        for raw in lines:
+            if not raw.strip():
+                continue
+            records.append(_parse_line(raw, signals))
+
+            if len(records) >= chunk_size:
+                yield pd.DataFrame(records), signals
+                records, signals = [], {}
+
+    if pending.strip():
+        records.append(_parse_line(pending, signals))
+
+    if records:
+        yield pd.DataFrame(records), signals
+
+
+def _arrow_signals(df: pd.DataFrame) -> dict:
+    # Optional list<struct<signal_type, weight>> column
+    signals = {}
+    if "signals" not in df.columns:
+        return signals
+
+    for cid, sigs in zip(df["case_id"], df.pop("signals")):
+        if sigs is None:
+            continue
+        for s in sigs:
+            signals.setdefault(cid, []).append((s["signal_type"], float(s["weight"])))
+    return signals
+
+
+class _BodyPipe(io.RawIOBase):
+    """
+    Blocking file object over request body blocks pushed from the event loop, so a
+    pyarrow reader in a worker thread can decode the body while it is still arriving.
+    feed() waits while more than max_bytes are buffered (back-pressure on the upload).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._blocks = collections.deque()
+        self._size = 0
+        self._eof = False
+        self._abandoned = False
+        self._cond = threading.Condition()
+
+    def readable(self) -> bool:
+        return True
+
+    def feed(self, block: bytes) -> None:
+        with self._cond:
+            self._cond.wait_for(lambda: self._size < self.max_bytes or self._abandoned)
+            if not self._abandoned:
+                self._blocks.append(memoryview(block))
+                self._size += len(block)
+                self._cond.notify_all()
+
+    def finish(self) -> None:
+        """No more input: reads drain the buffer, then see EOF."""
+        with self._cond:
+            self._eof = True
+            self._cond.notify_all()
+
+    def abandon(self) -> None:
+        """The reader is gone: drop the buffer and release a waiting feed()."""
+        with self._cond:
+            self._abandoned = True
+            self._blocks.clear()
+            self._size = 0
+            self._cond.notify_all()
+
+    def readinto(self, buffer) -> int:
+        # Fills the whole buffer unless the body ends: pyarrow reads a short read as end of stream
+        filled = 0
+        with self._cond:
+            while filled < len(buffer):
+                self._cond.wait_for(lambda: self._blocks or self._eof or self._abandoned)
+                if not self._blocks:
+                    break
+                head = self._blocks[0]
+                n = min(len(buffer) - filled, len(head))
+                buffer[filled:filled + n] = head[:n]
+                if n == len(head):
+                    self._blocks.popleft()
+                else:
+                    self._blocks[0] = head[n:]
+                self._size -= n
+                filled += n
+                self._cond.notify_all()
+        return filled
+
+
+def _arrow_batches(source, file_format: bool):
+    """Record batches of an Arrow IPC stream (file object), or of an Arrow IPC file (path, memory-mapped)."""
+    import pyarrow as pa
+
+    kind = "file" if file_format else "stream"
+    try:
+        if file_format:
+            reader = pa.ipc.open_file(pa.memory_map(source))
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = iter(pa.ipc.open_stream(source))
+        # A truncated or corrupt body can also fail on any later batch
+        for batch in batches:
+            yield batch
+    except pa.ArrowInvalid as e:
+        raise StreamFormatError(f"Invalid Arrow IPC {kind}: {e}") from e
+
+
+def _batch_chunks(batch, chunk_size: int):
+    for offset in range(0, batch.num_rows, chunk_size):
+        df = batch.slice(offset, chunk_size).to_pandas()
+        if "case_id" not in df.columns:
+            raise StreamFormatError("Arrow input needs a case_id column")
+        yield df, _arrow_signals(df)
+
+
+async def _iter_arrow_stream(byte_stream, chunk_size: int):
+    # The body is fed to the decoder as it arrives: one record batch (plus the pipe buffer) in memory
+    pipe = _BodyPipe(ARROW_PIPE_BYTES)
+
+    async def feed():
+        try:
+            async for block in byte_stream:
+                if block:
+                    await run_in_threadpool(pipe.feed, block)
+        finally:
+            pipe.finish()
+
+    feeder = asyncio.create_task(feed())
+    batches = _arrow_batches(pipe, file_format=False)
+    try:
+        while True:
+            batch = await run_in_threadpool(next, batches, None)
+            if batch is None:
+                break
+            for chunk in _batch_chunks(batch, chunk_size):
+                yield chunk
+        # Anything after the end-of-stream marker is drained without buffering;
+        # awaiting the feeder surfaces a client disconnect while the body was being read
+        pipe.abandon()
+        await feeder
+    finally:
+        pipe.abandon()
+        if not feeder.done():
+            feeder.cancel()
+
+
+async def _iter_arrow_file(byte_stream, chunk_size: int):
+    # The file format needs random access (footer last): spool to disk, then memory-map it
+    with tempfile.NamedTemporaryFile(prefix="dca-upload-", suffix=".arrow") as spool:
+        async for block in byte_stream:
+            spool.write(block)
+        spool.flush()
+
+        for batch in _arrow_batches(spool.name, file_format=True):
+            for chunk in _batch_chunks(batch, chunk_size):
+                yield chunk
+
+
+def iter_arrow_chunks(byte_stream, chunk_size: int = STREAM_CHUNK_SIZE, file_format: bool = False):
+    """
+    Reads an Arrow IPC stream or file (columns: case_id, feature columns, optional signals) in chunks.
+    Memory stays bounded by one record batch: the stream format is decoded while the body arrives,
+    the file format is spooled to a temporary file and read through a memory map.
+    """
+    if file_format:
+        return _iter_arrow_file(byte_stream, chunk_size)
+    return _iter_arrow_stream(byte_stream, chunk_size)
+
+
+def score_and_allocate_chunk(df_cases: pd.DataFrame, signals: dict, momentum_mode: str = "sum",
+                             allocation_mode: str = "greedy") -> bytes:
+    """Scores + allocates one chunk and returns its results as NDJSON bytes."""
+    if df_cases.empty:
+        return b""
+
+    scored_cases = compute_scores(df_cases, signals, momentum_mode=momentum_mode)
+    allocated = allocate_cases_with_state(scored_cases, mode=allocation_mode)
+
+    return encode_ndjson(allocated, RESPONSE_FIELDS)
@@ -0,0 +1,173 @@
+"""
+Pipeline benchmark suite.
+
+    python -m benchmarks.run --sizes 1000,10000,100000 --output bench.json
+
+Each stage is timed on its own and end to end, with peak traced memory measured in a
+separate (untimed) pass. Results are emitted as JSON so runs can be diffed across commits.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+# Runs reset agency capacity over and over: keep them away from the persisted state and any shared DB.
+# Set before anything imports services (they read these at import time).
+os.environ["DCA_STATE_DIR"] = ""
+os.environ["DCA_CAPACITY_BACKEND"] = "memory"
+
+from services.synthetic import generate_portfolio, generate_signals, to_payload
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# The HTTP stage builds a full JSON body; skip it above this size unless asked
+MAX_ROUTE_SIZE = 100_000
+
+STAGES = ["predict_recovery_probability", "graph", "compute_scores", "allocate_cases_with_state", "route_allocate"]
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def _cold_cache():
+    # Every timed run scores from scratch instead of hitting the previous run's cache
+    from services.score_cache import GRAPH_CACHE, SCORE_CACHE
+
+    SCORE_CACHE.clear()
+    GRAPH_CACHE.clear()
+
+
+def _reset_capacity():
+    from services.allocation_service import CAPACITY_BACKEND, STATE_DIR, load_dca_profiles
+
+    if STATE_DIR or CAPACITY_BACKEND != "memory":
+        raise RuntimeError("Refusing to reset persisted capacity state: import benchmarks.run before services")
+    _cold_cache()
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_dca_profiles(restore=False)
+
+
+def _stage_fns(df, signals, payload, client):
+    from engines.ml_engine import predict_recovery_probability
+    from engines.graph_engine import build_case_graph, compute_case_rank
+    from services.scoring_service import compute_scores
+    from services.allocation_service import allocate_cases_with_state
+
+    scored = compute_scores(df, signals)
+
+    def route():
+        response = client.post("/allocate?fast=true", json=payload)
+        response.raise_for_status()
+
+    return {
+        "predict_recovery_probability": (None, lambda: predict_recovery_probability(df)),
+        "graph": (None, lambda: compute_case_rank(build_case_graph(df, signals))),
+        "compute_scores": (_cold_cache, lambda: compute_scores(df, signals)),
+        "allocate_cases_with_state": (_reset_capacity, lambda: allocate_cases_with_state(scored.copy())),
+        "route_allocate": (_reset_capacity, route),
+    }
+
+
+def _time(setup, fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_mb(setup, fn) -> float:
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+
+def run(sizes, stages, repeat: int = 3, max_route_size: int = MAX_ROUTE_SIZE, seed: int = 0) -> dict:
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    results = []
+    with TestClient(app) as client:
+        for n in sizes:
+            df = generate_portfolio(n, seed=seed)
+            signals = generate_signals(df["case_id"], seed=seed)
+            use_route = "route_allocate" in stages and n <= max_route_size
+            payload = to_payload(df, signals) if use_route else None
+
+            fns = _stage_fns(df, signals, payload, client)
+
+            for stage in stages:
+                if stage == "route_allocate" and not use_route:
+                    continue
+                setup, fn = fns[stage]
+                seconds = _time(setup, fn, repeat)
+                peak = _peak_mb(setup, fn)
+                results.append({
+                    "stage": stage,
+                    "n_cases": n,
+                    "n_signals": sum(len(s) for s in signals.values()),
+                    "seconds": seconds,
+                    "cases_per_second": n / seconds if seconds > 0 else None,
+                    "peak_mb": peak,
+                })
+                print(f"{stage:<30} n={n:>10,} {seconds * 1000:>10.1f} ms {peak:>9.1f} MB", file=sys.stderr)
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scoring + allocation pipeline.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma separated portfolio sizes (1k .. 10M)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Subset of: {', '.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage (best is reported)")
+    parser.add_argument("--max-route-size", type=int, default=MAX_ROUTE_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    # Keep stdout clean for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run(sizes, stages, repeat=args.repeat, max_route_size=args.max_route_size, seed=args.seed)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
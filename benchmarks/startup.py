@@ -0,0 +1,145 @@
+"""
+Cold-start benchmark.
+
+    python -m benchmarks.startup --runs 3 --output startup.json
+
+Each run starts from a fresh interpreter: import time of app.main (plus the slowest
+modules from -X importtime), then a real uvicorn process timed until it answers "/",
+until /ready turns 200 and until its first /allocate response.
+"""
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks.run import _git_commit
+
+APP = "app.main:app"
+TOP_MODULES = 10
+POLL_INTERVAL = 0.01
+TIMEOUT = 60.0
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+FIRST_REQUEST = {
+    "cases": [{"case_id": "BENCH_1", "features": {"loan_amnt": 10000, "annual_inc": 50000, "dti": 20.0, "int_rate": 12.0}}],
+    "signals": [{"case_id": "BENCH_1", "signal_type": "CALL_ANSWERED", "weight": 1.5}],
+}
+
+
+def _env() -> dict:
+    # Keep benchmark runs away from the persisted capacity state
+    return dict(os.environ, PYTHONPATH=os.getcwd(), DCA_STATE_DIR="", DCA_CAPACITY_BACKEND="memory")
+
+
+def import_seconds() -> float:
+    out = subprocess.check_output([sys.executable, "-c", _IMPORT_SNIPPET], env=_env(), text=True, stderr=subprocess.DEVNULL)
+    return float(out.strip().splitlines()[-1])
+
+
+def slowest_imports(n: int = TOP_MODULES) -> list:
+    """Direct imports of app.main by cumulative import time (-X importtime)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app.main"],
+                          env=_env(), capture_output=True, text=True)
+    totals = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.rstrip()
+        # Only direct children of app.main (one indent level below it)
+        if name.startswith("   ") and not name.startswith("    "):
+            totals[name.strip()] = int(cumulative) / 1e6
+    return [{"module": m, "seconds": s} for m, s in sorted(totals.items(), key=lambda kv: -kv[1])[:n]]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _request(url: str, payload=None) -> int:
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=TIMEOUT) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def _wait_for(url: str, start: float) -> float:
+    while time.perf_counter() - start < TIMEOUT:
+        if _request(url) == 200:
+            return time.perf_counter() - start
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f"{url} did not answer 200 within {TIMEOUT}s")
+
+
+def server_timings() -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", APP, "--port", str(port), "--log-level", "warning"],
+        env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        live = _wait_for(f"{base}/", start)
+        ready = _wait_for(f"{base}/ready", start)
+        status = _request(f"{base}/allocate", FIRST_REQUEST)
+        if status != 200:
+            raise RuntimeError(f"First /allocate answered {status}")
+        return {"live_seconds": live, "ready_seconds": ready, "first_allocate_seconds": time.perf_counter() - start}
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run(runs: int = 3) -> dict:
+    results = []
+    for i in range(runs):
+        result = {"run": i, "import_seconds": import_seconds(), **server_timings()}
+        results.append(result)
+        print(
+            f"run {i}: import {result['import_seconds'] * 1000:.0f} ms, live {result['live_seconds'] * 1000:.0f} ms, "
+            f"ready {result['ready_seconds'] * 1000:.0f} ms, first /allocate {result['first_allocate_seconds'] * 1000:.0f} ms",
+            file=sys.stderr,
+        )
+
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "slowest_imports": slowest_imports(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark API cold start (imports, readiness, first response).")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh server starts to time")
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = run(args.runs)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Flat NumPy form of the recovery model.
+
+    python -m engines.compiled_model
+
+exports models/recovery_model.pkl to models/recovery_model.npz: the coefficient vector,
+intercept, classes, feature list and imputation values, plus a digest of the pickles it
+was built from. The registry serves from the .npz while that digest matches, so the
+serving path never imports scikit-learn or joblib.
+"""
+import argparse
+import hashlib
+import os
+import warnings
+
+import numpy as np
+
+from engines.feature_schema import FeatureMatrix, FeatureSchema
+
+# predict_proba within this absolute tolerance or the export is refused
+EXPORT_TOLERANCE = 1e-6
+# Synthetic rows checked against predict_proba at export time
+CHECK_ROWS = 10_000
+
+
+def source_digest(paths) -> str:
+    """sha256 over the pickle files (missing files hash as empty)."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(os.path.basename(path).encode("utf-8"))
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                h.update(f.read())
+    return h.hexdigest()
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    # Same stable form scikit-learn uses (scipy.special.expit)
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+class CompiledModel:
+    """
+    Binary linear classifier: P(class 1) = sigmoid(x . coef + intercept).
+
+    predict_proba_encoded() works on a FeatureMatrix directly: numeric columns and one-hot
+    flags are one matrix-vector product each.
+    """
+
+    def __init__(self, coef: np.ndarray, intercept: float, classes, features: list,
+                 imputation: dict = None, digest: str = ""):
+        self.coef_ = np.asarray(coef, dtype=np.float64).reshape(1, -1)
+        self.intercept_ = np.array([float(intercept)])
+        self.classes_ = np.asarray(classes)
+        self.features = list(features)
+        self.imputation = dict(imputation or {})
+        self.digest = digest
+
+        if self.coef_.shape[1] != len(self.features):
+            raise ValueError(f"{self.coef_.shape[1]} coefficients for {len(self.features)} features")
+
+        self.schema = FeatureSchema(self.features, self.imputation)
+        weights = dict(zip(self.features, self.coef_[0]))
+        self._numeric_coef = np.array([weights[c] for c in self.schema.numeric])
+        self._flag_coef = np.array([weights[c] for c in self.schema.one_hot])
+
+    @classmethod
+    def from_estimator(cls, model, features: list, imputation: dict = None, digest: str = ""):
+        coef = getattr(model, "coef_", None)
+        classes = getattr(model, "classes_", None)
+        if coef is None or classes is None or np.shape(coef)[0] != 1 or len(classes) != 2:
+            raise ValueError(f"Only binary linear classifiers can be compiled, got {type(model).__name__}")
+        return cls(coef, np.ravel(model.intercept_)[0], classes, features, imputation, digest)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["coef"], float(data["intercept"]), data["classes"], data["features"].tolist(),
+                dict(zip(data["imputation_keys"].tolist(), data["imputation_values"].tolist())),
+                str(data["digest"]),
+            )
+
+    def save(self, path: str) -> None:
+        keys = sorted(self.imputation)
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            coef=self.coef_[0],
+            intercept=self.intercept_[0],
+            classes=self.classes_,
+            features=np.array(self.features, dtype=str),
+            imputation_keys=np.array(keys, dtype=str),
+            imputation_values=np.array([self.imputation[k] for k in keys], dtype=np.float64),
+            digest=np.array(self.digest),
+        )
+        os.replace(tmp, path)
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef_[0] + self.intercept_[0]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Dense (n, len(features)) input, same output layout as scikit-learn."""
+        p = _sigmoid(self.decision_function(X))
+        return np.column_stack([1.0 - p, p])
+
+    def predict_proba_encoded(self, fm: FeatureMatrix) -> np.ndarray:
+        """predict_proba straight from the typed matrix (no dense expansion)."""
+        z = fm.imputed() @ self._numeric_coef + fm.flags @ self._flag_coef + self.intercept_[0]
+        p = _sigmoid(z)
+        return np.column_stack([1.0 - p, p])
+
+
+def _check_rows(features: list, n: int, seed: int = 0) -> np.ndarray:
+    """Random dense rows: numeric columns around their usual scale, one flag set per group."""
+    schema = FeatureSchema(features)
+    rng = np.random.default_rng(seed)
+    X = np.zeros((n, len(features)))
+    positions = {f: j for j, f in enumerate(features)}
+    for c in schema.numeric:
+        X[:, positions[c]] = rng.lognormal(2.0, 2.0, n) * rng.choice([-1.0, 1.0], n, p=[0.1, 0.9])
+    for base in schema.group_names:
+        cols = [positions[name] for _, name in schema.groups[base]]
+        pick = rng.integers(0, len(cols) + 1, n)
+        active = pick > 0
+        X[np.flatnonzero(active), np.array(cols)[pick[active] - 1]] = 1.0
+    return X
+
+
+def export(output: str = None) -> dict:
+    """Compiles the registry pickles to .npz after checking predict_proba agreement."""
+    import joblib
+
+    from engines.model_registry import (
+        COMPILED_MODEL_PATH, FEATURES_PATH, IMPUTATION_PATH, MODEL_PATH, _normalize_imputation,
+    )
+
+    output = output or COMPILED_MODEL_PATH
+    sources = (MODEL_PATH, FEATURES_PATH, IMPUTATION_PATH)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = joblib.load(MODEL_PATH)
+        features = list(joblib.load(FEATURES_PATH))
+        raw_imputation = joblib.load(IMPUTATION_PATH) if os.path.exists(IMPUTATION_PATH) else {}
+
+    compiled = CompiledModel.from_estimator(
+        model, features, _normalize_imputation(raw_imputation, features), source_digest(sources),
+    )
+
+    X = _check_rows(features, CHECK_ROWS)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = model.predict_proba(X)
+    max_error = float(np.abs(compiled.predict_proba(X) - expected).max())
+    if max_error > EXPORT_TOLERANCE:
+        raise ValueError(f"Compiled model differs from predict_proba by {max_error:.3g}")
+
+    compiled.save(output)
+    return {"output": output, "features": len(features), "groups": len(compiled.schema.groups),
+            "max_abs_error": max_error, "digest": compiled.digest}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the recovery model to a pure-NumPy .npz.")
+    parser.add_argument("--output", help="Destination .npz (default: models/recovery_model.npz)")
+    args = parser.parse_args(argv)
+
+    report = export(args.output)
+    print(f"✅ Exported {report['features']} features ({report['groups']} one-hot groups) to {report['output']} "
+          f"(max |Δ predict_proba| = {report['max_abs_error']:.2e})")
+
+
+if __name__ == "__main__":
+    main()
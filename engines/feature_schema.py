@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+# Features the financial heuristic reads (its schema when no model is available)
+HEURISTIC_FEATURES = [
+    "annual_inc", "dti", "revol_util", "int_rate",
+    "home_ownership_OWN", "home_ownership_RENT", "emp_length_10+ years",
+]
+
+
+# Categorical inputs of the model and their categories, one-hot encoded at training time as
+# '<base>_<category>' columns (pd.get_dummies(drop_first=True): the first category is the baseline)
+CATEGORICAL_FEATURES = {
+    "term": [" 36 months", " 60 months"],
+    "emp_length": [
+        "1 year", "10+ years", "2 years", "3 years", "4 years", "5 years",
+        "6 years", "7 years", "8 years", "9 years", "< 1 year",
+    ],
+    "home_ownership": ["ANY", "MORTGAGE", "NONE", "OTHER", "OWN", "RENT"],
+}
+
+# Columns the heuristic compares against thresholds: kept in float64 next to the float32 matrix
+EXACT_FEATURES = ["annual_inc", "dti", "revol_util", "int_rate"]
+
+
+def one_hot_groups(features: list, categories: dict = CATEGORICAL_FEATURES) -> dict:
+    """
+    One-hot groups of a feature list (base -> [(category, column)], in feature order):
+    the '<base>_<category>' columns of each declared categorical feature.
+    """
+    position = {f: j for j, f in enumerate(features)}
+    groups = {}
+    for base, values in categories.items():
+        members = [(value, f"{base}_{value}") for value in values if f"{base}_{value}" in position]
+        if members:
+            groups[base] = sorted(members, key=lambda m: position[m[1]])
+    return dict(sorted(groups.items(), key=lambda g: position[g[1][0][1]]))
+
+
+def _to_numeric(values: pd.Series) -> pd.Series:
+    # Already-numeric columns skip the (per-call costly) coercion
+    if pd.api.types.is_numeric_dtype(values):
+        return values
+    return pd.to_numeric(values, errors="coerce")
+
+
+class FeatureSchema:
+    """
+    Typed layout of the model features: numeric columns go to one float32 matrix,
+    one-hot columns to a uint8 flag matrix (every flag kept as sent, several per group allowed),
+    and the heuristic threshold columns (EXACT_FEATURES) also to a float64 matrix.
+    Built once per model from model_features.pkl + imputation_values.pkl; the one-hot
+    groups are the declared CATEGORICAL_FEATURES columns present in the feature list.
+    """
+
+    def __init__(self, features: list, imputation: dict = None, groups: dict = None,
+                 exact: list = EXACT_FEATURES):
+        self.features = list(features)
+        self.groups = one_hot_groups(self.features) if groups is None else groups
+        self.group_names = list(self.groups)
+        self.one_hot = [name for base in self.group_names for _, name in self.groups[base]]
+        grouped = set(self.one_hot)
+        self.numeric = [f for f in self.features if f not in grouped]
+        self.exact = list(exact)
+
+        imputation = imputation or {}
+        # Missing numeric values: stored training value, else 0 (as before)
+        self.fill = np.array([imputation.get(c, 0.0) for c in self.numeric], dtype=np.float32)
+
+        self._numeric_pos = {c: j for j, c in enumerate(self.numeric)}
+        self._exact_pos = {c: j for j, c in enumerate(self.exact)}
+        # one-hot column name -> flag column
+        self._flag_pos = {name: k for k, name in enumerate(self.one_hot)}
+
+    def encode(self, df: pd.DataFrame) -> "FeatureMatrix":
+        """Coerces the incoming feature columns once. Unknown columns are ignored."""
+        n = len(df)
+        numeric = np.full((n, len(self.numeric)), np.nan, dtype=np.float32)
+        exact = np.full((n, len(self.exact)), np.nan, dtype=np.float64)
+        present = set()
+        for col in dict.fromkeys(self.numeric + self.exact):
+            if col in df.columns:
+                values = _to_numeric(df[col])
+                if col in self._numeric_pos:
+                    numeric[:, self._numeric_pos[col]] = values.to_numpy(dtype=np.float32, na_value=np.nan)
+                if col in self._exact_pos:
+                    exact[:, self._exact_pos[col]] = values.to_numpy(dtype=np.float64, na_value=np.nan)
+                present.add(col)
+
+        flags = np.zeros((n, len(self.one_hot)), dtype=np.uint8)
+        for base in self.group_names:
+            # Raw categorical column ("home_ownership": "RENT") sets its category's flag ...
+            if base in df.columns:
+                lookup = {value.strip(): self._flag_pos[name] for value, name in self.groups[base]}
+                k = df[base].astype(str).str.strip().map(lookup).to_numpy(dtype=np.float64, na_value=np.nan)
+                rows = np.flatnonzero(~np.isnan(k))
+                flags[rows, k[rows].astype(np.intp)] = 1
+                present.add(base)
+        # ... one-hot flags are taken as sent
+        for k, name in enumerate(self.one_hot):
+            if name in df.columns:
+                flags[:, k] |= np.asarray(df[name].to_numpy() == 1, dtype=np.uint8)
+                present.add(name)
+
+        return FeatureMatrix(self, np.ascontiguousarray(numeric), exact, flags, frozenset(present))
+
+
+class FeatureMatrix:
+    """
+    Encoded features of one batch: float32 numeric matrix (NaN = missing), float64 threshold
+    columns and uint8 one-hot flags.
+    """
+
+    def __init__(self, schema: FeatureSchema, numeric: np.ndarray, exact: np.ndarray, flags: np.ndarray,
+                 present: frozenset):
+        self.schema = schema
+        self.numeric = numeric
+        self.exact = exact
+        self.flags = flags
+        self.present = present
+
+    def __len__(self) -> int:
+        return self.numeric.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.numeric.nbytes + self.exact.nbytes + self.flags.nbytes
+
+    def take(self, rows) -> "FeatureMatrix":
+        """Subset of the rows (index array or boolean mask), same schema and sent columns."""
+        return FeatureMatrix(self.schema, self.numeric[rows], self.exact[rows], self.flags[rows], self.present)
+
+    def imputed(self) -> np.ndarray:
+        """Numeric matrix with missing values filled in bulk."""
+        return np.where(np.isnan(self.numeric), self.schema.fill, self.numeric)
+
+    def dense(self) -> np.ndarray:
+        """(n, len(features)) float32 in model feature order, one-hot flags expanded as sent."""
+        out = np.zeros((len(self), len(self.schema.features)), dtype=np.float32)
+        positions = {f: j for j, f in enumerate(self.schema.features)}
+        out[:, [positions[c] for c in self.schema.numeric]] = self.imputed()
+        out[:, [positions[c] for c in self.schema.one_hot]] = self.flags
+        return out
+
+    def column(self, name: str, default: float) -> np.ndarray:
+        """One numeric feature as float64 (NaN kept); `default` only when the column was not sent."""
+        if name not in self.present:
+            return np.full(len(self), default, dtype=np.float64)
+        if name in self.schema._exact_pos:
+            return self.exact[:, self.schema._exact_pos[name]].copy()
+        if name in self.schema._numeric_pos:
+            return self.numeric[:, self.schema._numeric_pos[name]].astype(np.float64)
+        return np.full(len(self), default, dtype=np.float64)
+
+    def flag(self, name: str) -> np.ndarray:
+        """True where one-hot feature `name` is set."""
+        if name not in self.schema._flag_pos:
+            return np.zeros(len(self), dtype=bool)
+        return self.flags[:, self.schema._flag_pos[name]].astype(bool)
+
+
+# Schema used by the heuristic when no model is loaded
+HEURISTIC_SCHEMA = FeatureSchema(HEURISTIC_FEATURES)
@@ -1,49 +1,138 @@
-import networkx as nx
+import numpy as np
 import pandas as pd
 
+# Optional case attribute used to link cases of the same debtor / account group
+COUNTERPARTY_COLUMN = "counterparty_id"
 
-def build_case_graph(df: pd.DataFrame, signals: dict) -> nx.Graph:
-    G = nx.Graph()
+# Propagation defaults (PageRank-style)
+DAMPING = 0.85
+MAX_ITER = 100
+TOLERANCE = 1e-8
 
-    # Add Case Nodes
-    for cid in df["case_id"]:
-        G.add_node(f"CASE_{cid}", node_type="case")
+MOMENTUM_MODES = ("sum", "propagate")
 
-    # Add Signals
+
+class CaseSignalGraph:
+    """
+    Sparse case x signal-type incidence graph.
+
+    incidence[i, j] holds the summed weight of all signals of type j on case i,
+    presence[i, j] is 1 when case i has at least one signal of type j.
+    """
+
+    def __init__(self, case_ids, signal_types, incidence, presence, counterparty=None):
+        self.case_ids = case_ids
+        self.signal_types = signal_types
+        self.incidence = incidence
+        self.presence = presence
+        # Optional case x counterparty one-hot matrix
+        self.counterparty = counterparty
+
+    @property
+    def n_cases(self) -> int:
+        return len(self.case_ids)
+
+
+def build_case_graph(df: pd.DataFrame, signals: dict, counterparty_col: str = COUNTERPARTY_COLUMN) -> CaseSignalGraph:
+    # Deferred: scipy.sparse is only needed once a graph is actually built
+    from scipy import sparse
+
+    case_ids = pd.Index(pd.unique(df["case_id"]))
+
+    # Flatten signals into COO triplets; signals for unknown cases are ignored
+    cids, names, weights = [], [], []
     for cid, sigs in signals.items():
-        case_node = f"CASE_{cid}"
-        if not G.has_node(case_node):
-            continue
+        # (name, weight) or (name, weight, timestamp)
+        for name, weight, *_ in sigs:
+            cids.append(cid)
+            names.append(name)
+            weights.append(weight)
 
-        for idx, (name, weight) in enumerate(sigs):
-        
-            sig_node = f"SIG_{name}_{idx}_{cid}"
+    rows = case_ids.get_indexer(pd.Index(cids, dtype=object))
+    known = rows >= 0
 
-            G.add_node(sig_node, node_type="signal", signal=name)
-            G.add_edge(
-                case_node,
-                sig_node,
-                weight=float(weight)
-            )
+    type_codes, signal_types = pd.factorize(np.asarray(names, dtype=object)[known])
+    values = np.asarray(weights, dtype=np.float64)[known]
+    rows = rows[known]
 
-    return G
+    shape = (len(case_ids), len(signal_types))
+    incidence = sparse.csr_matrix((values, (rows, type_codes)), shape=shape)
+    presence = sparse.csr_matrix((np.ones(len(rows)), (rows, type_codes)), shape=shape)
+    presence.data[:] = 1.0
 
+    counterparty = None
+    if counterparty_col in df.columns:
+        # One value per unique case (first occurrence wins)
+        cp = df.drop_duplicates("case_id").set_index("case_id")[counterparty_col].reindex(case_ids)
+        cp_codes, cp_values = pd.factorize(cp)
+        linked = cp_codes >= 0
+        counterparty = sparse.csr_matrix(
+            (np.ones(int(linked.sum())), (np.flatnonzero(linked), cp_codes[linked])),
+            shape=(len(case_ids), len(cp_values)),
+        )
 
-def compute_case_rank(G: nx.Graph) -> dict:
+    return CaseSignalGraph(case_ids, list(signal_types), incidence, presence, counterparty)
+
+
+def _shared_neighbour_operator(graph: CaseSignalGraph):
     """
-    Returns raw momentum per case by summing connected signal weights.
+    Returns (matvec, degree) for the case-case graph where two cases are linked once per
+    shared signal type / counterparty. The n x n matrix is never materialized:
+    A @ x = B @ (B.T @ x) - diag(B @ B.T) * x for each bipartite matrix B.
     """
-    momentum = {}
+    from scipy import sparse
+
+    blocks = [graph.presence]
+    if graph.counterparty is not None:
+        blocks.append(graph.counterparty)
 
-    for node, data in G.nodes(data=True):
-        if data.get("node_type") != "case":
-            continue
+    B = sparse.hstack(blocks, format="csr")
+    BT = B.T.tocsr()
+    self_links = np.asarray(B.multiply(B).sum(axis=1)).ravel()
 
-        total_weight = 0.0
-        for neighbor in G.neighbors(node):
-            edge_data = G.get_edge_data(node, neighbor)
-            total_weight += edge_data.get("weight", 0.0)
+    def matvec(x):
+        return B @ (BT @ x) - self_links * x
+
+    degree = matvec(np.ones(graph.n_cases))
+    return matvec, degree
+
+
+def propagate_momentum(graph: CaseSignalGraph, momentum: np.ndarray, damping: float = DAMPING,
+                       max_iter: int = MAX_ITER, tol: float = TOLERANCE) -> np.ndarray:
+    """
+    Personalized PageRank-style propagation via sparse power iteration:
+        r = (1 - d) * m + d * W @ r
+    W is the row-normalized shared-neighbour graph. Isolated cases keep their own momentum.
+    """
+    if graph.n_cases == 0:
+        return momentum
+
+    matvec, degree = _shared_neighbour_operator(graph)
+    isolated = degree <= 0
+    safe_degree = np.where(isolated, 1.0, degree)
+
+    r = momentum.copy()
+    for _ in range(max_iter):
+        spread = np.where(isolated, r, matvec(r) / safe_degree)
+        r_next = (1 - damping) * momentum + damping * spread
+        if np.abs(r_next - r).max() < tol:
+            return r_next
+        r = r_next
+
+    return r
+
+
+def compute_case_rank(G: CaseSignalGraph, mode: str = "sum", **kwargs) -> dict:
+    """
+    Returns raw momentum per case.
+    mode="sum": summed signal weights (single sparse mat-vec).
+    mode="propagate": momentum spread across cases sharing signal types / counterparties.
+    """
+    momentum = G.incidence @ np.ones(G.incidence.shape[1])
 
-        momentum[node.replace("CASE_", "")] = total_weight
+    if mode == "propagate":
+        momentum = propagate_momentum(G, momentum, **kwargs)
+    elif mode != "sum":
+        raise ValueError(f"Unknown momentum mode: {mode}")
 
-    return momentum
+    return dict(zip(G.case_ids, momentum))
@@ -1,67 +1,110 @@
-import joblib
+import numpy as np
 import pandas as pd
-import os
 import warnings
 
-# Path to your pickle file
-MODEL_PATH = "models/recovery_model.pkl"
+from engines.compiled_model import CompiledModel
+from engines.feature_schema import FeatureMatrix, HEURISTIC_SCHEMA
+from engines.model_registry import MODEL_REGISTRY
 
-def predict_recovery_probability(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    model_loaded = False
-    
-    # 1. Try Loading the Pickle Model
-    if os.path.exists(MODEL_PATH):
+
+def financial_risk_heuristic(features) -> np.ndarray:
+    """
+    Columnar version of the financial risk rules: every threshold is one array operation.
+    Produces the same scores as financial_risk_heuristic_row applied row by row
+    (threshold columns are compared at full float64 precision, one-hot flags as sent).
+    features: FeatureMatrix, or a DataFrame (encoded with HEURISTIC_SCHEMA).
+    """
+    if not isinstance(features, FeatureMatrix):
+        features = HEURISTIC_SCHEMA.encode(features)
+    score = np.full(len(features), 0.75)
+
+    #  A. INCOME & DEBT
+    annual_inc = features.column("annual_inc", 50000)
+    dti = features.column("dti", 20)  # Debt-to-Income Ratio
+
+    # Higher income = Better score
+    score = np.where(annual_inc > 80000, score + 0.10, score)
+    score = np.where(annual_inc < 30000, score - 0.10, score)
+
+    # Lower DTI = Better score
+    score = np.where(dti > 25, score - 0.15, score)  # High debt burden
+    score = np.where(dti < 12, score + 0.05, score)
+
+    #  B. CREDIT UTILIZATION (Financial Stress)
+    revol_util = features.column("revol_util", 50)
+    score = np.where(revol_util > 70, score - 0.10, score)  # Maxed out cards
+    score = np.where(revol_util < 30, score + 0.05, score)
+
+    #  C. STABILITY (Home & Employment)
+    score = np.where(features.flag("home_ownership_OWN"), score + 0.05, score)
+    score = np.where(features.flag("home_ownership_RENT"), score - 0.05, score)
+    score = np.where(features.flag("emp_length_10+ years"), score + 0.05, score)
+
+    #  D. LOAN CHARACTERISTICS
+    # High interest rate often implies sub-prime risk
+    int_rate = features.column("int_rate", 10)
+    score = np.where(int_rate > 15, score - 0.10, score)
+
+    # Sanity Cap (0.01 to 0.99)
+    return np.clip(score, 0.01, 0.99)
+
+
+def financial_risk_heuristic_row(row) -> float:
+    """Row-wise reference implementation of the heuristic (kept for equivalence checks)."""
+    score = 0.75
+
+    annual_inc = float(row.get("annual_inc", 50000))
+    dti = float(row.get("dti", 20))
+
+    if annual_inc > 80000: score += 0.10
+    if annual_inc < 30000: score -= 0.10
+
+    if dti > 25: score -= 0.15
+    if dti < 12: score += 0.05
+
+    revol_util = float(row.get("revol_util", 50))
+    if revol_util > 70: score -= 0.10
+    if revol_util < 30: score += 0.05
+
+    if row.get("home_ownership_OWN", 0) == 1: score += 0.05
+    if row.get("home_ownership_RENT", 0) == 1: score -= 0.05
+
+    if row.get("emp_length_10+ years", 0) == 1: score += 0.05
+
+    int_rate = float(row.get("int_rate", 10))
+    if int_rate > 15: score -= 0.10
+
+    return max(0.01, min(score, 0.99))
+
+
+def recovery_probability(features: FeatureMatrix, bundle) -> np.ndarray:
+    """
+    ML prior of already encoded cases: `features` is bundle.schema.encode(...)
+    (HEURISTIC_SCHEMA.encode(...) when there is no model).
+    """
+    # 1. Batched inference with the registry model (loaded once, hot-reloaded on change)
+    if bundle is not None and len(features):
         try:
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                model = joblib.load(MODEL_PATH)
-                pass
+            if isinstance(bundle.model, CompiledModel):
+                proba = bundle.model.predict_proba_encoded(features)
+            else:
+                X = features.dense()
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    proba = bundle.model.predict_proba(X)
+            return proba[:, bundle.positive_index]
         except Exception as e:
-            print(f"⚠️ Model load failed ({e}). Using Financial Heuristic.")
-    
-    # 2. Heuristic Logic 
-    if not model_loaded:
-        def financial_risk_heuristic(row):
-          
-            score = 0.75 
-            
-            #  A. INCOME & DEBT  
-            annual_inc = float(row.get("annual_inc", 50000))
-            dti = float(row.get("dti", 20)) # Debt-to-Income Ratio
-            
-            # Higher income = Better score
-            if annual_inc > 80000: score += 0.10
-            if annual_inc < 30000: score -= 0.10
-            
-            # Lower DTI = Better score
-            if dti > 25: score -= 0.15 # High debt burden
-            if dti < 12: score += 0.05
-            
-            #  B. CREDIT UTILIZATION (Financial Stress) 
-            revol_util = float(row.get("revol_util", 50))
-            if revol_util > 70: score -= 0.10 # Maxed out cards
-            if revol_util < 30: score += 0.05
-            
-            #  C. STABILITY (Home & Employment) 
-            # Home Ownership
-            if row.get("home_ownership_OWN", 0) == 1: score += 0.05
-            if row.get("home_ownership_RENT", 0) == 1: score -= 0.05
-            
-            # Employment Length (Stability)
-            if row.get("emp_length_10+ years", 0) == 1: score += 0.05
-            
-            #  D. LOAN CHARACTERISTICS 
-            loan_amnt = float(row.get("loan_amnt", 10000))
-            int_rate = float(row.get("int_rate", 10))
-            
-            # High interest rate often implies sub-prime risk
-            if int_rate > 15: score -= 0.10
-            
-            # Sanity Cap (0.01 to 0.99)
-            return max(0.01, min(score, 0.99))
-
-        # Apply the new logic
-        df["recovery_probability"] = df.apply(financial_risk_heuristic, axis=1)
-    
-    return df
\ No newline at end of file
+            print(f"⚠️ Model inference failed ({e}). Using Financial Heuristic.")
+
+    # 2. Heuristic Logic (columnar)
+    return financial_risk_heuristic(features)
+
+
+def predict_recovery_probability(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+
+    # Features are coerced once into the typed matrix; model and heuristic both read it
+    bundle = MODEL_REGISTRY.get()
+    features = (bundle.schema if bundle is not None else HEURISTIC_SCHEMA).encode(df)
+    df["recovery_probability"] = recovery_probability(features, bundle)
+    return df
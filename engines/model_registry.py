@@ -0,0 +1,167 @@
+import os
+import threading
+import warnings
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from engines.compiled_model import CompiledModel, source_digest
+from engines.feature_schema import FeatureSchema
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+
+MODEL_PATH = os.path.join(BASE_DIR, "recovery_model.pkl")
+FEATURES_PATH = os.path.join(BASE_DIR, "model_features.pkl")
+IMPUTATION_PATH = os.path.join(BASE_DIR, "imputation_values.pkl")
+# Pure-NumPy export of the three pickles above (python -m engines.compiled_model)
+COMPILED_MODEL_PATH = os.path.join(BASE_DIR, "recovery_model.npz")
+
+# Suffixes used by the training notebook when it dumped imputation values
+IMPUTATION_SUFFIXES = ("_median", "_mean", "_mode")
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    model: object
+    features: list
+    imputation: dict = field(default_factory=dict)
+    version: tuple = ()
+    # Typed float32 / category-code layout of `features`
+    schema: FeatureSchema = None
+
+    @property
+    def positive_index(self) -> int:
+        # Class 1 = recovered / fully paid
+        classes = list(getattr(self.model, "classes_", [0, 1]))
+        return classes.index(1) if 1 in classes else len(classes) - 1
+
+
+def _normalize_imputation(raw: dict, features: list) -> dict:
+    """
+    Maps '<feature>_median' style keys onto model feature names.
+    Values stored as a full training column (pd.Series) are reduced to their mode.
+    """
+    values = {}
+    for key, value in (raw or {}).items():
+        if isinstance(value, pd.Series):
+            column = value.name if value.name in features else None
+            mode = value.mode()
+            value = mode.iloc[0] if not mode.empty else 0
+        else:
+            column = None
+
+        if column is None:
+            column = key
+            for suffix in IMPUTATION_SUFFIXES:
+                if key.endswith(suffix):
+                    column = key[: -len(suffix)]
+                    break
+
+        if column in features:
+            values[column] = float(value)
+
+    return values
+
+
+class ModelRegistry:
+    """
+    Process-wide holder for the recovery model artifacts.
+    Loads the pickles once and only reloads them when a file changes on disk.
+    """
+
+    def __init__(self, model_path=MODEL_PATH, features_path=FEATURES_PATH, imputation_path=IMPUTATION_PATH,
+                 compiled_path=COMPILED_MODEL_PATH):
+        self.model_path = model_path
+        self.features_path = features_path
+        self.imputation_path = imputation_path
+        self.compiled_path = compiled_path
+
+        self._lock = threading.Lock()
+        self._bundle = None
+        self._signature = None
+
+    def _file_signature(self):
+        signature = []
+        for path in (self.model_path, self.features_path, self.imputation_path, self.compiled_path):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _load_compiled(self, signature):
+        """The .npz export, if it was built from the pickles currently on disk."""
+        try:
+            compiled = CompiledModel.load(self.compiled_path)
+        except Exception as e:
+            print(f"⚠️ Compiled model unreadable ({e}). Loading the pickled model.")
+            return None
+
+        if compiled.digest != source_digest((self.model_path, self.features_path, self.imputation_path)):
+            print("⚠️ Compiled model is stale (run `python -m engines.compiled_model`). Loading the pickled model.")
+            return None
+
+        print("✅ Recovery model loaded (compiled).")
+        return ModelBundle(
+            model=compiled,
+            features=compiled.features,
+            imputation=compiled.imputation,
+            version=signature,
+            schema=compiled.schema,
+        )
+
+    def _load(self, signature):
+        # Model + feature list are mandatory, imputation values are optional
+        if signature[0] is None or signature[1] is None:
+            return None
+
+        # 1. Pure-NumPy export: no joblib / scikit-learn import at all
+        if signature[3] is not None:
+            bundle = self._load_compiled(signature)
+            if bundle is not None:
+                return bundle
+
+        # 2. Pickled estimator
+        try:
+            # Deferred: joblib (and scikit-learn, via the pickle) load with the first model
+            import joblib
+
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                model = joblib.load(self.model_path)
+                features = list(joblib.load(self.features_path))
+                raw_imputation = joblib.load(self.imputation_path) if signature[2] is not None else {}
+        except Exception as e:
+            print(f"⚠️ Model load failed ({e}). Using Financial Heuristic.")
+            return None
+
+        print("✅ Recovery model loaded.")
+        imputation = _normalize_imputation(raw_imputation, features)
+        return ModelBundle(
+            model=model,
+            features=features,
+            imputation=imputation,
+            version=signature,
+            schema=FeatureSchema(features, imputation),
+        )
+
+    def get(self):
+        """Returns the current ModelBundle (or None if no usable model is on disk)."""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return self._bundle
+
+        with self._lock:
+            if signature != self._signature:
+                self._bundle = self._load(signature)
+                self._signature = signature
+
+        return self._bundle
+
+    def warm(self):
+        return self.get() is not None
+
+
+# GLOBAL REGISTRY
+MODEL_REGISTRY = ModelRegistry()
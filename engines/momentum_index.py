@@ -0,0 +1,109 @@
+import threading
+import time
+
+import numpy as np
+
+DAY = 86400.0
+
+# Signal catalogue: momentum weight of each signal type (dashboard presets, synthetic streams)
+SIGNAL_WEIGHTS = {
+    "CALL_ANSWERED": 1.5,
+    "SMS_REPLIED": 1.0,
+    "PROMISE_TO_PAY": 4.0,
+    "PAYMENT_DATE_CONFIRMED": 4.5,
+    "PARTIAL_PAYMENT": 6.0,
+    "BROKEN_PROMISE": -4.0,
+    "NO_RESPONSE_7_DAYS": -1.5
+}
+
+# Half-life per signal type (seconds). None = never decays.
+SIGNAL_HALF_LIVES = {
+    "CALL_ANSWERED": 3 * DAY,
+    "SMS_REPLIED": 3 * DAY,
+    "PROMISE_TO_PAY": 7 * DAY,
+    "PAYMENT_DATE_CONFIRMED": 14 * DAY,
+    "PARTIAL_PAYMENT": 30 * DAY,
+    "BROKEN_PROMISE": 14 * DAY,
+    "NO_RESPONSE_7_DAYS": 7 * DAY,
+}
+DEFAULT_HALF_LIFE = 7 * DAY
+
+
+def _decay(half_life, elapsed):
+    if half_life is None or elapsed <= 0:
+        return 1.0
+    return 0.5 ** (elapsed / half_life)
+
+
+class MomentumIndex:
+    """
+    Exponentially decayed momentum accumulator per case.
+
+    Each case keeps one (value, last_update) pair per distinct half-life, so an event
+    is an O(1) update and a read never replays signal history:
+        value = value * 0.5 ** ((t - last_update) / half_life) + weight
+    """
+
+    def __init__(self, half_lives: dict = None, default_half_life=DEFAULT_HALF_LIFE):
+        self.half_lives = dict(SIGNAL_HALF_LIVES if half_lives is None else half_lives)
+        self.default_half_life = default_half_life
+        self._lock = threading.Lock()
+        # case_id -> {half_life: [value, last_update]}
+        self._acc = {}
+
+    def __contains__(self, case_id) -> bool:
+        return case_id in self._acc
+
+    def half_life(self, signal_type: str):
+        return self.half_lives.get(signal_type, self.default_half_life)
+
+    def add(self, case_id, signal_type: str, weight: float, timestamp: float = None) -> None:
+        ts = time.time() if timestamp is None else float(timestamp)
+        h = self.half_life(signal_type)
+
+        with self._lock:
+            slot = self._acc.setdefault(case_id, {}).get(h)
+            if slot is None:
+                self._acc[case_id][h] = [float(weight), ts]
+            elif ts >= slot[1]:
+                slot[0] = slot[0] * _decay(h, ts - slot[1]) + float(weight)
+                slot[1] = ts
+            else:
+                # Late event: decay it to the accumulator's clock instead of moving the clock back
+                slot[0] += float(weight) * _decay(h, slot[1] - ts)
+
+    def add_events(self, case_id, events, default_timestamp: float = None) -> None:
+        # events: (signal_type, weight) or (signal_type, weight, timestamp)
+        for signal_type, weight, *ts in events:
+            self.add(case_id, signal_type, weight, ts[0] if ts else default_timestamp)
+
+    def replace(self, case_ids, other: "MomentumIndex") -> None:
+        """Takes over the accumulators of `case_ids` from another index (dropping any existing ones)."""
+        with self._lock:
+            for cid in case_ids:
+                slots = other._acc.get(cid)
+                if slots is None:
+                    self._acc.pop(cid, None)
+                else:
+                    self._acc[cid] = {h: list(slot) for h, slot in slots.items()}
+
+    def reset(self, case_ids) -> None:
+        with self._lock:
+            for cid in case_ids:
+                self._acc.pop(cid, None)
+
+    def _value(self, case_id, now: float) -> float:
+        slots = self._acc.get(case_id)
+        if not slots:
+            return 0.0
+        return sum(v * _decay(h, now - last) for h, (v, last) in slots.items())
+
+    def value(self, case_id, now: float = None) -> float:
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._value(case_id, now)
+
+    def values(self, case_ids, now: float = None) -> np.ndarray:
+        now = time.time() if now is None else now
+        with self._lock:
+            return np.array([self._value(cid, now) for cid in case_ids], dtype=np.float64)
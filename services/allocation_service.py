@@ -1,79 +1,245 @@
+import numpy as np
 import pandas as pd
 import os
 
-# GLOBAL STATE
-DCA_STATE = pd.DataFrame()
+from services.capacity_journal import CapacityJournal
+from services.capacity_ledger import CapacityLedger
+from services.sqlite_ledger import SQLiteCapacityLedger
+from services.metrics import stage_timer, BATCH_CASES
+from services.optimal_allocation import plan_optimal_allocation, allocation_objective
 
-def load_dca_profiles():
-    global DCA_STATE
+# Agency loads persist here (WAL + snapshots) across restarts; set DCA_STATE_DIR="" to keep them in memory only
+STATE_DIR = os.environ.get("DCA_STATE_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "state"))
+WAL_FSYNC = os.environ.get("DCA_WAL_FSYNC", "0") == "1"
+
+# "memory": per-process ledger. "sqlite": one ledger shared by every worker process
+CAPACITY_BACKEND = os.environ.get("DCA_CAPACITY_BACKEND", "memory")
+CAPACITY_DB = os.environ.get("DCA_CAPACITY_DB", os.path.join(STATE_DIR or "data/state", "capacity.db"))
+
+def make_capacity_ledger():
+    if CAPACITY_BACKEND == "sqlite":
+        return SQLiteCapacityLedger(CAPACITY_DB)
+    if CAPACITY_BACKEND != "memory":
+        raise ValueError(f"Unknown DCA_CAPACITY_BACKEND: {CAPACITY_BACKEND}")
+    return CapacityLedger(CapacityJournal(STATE_DIR, fsync=WAL_FSYNC) if STATE_DIR else None)
+
+# GLOBAL STATE (thread-safe; /allocate runs in Starlette's thread pool)
+DCA_LEDGER = make_capacity_ledger()
+
+def read_dca_profiles() -> pd.DataFrame:
+    """Agency profiles from the CSV (or the defaults), without touching the capacity ledger."""
     base_dir = os.path.dirname(__file__)
     path = os.path.join(base_dir, "..", "data", "dca_profiles.csv")
 
 
     # 1. Load Data
+    profiles = pd.DataFrame()
     if os.path.exists(path):
         try:
-            DCA_STATE = pd.read_csv(path, sep=",", encoding="utf-8")
-            DCA_STATE.columns = DCA_STATE.columns.str.strip()
+            profiles = pd.read_csv(path, sep=",", encoding="utf-8")
+            profiles.columns = profiles.columns.str.strip()
             print("✅ DCA Profiles loaded from CSV.")
         except Exception as e:
             print(f"⚠️ CSV Load Error: {e}. Reverting to defaults.")
-            DCA_STATE = pd.DataFrame()
+            profiles = pd.DataFrame()
 
     
     # 2. Validation & Defaults
     required_cols = ["dca_id", "max_capacity", "current_load", "success", "sla"]
 
     # If CSV failed or is missing required columns, load defaults
-    if DCA_STATE.empty or not all(col in DCA_STATE.columns for col in required_cols):
+    if profiles.empty or not all(col in profiles.columns for col in required_cols):
         print("⚠️ Using Default DCA Profiles (CSV missing or invalid).")
-        DCA_STATE = pd.DataFrame([
+        profiles = pd.DataFrame([
             {"dca_id": "DCA_TOP", "max_capacity": 50, "current_load": 0, "success": 0.85, "sla": 0.95},
             {"dca_id": "DCA_STANDARD", "max_capacity": 200, "current_load": 0, "success": 0.70, "sla": 0.90},
             {"dca_id": "DCA_BULK", "max_capacity": 1000, "current_load": 0, "success": 0.55, "sla": 0.85},
         ])
+    return profiles
 
-def allocate_cases_with_state(df_cases: pd.DataFrame) -> pd.DataFrame:
-    global DCA_STATE
-    
+def load_dca_profiles(restore: bool = True):
+    """
+    Agency limits come from the CSV; current loads and case assignments are restored from
+    the persisted capacity state when there is one (restore=False starts again from the CSV loads).
+    """
+    profiles = read_dca_profiles()
+
+    # Publish to the capacity ledger
+    DCA_LEDGER.load(profiles.to_dict(orient="records"), restore=restore)
+
+HOLD_QUEUE = "INTERNAL_HOLD_QUEUE"
+
+# Cases above this priority go to the best agency, the rest to the cheapest one
+PRIORITY_THRESHOLD = 0.7
+
+
+def dca_scores(success, sla) -> np.ndarray:
+    return 0.6 * np.asarray(success, dtype=np.float64) + 0.4 * np.asarray(sla, dtype=np.float64)
+
+
+def agency_orders(scores: np.ndarray):
+    """
+    Best-first and worst-first agency orderings (ties keep profile order).
+    Scores never change during a batch, so these are computed once per batch.
+    """
+    position = np.arange(len(scores))
+    best_first = np.lexsort((position, -scores))
+    worst_first = np.lexsort((position, scores))
+    return best_first, worst_first
+
+
+def _fill(order: np.ndarray, remaining: np.ndarray, n_cases: int) -> np.ndarray:
+    # Case k of the run goes to the first agency in `order` whose cumulative capacity exceeds k
+    slots = np.cumsum(remaining[order])
+    slot = np.searchsorted(slots, np.arange(n_cases), side="right")
+    return np.where(slot < len(order), order[np.minimum(slot, len(order) - 1)], -1)
+
+
+def plan_allocation(priorities: np.ndarray, scores: np.ndarray, remaining: np.ndarray):
+    """
+    Assigns cases (already in processing order) to agencies.
+
+    Returns (picks, used): picks[i] is the agency position for case i (-1 = hold queue),
+    used[j] is the number of cases given to agency j. Equivalent to the per-case greedy
+    loop, in O(n log m): consecutive runs of high / low priority cases are filled
+    against the best-first / worst-first order in one vectorized step each.
+    """
+    priorities = np.asarray(priorities, dtype=np.float64)
+    remaining = np.maximum(np.asarray(remaining, dtype=np.int64), 0).copy()
+    best_first, worst_first = agency_orders(np.asarray(scores, dtype=np.float64))
+
+    picks = np.full(len(priorities), -1, dtype=np.int64)
+    if len(priorities) == 0 or len(remaining) == 0:
+        return picks, np.zeros(len(remaining), dtype=np.int64)
+
+    high = priorities > PRIORITY_THRESHOLD
+    # After sorting by priority there are at most two runs, but any order is handled
+    breaks = np.flatnonzero(np.diff(high.astype(np.int8))) + 1
+    starts = np.concatenate(([0], breaks))
+    ends = np.concatenate((breaks, [len(priorities)]))
+
+    for start, end in zip(starts, ends):
+        order = best_first if high[start] else worst_first
+        run = _fill(order, remaining, end - start)
+        picks[start:end] = run
+        remaining -= np.bincount(run[run >= 0], minlength=len(remaining))
+
+    used = np.bincount(picks[picks >= 0], minlength=len(remaining))
+    return picks, used
+
+
+def _fill_batch(order: np.ndarray, remaining: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    # _fill for S batches: remaining (S, m), offsets (S, n) = position of each case within its run
+    slots = np.cumsum(remaining[:, order], axis=1)
+    slot = (slots[:, None, :] <= offsets[:, :, None]).sum(axis=2)
+    return np.where(slot < len(order), order[np.minimum(slot, len(order) - 1)], -1)
+
+
+def plan_allocation_batch(priorities: np.ndarray, scores: np.ndarray, remaining: np.ndarray):
+    """
+    plan_allocation for S independent batches at once (capacity simulation).
+
+    priorities: (S, n), each row sorted by descending priority (the order _allocate_cases
+    processes a batch in); remaining: (S, m) free capacity of each batch.
+    Returns (picks (S, n), used (S, m)), row for row what plan_allocation returns.
+    """
+    priorities = np.asarray(priorities, dtype=np.float64)
+    remaining = np.maximum(np.asarray(remaining, dtype=np.int64), 0)
+    best_first, worst_first = agency_orders(np.asarray(scores, dtype=np.float64))
+    m = remaining.shape[1]
+
+    if priorities.shape[1] == 0 or m == 0:
+        return np.full(priorities.shape, -1, dtype=np.int64), np.zeros(remaining.shape, dtype=np.int64)
+
+    # Sorted rows: the high priority run is a prefix, the low priority run the rest
+    high = priorities > PRIORITY_THRESHOLD
+    n_high = high.sum(axis=1, keepdims=True)
+    rank = np.arange(priorities.shape[1])[None, :]
+
+    high_picks = np.where(high, _fill_batch(best_first, remaining, rank), -1)
+    used_high = (high_picks[:, :, None] == np.arange(m)).sum(axis=1)
+    low_picks = np.where(high, -1, _fill_batch(worst_first, remaining - used_high, rank - n_high))
+
+    picks = np.where(high, high_picks, low_picks)
+    used = (picks[:, :, None] == np.arange(m)).sum(axis=1)
+    return picks, used
+
+
+def plan_optimal_allocation_batch(priorities: np.ndarray, scores: np.ndarray, remaining: np.ndarray):
+    """
+    Optimal assignment for S independent batches at once (capacity simulation).
+
+    The objective sum(priority x agency score) is separable and priorities and scores are
+    non-negative, so the optimum is a sorted fill: rows sorted by descending priority fill
+    the agencies best-first. Same (picks, used) shapes as plan_allocation_batch; exact, where
+    plan_optimal_allocation solves a bucketed transportation LP per batch.
+    """
+    priorities = np.asarray(priorities, dtype=np.float64)
+    remaining = np.maximum(np.asarray(remaining, dtype=np.int64), 0)
+    best_first, _ = agency_orders(np.asarray(scores, dtype=np.float64))
+    m = remaining.shape[1]
+
+    if priorities.shape[1] == 0 or m == 0:
+        return np.full(priorities.shape, -1, dtype=np.int64), np.zeros(remaining.shape, dtype=np.int64)
+
+    rank = np.broadcast_to(np.arange(priorities.shape[1]), priorities.shape)
+    picks = _fill_batch(best_first, remaining, rank)
+    used = (picks[:, :, None] == np.arange(m)).sum(axis=1)
+    return picks, used
+
+
+ALLOCATION_MODES = ("greedy", "optimal")
+
+
+def allocate_cases_with_state(df_cases: pd.DataFrame, mode: str = "greedy") -> pd.DataFrame:
+    """
+    mode="greedy": per-case rule (best agency above PRIORITY_THRESHOLD, cheapest below).
+    mode="optimal": capacity-constrained transportation solve maximizing priority x agency score.
+    The objective value of the assignment is reported in df.attrs["allocation_objective"].
+    """
+    if mode not in ALLOCATION_MODES:
+        raise ValueError(f"Unknown allocation mode: {mode}")
+
+    with stage_timer("allocation"):
+        BATCH_CASES.observe(len(df_cases), stage="allocation")
+        return _allocate_cases(df_cases, mode)
+
+def _allocate_cases(df_cases: pd.DataFrame, mode: str) -> pd.DataFrame:
     # Ensure state is loaded
-    if DCA_STATE.empty:
+    if DCA_LEDGER.empty:
         load_dca_profiles()
-    
+
+    # A case holds at most one slot: the last row of a repeated case_id wins
+    if not df_cases["case_id"].is_unique:
+        df_cases = df_cases.drop_duplicates("case_id", keep="last")
+
     # Sort cases by priority
     if "final_priority_score" in df_cases.columns:
         df_cases = df_cases.sort_values("final_priority_score", ascending=False)
-    
-    assignments = []
-
-    for _, case in df_cases.iterrows():
-        # Check Global Capacity
-        eligible = DCA_STATE[DCA_STATE["current_load"] < DCA_STATE["max_capacity"]].copy()
-
-        if eligible.empty:
-            assignments.append("INTERNAL_HOLD_QUEUE")
-            continue
-
-        # Score DCAs
-        eligible["score"] = 0.6 * eligible["success"] + 0.4 * eligible["sla"]
-        
-        # Optimization Strategy
-        priority = case.get("final_priority_score", 0.5)
-        if priority > 0.7:
-             chosen = eligible.sort_values("score", ascending=False).iloc[0]
-        else:
-             chosen = eligible.sort_values("score", ascending=True).iloc[0]
+        priorities = df_cases["final_priority_score"].to_numpy(dtype=np.float64)
+    else:
+        priorities = np.full(len(df_cases), 0.5)
+
+    # Agency scores are static; only free capacity is re-read if a reservation conflicts
+    agencies = DCA_LEDGER.agencies()
+    scores = dca_scores([a.success for a in agencies], [a.sla for a in agencies])
 
-        dca_id = chosen["dca_id"]
-        assignments.append(dca_id)
+    def plan(remaining):
+        if mode == "optimal":
+            picks, used, _ = plan_optimal_allocation(priorities, scores, remaining)
+        else:
+            picks, used = plan_allocation(priorities, scores, remaining)
+        return picks, used
 
-        # UPDATE GLOBAL STATE
-        DCA_STATE.loc[DCA_STATE["dca_id"] == dca_id, "current_load"] += 1
+    # ATOMIC RESERVATION (optimistic, retried on conflict)
+    # Slots already held by these cases are moved, not taken twice (re-posts, signal deltas, restarts)
+    picks = DCA_LEDGER.reserve_with(plan, agencies, case_ids=df_cases["case_id"].tolist())
 
-    df_cases["assigned_dca"] = assignments
+    dca_ids = np.array([a.dca_id for a in agencies], dtype=object)
+    df_cases["assigned_dca"] = np.where(picks >= 0, dca_ids[np.maximum(picks, 0)], HOLD_QUEUE)
+    df_cases.attrs["allocation_objective"] = allocation_objective(priorities, scores, picks)
     return df_cases
 
 def get_dca_status():
-    global DCA_STATE
-    if DCA_STATE.empty: load_dca_profiles()
-    return DCA_STATE.to_dict(orient="records")
\ No newline at end of file
+    if DCA_LEDGER.empty: load_dca_profiles()
+    return DCA_LEDGER.snapshot()
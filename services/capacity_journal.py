@@ -0,0 +1,177 @@
+import fcntl
+import json
+import os
+import threading
+
+# Compact the log into a fresh snapshot after this many appended entries
+SNAPSHOT_EVERY = int(os.environ.get("DCA_SNAPSHOT_EVERY", 10_000))
+
+WAL_FILE = "capacity.wal"
+SNAPSHOT_FILE = "capacity.snapshot.json"
+LOCK_FILE = "capacity.lock"
+
+
+class JournalLockedError(RuntimeError):
+    """Another process already owns the journal's state directory."""
+
+
+def _apply_assignments(assignments: dict, changes: dict) -> None:
+    for case_id, dca_id in changes.items():
+        if dca_id is None:
+            assignments.pop(case_id, None)
+        else:
+            assignments[case_id] = dca_id
+
+
+class CapacityJournal:
+    """
+    Durable agency loads and case assignments: append-only write-ahead log + periodic snapshots.
+
+    wal:      one JSON line per committed change
+              {"seq": n, "d": {dca_id: delta}, "a": {case_id: dca_id or null}}  ("a" is optional)
+    snapshot: {"seq": n, "loads": {dca_id: load}, "assignments": {case_id: dca_id}}, replaced atomically
+
+    Recovery loads the snapshot and replays only log entries newer than it. The journal
+    mirrors what it has logged, so a snapshot always matches its sequence number exactly.
+    Assignments only cover cases holding a slot, so they are bounded by total capacity.
+
+    The journal is single-writer: recover()/reset() take an exclusive flock on the state
+    directory (held until close()), so a second process fails fast instead of interleaving
+    its log with ours. Several workers share capacity through the sqlite backend instead.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = SNAPSHOT_EVERY, fsync: bool = False):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        # fsync per append survives power loss; a plain flush survives a process crash
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._wal = None
+        self._lock_file = None
+        self._seq = 0
+        self._since_snapshot = 0
+        self._loads = {}
+        self._assignments = {}
+
+    @property
+    def wal_path(self) -> str:
+        return os.path.join(self.directory, WAL_FILE)
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.directory, LOCK_FILE)
+
+    def recover(self):
+        """(loads, assignments) persisted by a previous run: snapshot + log tail. Empty if there is no state."""
+        with self._lock:
+            self._acquire()
+        loads, assignments, seq = {}, {}, 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            loads, seq = {k: int(v) for k, v in snap["loads"].items()}, int(snap["seq"])
+            assignments = dict(snap.get("assignments", {}))
+
+        if os.path.exists(self.wal_path):
+            with open(self.wal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn final write from a crash: everything before it is intact
+                        break
+                    if entry["seq"] <= seq:
+                        continue
+                    for dca_id, delta in entry["d"].items():
+                        loads[dca_id] = loads.get(dca_id, 0) + delta
+                    _apply_assignments(assignments, entry.get("a", {}))
+                    seq = entry["seq"]
+
+        with self._lock:
+            self._seq = seq
+        return loads, assignments
+
+    def reset(self, loads: dict, assignments: dict = None) -> None:
+        """Starts a new log from the given state (written as a snapshot)."""
+        with self._lock:
+            self._acquire()
+            self._loads = {k: int(v) for k, v in loads.items()}
+            self._assignments = dict(assignments or {})
+            self._write_snapshot()
+
+    def append(self, deltas: dict, assignments: dict = None) -> None:
+        """
+        Logs one committed change: load deltas plus, optionally, the new agency of each
+        moved case (None = no longer holds a slot). Cost: a single line append.
+        """
+        if not deltas and not assignments:
+            return
+        entry = {"d": deltas}
+        if assignments:
+            entry["a"] = assignments
+
+        with self._lock:
+            if self._wal is None:
+                return
+            self._seq += 1
+            self._wal.write(json.dumps({"seq": self._seq, **entry}, separators=(",", ":")) + "\n")
+            self._wal.flush()
+            if self.fsync:
+                os.fsync(self._wal.fileno())
+
+            for dca_id, delta in deltas.items():
+                self._loads[dca_id] = self._loads.get(dca_id, 0) + delta
+            _apply_assignments(self._assignments, assignments or {})
+
+            self._since_snapshot += 1
+            if self._since_snapshot >= self.snapshot_every:
+                self._write_snapshot()
+
+    def close(self) -> None:
+        # Final snapshot keeps the next startup to a single small read
+        with self._lock:
+            if self._wal is not None:
+                self._write_snapshot()
+                self._wal.close()
+                self._wal = None
+            if self._lock_file is not None:
+                # Closing the descriptor releases the flock
+                self._lock_file.close()
+                self._lock_file = None
+
+    def _acquire(self) -> None:
+        # Caller holds self._lock. The kernel drops the flock if the process dies, so a crash never leaves it stale
+        if self._lock_file is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(self.lock_path, "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise JournalLockedError(
+                f"Capacity state in {self.directory} is in use by another process. The journal is "
+                "single-process: run several workers with DCA_CAPACITY_BACKEND=sqlite."
+            ) from None
+        self._lock_file = lock_file
+
+    def _write_snapshot(self) -> None:
+        # Caller holds self._lock
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"seq": self._seq, "loads": self._loads, "assignments": self._assignments}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        # Entries up to self._seq now live in the snapshot; a crash before this
+        # truncation is harmless because recovery skips them by sequence number
+        if self._wal is not None:
+            self._wal.close()
+        self._wal = open(self.wal_path, "w", encoding="utf-8")
+        self._since_snapshot = 0
@@ -0,0 +1,250 @@
+import threading
+
+import numpy as np
+
+# Optimistic attempts before a reservation falls back to locking every agency
+MAX_OPTIMISTIC_RETRIES = 8
+
+
+def held_counts(held, agencies) -> np.ndarray:
+    """Slots per agency held by cases whose current agency ids are `held` (None = no slot)."""
+    position = {a.dca_id: j for j, a in enumerate(agencies)}
+    rows = [position[d] for d in held if d in position]
+    return np.bincount(np.asarray(rows, dtype=np.int64), minlength=len(agencies))
+
+
+def assignment_changes(case_ids, held, picks, agencies) -> dict:
+    """case_id -> new agency id (None = hold queue) for every case whose agency changes."""
+    dca_ids = [a.dca_id for a in agencies]
+    changes = {}
+    for cid, before, pick in zip(case_ids, held, picks.tolist()):
+        after = dca_ids[pick] if pick >= 0 else None
+        if after != before:
+            changes[cid] = after
+    return changes
+
+
+def unique_case_ids(case_ids) -> list:
+    case_ids = list(case_ids)
+    if len(set(case_ids)) != len(case_ids):
+        raise ValueError("case_ids must be unique within one reservation")
+    return case_ids
+
+
+class AgencySlot:
+    """Mutable load counter for one agency, guarded by its own lock."""
+
+    __slots__ = ("dca_id", "max_capacity", "current_load", "success", "sla", "lock")
+
+    def __init__(self, dca_id, max_capacity, current_load, success, sla):
+        self.dca_id = dca_id
+        self.max_capacity = int(max_capacity)
+        self.current_load = int(current_load)
+        self.success = float(success)
+        self.sla = float(sla)
+        self.lock = threading.Lock()
+
+    def to_dict(self) -> dict:
+        return {
+            "dca_id": self.dca_id,
+            "max_capacity": self.max_capacity,
+            "current_load": self.current_load,
+            "success": self.success,
+            "sla": self.sla,
+        }
+
+
+class CapacityLedger:
+    """
+    Thread-safe agency capacity ledger.
+
+    Each agency has its own lock, so concurrent batches only contend on the agencies
+    they actually reserve. Reservations are all-or-nothing: either every requested
+    slot fits within max_capacity or nothing is applied.
+
+    Reservations made for case ids also record which agency each case holds, so
+    re-allocating a case moves its slot instead of taking a second one.
+
+    With a journal attached, every committed change is appended to its write-ahead log
+    and load() restores the loads and assignments persisted by the previous run.
+    """
+
+    def __init__(self, journal=None):
+        self._agencies = ()
+        self._journal = journal
+        # case_id -> dca_id for every case holding a slot (always taken after agency locks)
+        self._assigned = {}
+        self._assign_lock = threading.Lock()
+
+    def load(self, records, restore: bool = True) -> None:
+        """restore=False keeps the loads from `records` and discards any persisted state."""
+        saved, assigned = self._journal.recover() if self._journal is not None and restore else ({}, {})
+
+        # Swap the whole tuple so readers never see a half-built ledger
+        self._agencies = tuple(
+            AgencySlot(r["dca_id"], r["max_capacity"], saved.get(r["dca_id"], r["current_load"]), r["success"], r["sla"])
+            for r in records
+        )
+        known = {a.dca_id for a in self._agencies}
+        with self._assign_lock:
+            self._assigned = {cid: d for cid, d in assigned.items() if d in known}
+        if self._journal is not None:
+            self._journal.reset({a.dca_id: a.current_load for a in self._agencies}, self._assigned)
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+
+    def _log(self, agencies, counts, changes: dict = None) -> None:
+        if self._journal is not None:
+            self._journal.append({a.dca_id: int(n) for a, n in zip(agencies, counts) if n != 0}, changes)
+
+    def held(self, case_ids) -> list:
+        """Agency id currently held by each case (None = no slot)."""
+        with self._assign_lock:
+            return [self._assigned.get(cid) for cid in case_ids]
+
+    @property
+    def empty(self) -> bool:
+        return len(self._agencies) == 0
+
+    def agencies(self) -> tuple:
+        return self._agencies
+
+    def remaining(self, agencies=None) -> np.ndarray:
+        agencies = self._agencies if agencies is None else agencies
+        return np.array([a.max_capacity - a.current_load for a in agencies], dtype=np.int64)
+
+    def snapshot(self) -> list:
+        """Point-in-time copy of every agency (each read under that agency's lock)."""
+        records = []
+        for agency in self._agencies:
+            with agency.lock:
+                records.append(agency.to_dict())
+        return records
+
+    def try_reserve(self, counts, agencies=None) -> bool:
+        """Atomically adds counts[j] to agency j if every agency stays within capacity."""
+        agencies = self._agencies if agencies is None else agencies
+        counts = np.asarray(counts, dtype=np.int64)
+        # Fixed (positional) lock order keeps concurrent batches deadlock-free
+        touched = [a for a, n in zip(agencies, counts) if n != 0]
+
+        for agency in touched:
+            agency.lock.acquire()
+        try:
+            for agency, n in zip(agencies, counts):
+                if n > 0 and agency.current_load + n > agency.max_capacity:
+                    return False
+            for agency, n in zip(agencies, counts):
+                if n != 0:
+                    agency.current_load += int(n)
+            self._log(agencies, counts)
+            return True
+        finally:
+            for agency in touched:
+                agency.lock.release()
+
+    def release(self, counts, agencies=None) -> None:
+        agencies = self._agencies if agencies is None else agencies
+        applied = {}
+        for agency, n in zip(agencies, np.asarray(counts, dtype=np.int64)):
+            if n == 0:
+                continue
+            with agency.lock:
+                before = agency.current_load
+                agency.current_load = max(0, before - int(n))
+                # Log what was actually applied (the clamp at zero included)
+                applied[agency.dca_id] = agency.current_load - before
+
+        if self._journal is not None:
+            self._journal.append({k: v for k, v in applied.items() if v != 0})
+
+    def reserve_with(self, plan_fn, agencies=None, case_ids=None, max_retries: int = MAX_OPTIMISTIC_RETRIES):
+        """
+        Optimistic reservation loop (compare-and-swap style).
+
+        plan_fn(remaining) -> (result, counts) is computed against a snapshot of free
+        capacity; the counts are committed only if they still fit. On conflict the plan
+        is recomputed. After max_retries the plan is made while holding every agency lock,
+        which always succeeds. Returns the result of the committed plan.
+
+        With case_ids (unique), result must be the agency position per case (-1 = hold
+        queue): the slots those cases already hold count as free for the plan, and the
+        commit moves each case to its new agency.
+        """
+        agencies = self._agencies if agencies is None else agencies
+        if case_ids is not None:
+            return self._reassign_with(plan_fn, agencies, unique_case_ids(case_ids), max_retries)
+
+        for _ in range(max_retries):
+            result, counts = plan_fn(self.remaining(agencies))
+            if self.try_reserve(counts, agencies):
+                return result
+
+        for agency in agencies:
+            agency.lock.acquire()
+        try:
+            result, counts = plan_fn(self.remaining(agencies))
+            counts = np.asarray(counts, dtype=np.int64)
+            for agency, n in zip(agencies, counts):
+                if n != 0:
+                    agency.current_load += int(n)
+            self._log(agencies, counts)
+            return result
+        finally:
+            for agency in agencies:
+                agency.lock.release()
+
+    def _reassign_with(self, plan_fn, agencies, case_ids: list, max_retries: int):
+        for _ in range(max_retries):
+            held = self.held(case_ids)
+            freed = held_counts(held, agencies)
+            picks, counts = plan_fn(self.remaining(agencies) + freed)
+            if self._try_reassign(case_ids, held, np.asarray(picks), np.asarray(counts) - freed, agencies):
+                return picks
+
+        for agency in agencies:
+            agency.lock.acquire()
+        try:
+            with self._assign_lock:
+                held = [self._assigned.get(cid) for cid in case_ids]
+                freed = held_counts(held, agencies)
+                picks, counts = plan_fn(self.remaining(agencies) + freed)
+                self._commit(case_ids, held, np.asarray(picks), np.asarray(counts) - freed, agencies)
+            return picks
+        finally:
+            for agency in agencies:
+                agency.lock.release()
+
+    def _try_reassign(self, case_ids, held, picks, delta, agencies) -> bool:
+        touched = [a for a, n in zip(agencies, delta) if n != 0]
+        for agency in touched:
+            agency.lock.acquire()
+        try:
+            with self._assign_lock:
+                # Another batch moved one of these cases since the plan was made
+                if [self._assigned.get(cid) for cid in case_ids] != held:
+                    return False
+                for agency, n in zip(agencies, delta):
+                    if n > 0 and agency.current_load + n > agency.max_capacity:
+                        return False
+                self._commit(case_ids, held, picks, delta, agencies)
+                return True
+        finally:
+            for agency in touched:
+                agency.lock.release()
+
+    def _commit(self, case_ids, held, picks, delta, agencies) -> None:
+        # Caller holds the touched agency locks and the assignment lock
+        for agency, n in zip(agencies, delta):
+            if n != 0:
+                agency.current_load += int(n)
+
+        changes = assignment_changes(case_ids, held, picks, agencies)
+        for cid, dca_id in changes.items():
+            if dca_id is None:
+                self._assigned.pop(cid, None)
+            else:
+                self._assigned[cid] = dca_id
+        self._log(agencies, delta, changes)
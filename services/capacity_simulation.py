@@ -0,0 +1,255 @@
+"""
+Offline Monte Carlo capacity planning.
+
+    python -m services.capacity_simulation --cases 400 --samples 2000 \\
+        --scenario "top_cut=DCA_TOP*0.8" --scenario "broken_x2=BROKEN_PROMISE*2"
+
+Each sample is one /allocate batch of Poisson(--cases) cases, bootstrapped from a synthetic
+portfolio (ML prior scored once with compute_scores) plus a sampled signal stream,
+prioritized with the production formula and allocated against the agency profiles from the CSV.
+Samples are processed as (samples x cases) arrays. The live capacity ledger, case store
+and score cache are never read or written.
+"""
+import argparse
+import contextlib
+import json
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from services.synthetic import SIGNAL_MIX, SIGNAL_WEIGHTS, SIGNALS_PER_CASE, generate_portfolio, load_seed
+from services.allocation_service import (
+    ALLOCATION_MODES, PRIORITY_THRESHOLD, dca_scores, plan_allocation_batch, plan_optimal_allocation_batch,
+    read_dca_profiles,
+)
+from services.scoring_service import compute_scores, priority_scores
+
+# Synthetic cases scored once; every sample draws its batch from this pool
+POOL_SIZE = 20_000
+# (samples x cases) cells handled per step, bounds peak memory
+CHUNK_CELLS = 2_000_000
+PERCENTILES = (50, 95)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    # dca_id -> max_capacity multiplier
+    capacity: dict = field(default_factory=dict)
+    # signal type -> event rate multiplier
+    signal_rates: dict = field(default_factory=dict)
+    # batch size multiplier
+    volume: float = 1.0
+
+
+BASELINE = Scenario("baseline")
+DEFAULT_SCENARIOS = [
+    Scenario("DCA_TOP capacity -20%", capacity={"DCA_TOP": 0.8}),
+    Scenario("BROKEN_PROMISE x2", signal_rates={"BROKEN_PROMISE": 2.0}),
+]
+
+
+def parse_scenario(spec: str) -> Scenario:
+    """
+    'name=KEY*factor[,KEY*factor...]': KEY is a signal type (rate multiplier),
+    "volume" (batch size multiplier) or an agency id (capacity multiplier).
+    """
+    name, _, terms = spec.partition("=")
+    if not name or not terms:
+        raise ValueError(f"Scenario must look like name=KEY*factor: {spec!r}")
+
+    capacity, signal_rates, volume = {}, {}, 1.0
+    for term in terms.split(","):
+        key, _, factor = term.strip().partition("*")
+        if key == "volume":
+            volume = float(factor)
+        elif key in SIGNAL_WEIGHTS:
+            signal_rates[key] = float(factor)
+        else:
+            capacity[key] = float(factor)
+    return Scenario(name.strip(), capacity, signal_rates, volume)
+
+
+def score_pool(pool_size: int = POOL_SIZE, seed: int = 0, seed_df: pd.DataFrame = None) -> np.ndarray:
+    """ML prior of a synthetic portfolio, through the production scoring path (uncached)."""
+    pool = generate_portfolio(pool_size, seed=seed, seed_df=seed_df)
+    scored = compute_scores(pool, {}, use_cache=False)
+    return scored["ml_score"].to_numpy(dtype=np.float64)
+
+
+def sample_momentum(rng: np.random.Generator, shape: tuple, per_case: float, signal_rates: dict) -> np.ndarray:
+    """graph_raw (momentum_mode="sum") of sampled signal streams: Poisson events per type x weight."""
+    share = np.array([SIGNAL_MIX[t] for t in SIGNAL_WEIGHTS], dtype=np.float64)
+    share /= share.sum()
+
+    momentum = np.zeros(shape)
+    for (signal_type, weight), p in zip(SIGNAL_WEIGHTS.items(), share):
+        rate = per_case * p * signal_rates.get(signal_type, 1.0)
+        if rate > 0:
+            momentum += weight * rng.poisson(rate, shape)
+    return momentum
+
+
+def _allocate(priorities: np.ndarray, sizes: np.ndarray, scores: np.ndarray, free: np.ndarray, mode: str):
+    """Picks (samples, cases) for batches of priority-sorted rows; columns past sizes[s] are padding (-1)."""
+    remaining = np.broadcast_to(free, (len(priorities), len(free)))
+    # Padding sorts after every real case, so it only ever takes capacity left over
+    planner = plan_allocation_batch if mode == "greedy" else plan_optimal_allocation_batch
+    picks, _ = planner(priorities, scores, remaining)
+    return np.where(np.arange(priorities.shape[1]) < sizes[:, None], picks, -1)
+
+
+def _distribution(values: np.ndarray) -> dict:
+    out = {"mean": float(values.mean())}
+    out.update({f"p{q}": float(np.percentile(values, q)) for q in PERCENTILES})
+    out["max"] = float(values.max())
+    return out
+
+
+def run_scenario(scenario: Scenario, pool_scores: np.ndarray, profiles: pd.DataFrame, n_cases: int,
+                 n_samples: int, seed: int = 0, mode: str = "greedy", per_case: float = SIGNALS_PER_CASE) -> dict:
+    """
+    Overflow, utilization and priority-weighted coverage of one scenario over n_samples batches.
+    The same seed is used for every scenario, so they are compared on the same sampled portfolios.
+    """
+    if n_samples <= 0:
+        raise ValueError("n_samples must be positive")
+    unknown = set(scenario.capacity) - set(profiles["dca_id"])
+    if unknown:
+        raise ValueError(f"Unknown agencies in scenario {scenario.name!r}: {sorted(unknown)}")
+
+    dca_ids = profiles["dca_id"].tolist()
+    multiplier = np.array([scenario.capacity.get(d, 1.0) for d in dca_ids])
+    max_capacity = np.floor(profiles["max_capacity"].to_numpy(dtype=np.float64) * multiplier).astype(np.int64)
+    current_load = profiles["current_load"].to_numpy(dtype=np.int64)
+    free = np.maximum(max_capacity - current_load, 0)
+    scores = dca_scores(profiles["success"], profiles["sla"])
+    m = len(dca_ids)
+
+    rng = np.random.default_rng(seed)
+    overflow, high_overflow, used_all, covered = [], [], [], []
+    mean_cases = n_cases * scenario.volume
+    chunk = max(1, int(CHUNK_CELLS // max(mean_cases, 1)))
+
+    for start in range(0, n_samples, chunk):
+        n_batches = min(chunk, n_samples - start)
+        sizes = rng.poisson(mean_cases, n_batches)
+        width = max(int(sizes.max()), 1)
+        real = np.arange(width) < sizes[:, None]
+
+        ml = pool_scores[rng.integers(0, len(pool_scores), (n_batches, width))]
+        graph_raw = sample_momentum(rng, (n_batches, width), per_case, scenario.signal_rates)
+        _, priority = priority_scores(ml, graph_raw)
+
+        # Each batch in processing order (descending priority), padding (-1) last
+        priority = -np.sort(-np.where(real, priority, -1.0), axis=1)
+        picks = _allocate(priority, sizes, scores, free, mode)
+        priority = np.where(real, priority, 0.0)
+
+        held = real & (picks < 0)
+        overflow.append(held.sum(axis=1))
+        high_overflow.append((held & (priority > PRIORITY_THRESHOLD)).sum(axis=1))
+        used_all.append(np.stack([(picks == j).sum(axis=1) for j in range(m)], axis=1))
+        total = np.maximum(priority.sum(axis=1, keepdims=True), 1e-12)
+        covered.append(np.stack([(priority * (picks == j)).sum(axis=1) for j in range(m)], axis=1) / total)
+
+    overflow = np.concatenate(overflow)
+    high_overflow = np.concatenate(high_overflow)
+    used_all = np.concatenate(used_all)
+    covered = np.concatenate(covered)
+
+    agencies = {}
+    for j, dca_id in enumerate(dca_ids):
+        load = current_load[j] + used_all[:, j]
+        utilization = load / max_capacity[j] if max_capacity[j] > 0 else np.ones(len(load))
+        agencies[dca_id] = {
+            "max_capacity": int(max_capacity[j]),
+            "free_capacity": int(free[j]),
+            "assigned": _distribution(used_all[:, j]),
+            "utilization": _distribution(utilization),
+            "saturated_probability": float((used_all[:, j] >= free[j]).mean()),
+            "priority_coverage": float(covered[:, j].mean()),
+        }
+
+    return {
+        "scenario": scenario.name,
+        "capacity": scenario.capacity,
+        "signal_rates": scenario.signal_rates,
+        "volume": scenario.volume,
+        "overflow": {**_distribution(overflow), "probability": float((overflow > 0).mean())},
+        "high_priority_overflow": _distribution(high_overflow),
+        "priority_coverage": float(covered.sum(axis=1).mean()),
+        "agencies": agencies,
+    }
+
+
+def simulate(scenarios=None, n_cases: int = 400, n_samples: int = 1000, seed: int = 0, mode: str = "greedy",
+             per_case: float = SIGNALS_PER_CASE, pool_size: int = POOL_SIZE, seed_df: pd.DataFrame = None,
+             profiles: pd.DataFrame = None) -> dict:
+    """Baseline plus each scenario (DEFAULT_SCENARIOS when none are given)."""
+    if mode not in ALLOCATION_MODES:
+        raise ValueError(f"Unknown allocation mode: {mode}")
+
+    scenarios = DEFAULT_SCENARIOS if scenarios is None else scenarios
+    profiles = read_dca_profiles() if profiles is None else profiles
+    pool_scores = score_pool(pool_size, seed=seed, seed_df=seed_df)
+
+    return {
+        "n_cases": n_cases,
+        "n_samples": n_samples,
+        "seed": seed,
+        "mode": mode,
+        "signals_per_case": per_case,
+        "results": [
+            run_scenario(s, pool_scores, profiles, n_cases, n_samples, seed=seed, mode=mode, per_case=per_case)
+            for s in [BASELINE, *scenarios]
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo capacity planning over the scoring + allocation pipeline.")
+    parser.add_argument("--cases", type=int, default=400, help="Mean cases per simulated /allocate batch (Poisson)")
+    parser.add_argument("--samples", type=int, default=1000, help="Simulated batches per scenario")
+    parser.add_argument("--scenario", action="append",
+                        help="name=KEY*factor[,KEY*factor]; KEY = agency id, signal type or volume (repeatable)")
+    parser.add_argument("--mode", choices=ALLOCATION_MODES, default="greedy")
+    parser.add_argument("--signals-per-case", type=float, default=SIGNALS_PER_CASE)
+    parser.add_argument("--pool", type=int, default=POOL_SIZE, help="Synthetic cases scored once and resampled")
+    parser.add_argument("--seed-file", help="Portfolio CSV to bootstrap cases from (default: data/demo_cases_bulk.csv)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    scenarios = [parse_scenario(s) for s in args.scenario] if args.scenario else None
+
+    # Keep stdout clean for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = simulate(
+            scenarios, n_cases=args.cases, n_samples=args.samples, seed=args.seed, mode=args.mode,
+            per_case=args.signals_per_case, pool_size=args.pool,
+            seed_df=load_seed(args.seed_file) if args.seed_file else None,
+        )
+
+    for result in report["results"]:
+        agencies = ", ".join(
+            f"{dca_id} {a['utilization']['mean']:.0%}" for dca_id, a in result["agencies"].items()
+        )
+        print(
+            f"{result['scenario']}: overflow {result['overflow']['mean']:.1f} (p95 {result['overflow']['p95']:.0f}), "
+            f"coverage {result['priority_coverage']:.1%}, utilization {agencies}",
+            file=sys.stderr,
+        )
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
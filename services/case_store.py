@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from engines.momentum_index import MomentumIndex
+from services.scoring_service import compute_scores, ACTION_TYPES
+from services.allocation_service import ALLOCATION_MODES, allocate_cases_with_state
+
+# Scored columns kept per resident case
+RESULT_COLUMNS = [
+    "ml_score", "graph_raw", "graph_score", "final_priority_score",
+    "assigned_dca", "sop_tier", "sop_steps", "action_type",
+]
+
+# Resident cases kept per process; the least recently allocated are evicted beyond this
+MAX_RESIDENT_CASES = int(os.environ.get("DCA_MAX_RESIDENT_CASES", 1_000_000))
+
+# Feature summed as "exposure" by the KPI queries
+EXPOSURE_COLUMN = "loan_amnt"
+ESCALATION = ACTION_TYPES[0]
+# allocation_mode each case was placed with (one byte per case)
+MODE_DTYPE = pd.CategoricalDtype(ALLOCATION_MODES)
+
+
+class CaseStore:
+    """
+    Resident portfolio: features, decayed momentum and latest scores / assignment per case.
+    Lets signal deltas re-score only the affected cases instead of the whole portfolio.
+    Holds at most max_cases cases; evicted cases keep their agency slot in the capacity ledger.
+    """
+
+    def __init__(self, max_cases: int = MAX_RESIDENT_CASES):
+        self.max_cases = max_cases
+        self.lock = threading.RLock()
+        self._features = pd.DataFrame()
+        self._results = pd.DataFrame(columns=RESULT_COLUMNS)
+        # Signal deltas re-allocate a case with the mode it was placed with
+        self._modes = pd.Series(dtype=MODE_DTYPE)
+        # Signal history is folded into O(1) accumulators instead of being kept
+        self.momentum = MomentumIndex()
+        # Results sorted by (final_priority_score desc, case_id); rebuilt lazily after writes
+        self._ranked = None
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def known(self, case_ids) -> list:
+        return [cid for cid in case_ids if cid in self._results.index]
+
+    def features(self, case_ids) -> pd.DataFrame:
+        return self._features.loc[case_ids].reset_index()
+
+    def allocation_modes(self, case_ids) -> np.ndarray:
+        return self._modes.loc[case_ids].to_numpy(dtype=object)
+
+    def upsert(self, allocated: pd.DataFrame, feature_columns, momentum: MomentumIndex,
+               allocation_mode: str = "greedy") -> None:
+        allocated = allocated.drop_duplicates("case_id", keep="last").set_index("case_id")
+        ids = allocated.index
+
+        features = allocated[[c for c in feature_columns if c != "case_id"]]
+        results = allocated[RESULT_COLUMNS]
+        modes = pd.Series(allocation_mode, index=ids, dtype=MODE_DTYPE)
+
+        if self._results.empty:
+            self._features, self._results, self._modes = features, results, modes
+        else:
+            self._features = pd.concat([self._features.drop(index=ids, errors="ignore"), features])
+            self._results = pd.concat([self._results.drop(index=ids, errors="ignore"), results])
+            self._modes = pd.concat([self._modes.drop(index=ids, errors="ignore"), modes])
+
+        # The submitted signal set replaces the stored momentum for these cases
+        self.momentum.replace(ids, momentum)
+        self._ranked = None
+        self._evict()
+
+    def _evict(self) -> None:
+        # Rows are appended on every upsert, so the oldest allocations come first
+        excess = len(self._results) - self.max_cases
+        if excess <= 0:
+            return
+        evicted = self._results.index[:excess]
+        self._results = self._results.iloc[excess:]
+        self._features = self._features.drop(index=evicted, errors="ignore")
+        self._modes = self._modes.drop(index=evicted, errors="ignore")
+        self.momentum.reset(evicted)
+
+    def update_results(self, allocated: pd.DataFrame) -> None:
+        allocated = allocated.set_index("case_id")
+        # Cases evicted while they were being re-scored are not brought back
+        allocated = allocated[allocated.index.isin(self._results.index)]
+        self._results.loc[allocated.index, RESULT_COLUMNS] = allocated[RESULT_COLUMNS]
+        self._ranked = None
+
+    def results(self) -> pd.DataFrame:
+        return self._results.reset_index(names="case_id")
+
+    def _ranking(self) -> pd.DataFrame:
+        if self._ranked is None:
+            ranked = self._results.reset_index(names="case_id")
+            self._ranked = ranked.sort_values(["final_priority_score", "case_id"], ascending=[False, True], kind="stable")
+        return self._ranked
+
+    @staticmethod
+    def _filter_mask(df: pd.DataFrame, assigned_dca=None, action_type=None) -> np.ndarray:
+        mask = np.ones(len(df), dtype=bool)
+        if assigned_dca:
+            mask &= df["assigned_dca"].isin(assigned_dca).to_numpy()
+        if action_type:
+            mask &= df["action_type"].isin(action_type).to_numpy()
+        return mask
+
+    def query(self, assigned_dca=None, action_type=None, after=None, limit: int = 100):
+        """
+        One page of cases (results + features), highest priority first.
+        Keyset pagination: `after` is the (final_priority_score, case_id) of the previous
+        page's last row. Returns (page, key of this page's last row or None if no more rows).
+        """
+        with self.lock:
+            ranked = self._ranking()
+            mask = self._filter_mask(ranked, assigned_dca, action_type)
+            if after is not None:
+                score, case_id = after
+                scores = ranked["final_priority_score"].to_numpy(dtype=np.float64)
+                ids = ranked["case_id"].to_numpy()
+                mask &= (scores < score) | ((scores == score) & (ids > case_id))
+
+            rows = np.flatnonzero(mask)
+            page = ranked.iloc[rows[:limit]]
+            page = page.join(self._features, on="case_id") if not self._features.empty else page
+
+        if len(rows) <= limit:
+            return page, None
+        last = page.iloc[-1]
+        return page, (float(last["final_priority_score"]), last["case_id"])
+
+    def kpis(self, assigned_dca=None, action_type=None) -> dict:
+        """Portfolio aggregates over the (filtered) resident cases."""
+        with self.lock:
+            results = self._results
+            selected = results[self._filter_mask(results, assigned_dca, action_type)]
+            if EXPOSURE_COLUMN in self._features.columns:
+                exposure = pd.to_numeric(self._features.loc[selected.index, EXPOSURE_COLUMN], errors="coerce").fillna(0.0)
+            else:
+                exposure = pd.Series(0.0, index=selected.index)
+
+        by_dca = pd.DataFrame({"cases": 1, "exposure": exposure}).groupby(selected["assigned_dca"]).sum()
+        return {
+            "n_cases": int(len(selected)),
+            "exposure": float(exposure.sum()),
+            "mean_score": float(selected["final_priority_score"].mean()) if len(selected) else 0.0,
+            "escalations": int((selected["action_type"] == ESCALATION).sum()),
+            "by_action_type": {k: int(v) for k, v in selected["action_type"].value_counts().items()},
+            "by_dca": {
+                dca: {"cases": int(row["cases"]), "exposure": float(row["exposure"])}
+                for dca, row in by_dca.iterrows()
+            },
+        }
+
+
+# GLOBAL STORE
+CASE_STORE = CaseStore()
+
+
+def allocate_and_store(df_cases: pd.DataFrame, signals: dict, momentum_mode: str = "sum",
+                       allocation_mode: str = "greedy") -> pd.DataFrame:
+    """
+    Full /allocate path. The capacity ledger moves the slot of a case that already holds
+    one, so re-posting a portfolio doesn't double count load.
+    """
+    # Fold the submitted signals into a scratch index; it replaces the stored one on commit
+    # Untimestamped signals count as arriving now, so they are read back undecayed
+    now = time.time()
+    momentum = MomentumIndex(CASE_STORE.momentum.half_lives, CASE_STORE.momentum.default_half_life)
+    for cid, events in signals.items():
+        momentum.add_events(cid, events, default_timestamp=now)
+
+    scored_cases = compute_scores(
+        df_cases, signals, momentum_mode=momentum_mode,
+        momentum_index=momentum if momentum_mode == "sum" else None, as_of=now,
+    )
+
+    # The ledger serializes reservations per agency; the store lock only covers the write
+    allocated = allocate_cases_with_state(scored_cases, mode=allocation_mode)
+    with CASE_STORE.lock:
+        CASE_STORE.upsert(allocated, df_cases.columns, momentum, allocation_mode)
+
+    return allocated
+
+
+def apply_signal_deltas(signals: dict) -> pd.DataFrame:
+    """
+    Appends new signals to resident cases and re-scores / re-allocates only those cases.
+    Signals for unknown case IDs are ignored. Cost is O(affected cases).
+    """
+    with CASE_STORE.lock:
+        affected = CASE_STORE.known(signals)
+        if not affected:
+            return pd.DataFrame(columns=["case_id"] + RESULT_COLUMNS)
+
+        # O(1) accumulator update per event, no history replay
+        now = time.time()
+        for cid in affected:
+            CASE_STORE.momentum.add_events(cid, signals[cid], default_timestamp=now)
+        features = CASE_STORE.features(affected)
+        modes = CASE_STORE.allocation_modes(affected)
+
+    # Scoring and allocation run outside the store lock
+    scored_cases = compute_scores(features, {}, momentum_index=CASE_STORE.momentum, as_of=now)
+    # Move only the affected cases (the ledger releases their previous slots),
+    # each with the allocation mode it was placed with
+    parts = [allocate_cases_with_state(scored_cases[modes == mode], mode=mode) for mode in pd.unique(modes)]
+    allocated = parts[0] if len(parts) == 1 else pd.concat(parts).sort_values("final_priority_score", ascending=False)
+
+    with CASE_STORE.lock:
+        CASE_STORE.update_results(allocated)
+
+    return allocated
@@ -0,0 +1,97 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BATCH_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _label_text(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _with_label(labels: tuple, key: str, value: str) -> str:
+    return _label_text(labels + ((key, value),))
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set (Prometheus semantics)."""
+
+    def __init__(self, name: str, help_text: str, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., sum, count]
+        self._series = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if idx < len(self.buckets):
+                series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, values):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_with_label(labels, 'le', repr(float(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_with_label(labels, 'le', '+Inf')} {values[-1]}")
+            lines.append(f"{self.name}_sum{_label_text(labels)} {values[-2]}")
+            lines.append(f"{self.name}_count{_label_text(labels)} {values[-1]}")
+        return lines
+
+
+def render_gauge(name: str, help_text: str, samples) -> list:
+    """samples: iterable of (labels dict, value), read at scrape time."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_label_text(tuple(sorted(labels.items())))} {value}")
+    return lines
+
+
+def render_counter(name: str, help_text: str, samples) -> list:
+    """samples: iterable of (labels dict, value) for monotonically increasing totals."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for labels, value in samples:
+        lines.append(f"{name}{_label_text(tuple(sorted(labels.items())))} {value}")
+    return lines
+
+
+# GLOBAL METRICS
+STAGE_SECONDS = Histogram("dca_stage_duration_seconds", "Time spent per pipeline stage.")
+REQUEST_SECONDS = Histogram("dca_request_duration_seconds", "End-to-end request latency per endpoint.")
+BATCH_CASES = Histogram("dca_batch_cases", "Cases per scoring / allocation batch.", buckets=BATCH_BUCKETS)
+
+HISTOGRAMS = (REQUEST_SECONDS, STAGE_SECONDS, BATCH_CASES)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def render_metrics(extra_lines=()) -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    lines.extend(extra_lines)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,108 @@
+import numpy as np
+
+# Priority resolution of the transportation problem
+PRIORITY_BUCKETS = 256
+
+
+def assignment_value(priority, agency_scores) -> np.ndarray:
+    """
+    Value of giving a case of `priority` to each agency (hold queue = 0).
+    priority: (B,) -> returns (B, m). Swap this out to change the objective.
+    """
+    return np.outer(np.asarray(priority, dtype=np.float64), np.asarray(agency_scores, dtype=np.float64))
+
+
+def _bucketize(priorities: np.ndarray, n_buckets: int):
+    p = np.nan_to_num(priorities, nan=0.0)
+    uniques = np.unique(p)
+    if len(uniques) <= n_buckets:
+        # Few distinct priorities: one bucket per value -> exact optimum
+        codes = np.searchsorted(uniques, p)
+        return codes, uniques
+
+    edges = np.linspace(p.min(), p.max(), n_buckets + 1)
+    codes = np.clip(np.searchsorted(edges, p, side="right") - 1, 0, n_buckets - 1)
+    sums = np.bincount(codes, weights=p, minlength=n_buckets)
+    counts = np.bincount(codes, minlength=n_buckets)
+    centers = np.divide(sums, counts, out=(edges[:-1] + edges[1:]) / 2, where=counts > 0)
+    return codes, centers
+
+
+def solve_transportation(supply: np.ndarray, capacity: np.ndarray, value: np.ndarray) -> np.ndarray:
+    """
+    max sum(value * x)  s.t.  rows sum to supply, agency columns <= capacity, x >= 0.
+    A zero-value hold column with unlimited capacity absorbs whatever doesn't fit.
+    Returns integer flows of shape (B, m + 1); the last column is the hold queue.
+    """
+    # Deferred: scipy.optimize is only needed for allocation_mode="optimal"
+    from scipy import sparse
+    from scipy.optimize import linprog
+
+    B, m = value.shape
+    c = -np.hstack([value, np.zeros((B, 1))]).ravel()
+
+    # Each bucket ships exactly its supply
+    A_eq = sparse.kron(sparse.eye(B), np.ones((1, m + 1)), format="csr")
+    # Each agency receives at most its capacity
+    A_ub = sparse.kron(np.ones((1, B)), sparse.hstack([sparse.eye(m), sparse.csr_matrix((m, 1))]), format="csr")
+
+    res = linprog(c, A_ub=A_ub, b_ub=capacity, A_eq=A_eq, b_eq=supply, bounds=(0, None), method="highs")
+    if not res.success:
+        raise RuntimeError(f"Transportation solve failed: {res.message}")
+
+    # Transportation polytopes have integral vertices; rounding only removes float noise
+    flows = np.rint(res.x.reshape(B, m + 1)).astype(np.int64)
+    flows[:, m] = supply - flows[:, :m].sum(axis=1)
+
+    # Guard against rounding pushing an agency over capacity
+    for j in range(m):
+        excess = flows[:, j].sum() - capacity[j]
+        b = B - 1
+        while excess > 0 and b >= 0:
+            take = min(excess, flows[b, j])
+            flows[b, j] -= take
+            flows[b, m] += take
+            excess -= take
+            b -= 1
+    return flows
+
+
+def plan_optimal_allocation(priorities: np.ndarray, scores: np.ndarray, remaining: np.ndarray,
+                            n_buckets: int = PRIORITY_BUCKETS):
+    """
+    Capacity-constrained optimal assignment (transportation problem over priority buckets).
+
+    Returns (picks, used, objective) in the same shape as plan_allocation plus the
+    objective sum(priority * agency score) of the chosen assignment.
+    """
+    priorities = np.asarray(priorities, dtype=np.float64)
+    scores = np.asarray(scores, dtype=np.float64)
+    capacity = np.maximum(np.asarray(remaining, dtype=np.int64), 0)
+    m = len(scores)
+
+    picks = np.full(len(priorities), -1, dtype=np.int64)
+    if len(priorities) == 0 or m == 0:
+        return picks, np.zeros(m, dtype=np.int64), 0.0
+
+    codes, centers = _bucketize(priorities, n_buckets)
+    supply = np.bincount(codes, minlength=len(centers))
+    flows = solve_transportation(supply, capacity, assignment_value(centers, scores))
+
+    # Inside a bucket, higher priority cases take the more valuable agencies first
+    order = np.lexsort((-np.nan_to_num(priorities, nan=0.0), codes))
+    agency_rank = np.lexsort((np.arange(m), -scores))
+    columns = np.append(agency_rank, m)
+    labels = np.append(agency_rank, -1)
+
+    starts = np.concatenate(([0], np.cumsum(supply)[:-1]))
+    for b in np.flatnonzero(supply):
+        block = order[starts[b]: starts[b] + supply[b]]
+        picks[block] = np.repeat(labels, flows[b, columns])
+
+    used = np.bincount(picks[picks >= 0], minlength=m)
+    return picks, used, allocation_objective(priorities, scores, picks)
+
+
+def allocation_objective(priorities: np.ndarray, scores: np.ndarray, picks: np.ndarray) -> float:
+    assigned = picks >= 0
+    return float(np.sum(np.nan_to_num(priorities[assigned]) * np.asarray(scores)[picks[assigned]]))
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from engines.feature_schema import HEURISTIC_SCHEMA, FeatureMatrix
+from engines.ml_engine import recovery_probability
+from engines.model_registry import MODEL_REGISTRY
+
+# Batches at or above this size are scored across a process pool
+PARALLEL_MIN_BATCH = int(os.environ.get("DCA_PARALLEL_MIN_BATCH", 200_000))
+PARALLEL_WORKERS = int(os.environ.get("DCA_PARALLEL_WORKERS", os.cpu_count() or 1))
+
+# Rows per task; several shards per worker keeps the pool balanced
+MIN_SHARD_ROWS = 20_000
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn: never fork a multi-threaded server process
+            _pool = ProcessPoolExecutor(max_workers=PARALLEL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def should_parallelize(n_cases: int) -> bool:
+    return PARALLEL_WORKERS > 1 and n_cases >= PARALLEL_MIN_BATCH
+
+
+def _share(array: np.ndarray) -> SharedMemory:
+    shm = SharedMemory(create=True, size=max(1, array.nbytes))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm
+
+
+def _score_shard(segments: dict, present: frozenset, version: tuple, start: int, stop: int) -> int:
+    """
+    Worker: scores rows [start, stop) of the shared FeatureMatrix arrays into the shared output vector.
+    segments: array name -> (shared memory name, shape, dtype).
+    """
+    bundle = MODEL_REGISTRY.get()
+    if (bundle.version if bundle is not None else None) != version:
+        raise RuntimeError("Worker loaded a different model version than the one the batch was encoded for")
+    schema = bundle.schema if bundle is not None else HEURISTIC_SCHEMA
+
+    shms = {key: SharedMemory(name=name) for key, (name, _, _) in segments.items()}
+    try:
+        arrays = {
+            key: np.ndarray(shape, dtype=dtype, buffer=shms[key].buf)
+            for key, (_, shape, dtype) in segments.items()
+        }
+        shard = FeatureMatrix(schema, arrays["numeric"][start:stop], arrays["exact"][start:stop],
+                              arrays["flags"][start:stop], present)
+        arrays["out"][start:stop] = recovery_probability(shard, bundle)
+
+        # Drop buffer views before closing the segments
+        del arrays, shard
+    finally:
+        for shm in shms.values():
+            shm.close()
+    return stop - start
+
+
+def parallel_recovery_probability(features: FeatureMatrix, bundle) -> np.ndarray:
+    """
+    ML prior for a large encoded batch, sharded across the process pool.
+    The FeatureMatrix arrays (float32 numeric, float64 threshold columns, uint8 one-hot flags)
+    travel through shared memory (no DataFrame pickling); each shard writes its slice of the
+    shared output vector, so results come back in order. Workers score with their own copy of
+    the registry model, which must be the version `features` was encoded for.
+    """
+    n = len(features)
+    arrays = {
+        "numeric": features.numeric, "exact": features.exact, "flags": features.flags,
+        "out": np.zeros(n, dtype=np.float64),
+    }
+    shms = {}
+    try:
+        for key, array in arrays.items():
+            shms[key] = _share(array)
+        segments = {key: (shms[key].name, arrays[key].shape, arrays[key].dtype.str) for key in arrays}
+        version = bundle.version if bundle is not None else None
+
+        shard_rows = max(MIN_SHARD_ROWS, -(-n // (PARALLEL_WORKERS * 4)))
+        pool = _get_pool()
+        futures = [
+            pool.submit(_score_shard, segments, features.present, version, start, min(start + shard_rows, n))
+            for start in range(0, n, shard_rows)
+        ]
+        for f in futures:
+            f.result()
+
+        return np.ndarray((n,), dtype=np.float64, buffer=shms["out"].buf).copy()
+    finally:
+        for shm in shms.values():
+            shm.close()
+            shm.unlink()
@@ -0,0 +1,89 @@
+import itertools
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+SAMPLE_INTERVAL = 0.001
+MAX_STACK_DEPTH = 64
+
+# Most recent profiles kept for GET /metrics/profiles/{id}
+MAX_STORED_PROFILES = 20
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler for one thread: a daemon thread grabs the target
+    thread's stack every `interval` seconds. Output is collapsed-stack text
+    ("outer;inner;leaf count"), the input format of flamegraph tools.
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.samples.most_common())
+
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+
+
+def store_profile(text: str) -> str:
+    profile_id = f"{int(time.time())}-{next(_profile_ids)}"
+    with _profiles_lock:
+        _profiles[profile_id] = text
+        while len(_profiles) > MAX_STORED_PROFILES:
+            _profiles.popitem(last=False)
+    return profile_id
+
+
+def get_profile(profile_id: str):
+    with _profiles_lock:
+        return _profiles.get(profile_id)
+
+
+@contextmanager
+def maybe_profile(enabled: bool):
+    """
+    Profiles the enclosed block when enabled. Yields a dict that receives
+    'profile_id' once the block finishes.
+    """
+    result = {}
+    if not enabled:
+        yield result
+        return
+
+    profiler = SamplingProfiler()
+    profiler.start()
+    try:
+        yield result
+    finally:
+        profiler.stop()
+        result["profile_id"] = store_profile(profiler.collapsed())
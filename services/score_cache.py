@@ -0,0 +1,253 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Cached cases; 0 disables the cache
+SCORE_CACHE_SIZE = int(os.environ.get("DCA_SCORE_CACHE_SIZE", 500_000))
+SCORE_CACHE_TTL = float(os.environ.get("DCA_SCORE_CACHE_TTL", 3600))
+# Cached graph momentum vectors (one per batch); 0 disables
+GRAPH_CACHE_SIZE = int(os.environ.get("DCA_GRAPH_CACHE_SIZE", 64))
+
+# New keys collect in a small segment that is merged into the main one once it reaches
+# max(MERGE_MIN, main / MERGE_RATIO) entries, so inserts never rebuild the whole table
+MERGE_MIN = 4096
+MERGE_RATIO = 8
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _name_hash(name: str) -> np.uint64:
+    return pd.util.hash_array(np.array([name], dtype=object))[0]
+
+
+def feature_keys(features) -> np.ndarray:
+    """
+    Content hash (uint64) of each case's encoded features (a FeatureMatrix): exactly the
+    values the model / heuristic reads, independent of case_id, column order and int/float
+    encoding. Cases share a cached score only when their encoded inputs are identical;
+    values the schema can't parse are missing (imputed) for both hashing and scoring.
+    """
+    schema = features.schema
+    # Which columns were sent changes the heuristic defaults, so it is part of every key
+    h = np.full(len(features), _name_hash("|".join(sorted(features.present))), dtype=np.uint64)
+
+    columns = [(name, features.numeric[:, j]) for j, name in enumerate(schema.numeric)]
+    columns += [(name, features.exact[:, j]) for j, name in enumerate(schema.exact)]
+    columns += [(name, features.flags[:, k]) for k, name in enumerate(schema.one_hot)]
+    for name, values in columns:
+        col_hash = pd.util.hash_array(values) ^ _name_hash(name)
+        with np.errstate(over="ignore"):
+            h = (h * _MIX) ^ col_hash
+    return h
+
+
+class _Segment:
+    """Unique uint64 keys (hash-indexed) with parallel value / expiry / last-use arrays."""
+
+    __slots__ = ("index", "values", "expires", "last_used")
+
+    def __init__(self, keys=None, values=None, expires=None, last_used=None):
+        self.index = pd.Index(np.empty(0, dtype=np.uint64) if keys is None else keys)
+        self.values = np.empty(0) if values is None else values
+        self.expires = np.empty(0) if expires is None else expires
+        self.last_used = np.empty(0) if last_used is None else last_used
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def find(self, keys: np.ndarray) -> np.ndarray:
+        if len(self.index) == 0:
+            return np.full(len(keys), -1, dtype=np.intp)
+        return self.index.get_indexer(keys)
+
+
+class ScoreCache:
+    """
+    Content-addressed memo of per-case scores (uint64 feature hash -> score) with
+    LRU + TTL eviction. Lookups and inserts are vectorized hash-index operations,
+    so a fully cached batch costs far less than scoring it. Thread-safe.
+
+    Entries belong to one model version; sync_model_version() drops them when it changes.
+    """
+
+    def __init__(self, max_entries: int = SCORE_CACHE_SIZE, ttl: float = SCORE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._main = _Segment()
+        self._recent = _Segment()
+        self._model_version = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._main) + len(self._recent)
+
+    def sync_model_version(self, version) -> None:
+        with self._lock:
+            if version != self._model_version:
+                self._main, self._recent = _Segment(), _Segment()
+                self._model_version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._main, self._recent = _Segment(), _Segment()
+
+    def lookup(self, keys: np.ndarray):
+        """Returns (values, hit mask); misses are NaN."""
+        keys = np.asarray(keys, dtype=np.uint64)
+        values = np.full(len(keys), np.nan)
+        hit = np.zeros(len(keys), dtype=bool)
+        now = time.monotonic()
+
+        with self._lock:
+            for segment in (self._main, self._recent):
+                pos = segment.find(keys)
+                found = (pos >= 0) & ~hit
+                found[found] = segment.expires[pos[found]] >= now
+                values[found] = segment.values[pos[found]]
+                segment.last_used[pos[found]] = now
+                hit |= found
+
+            n_hits = int(hit.sum())
+            self.hits += n_hits
+            self.misses += len(keys) - n_hits
+        return values, hit
+
+    def store(self, keys: np.ndarray, values: np.ndarray) -> None:
+        keys, first = np.unique(np.asarray(keys, dtype=np.uint64), return_index=True)
+        values = np.asarray(values, dtype=np.float64)[first]
+        now = time.monotonic()
+        expires = now + self.ttl
+
+        with self._lock:
+            # Refresh keys that are already held (e.g. expired ones being re-scored)
+            new = np.ones(len(keys), dtype=bool)
+            for segment in (self._main, self._recent):
+                pos = segment.find(keys)
+                known = pos >= 0
+                segment.values[pos[known]] = values[known]
+                segment.expires[pos[known]] = expires
+                segment.last_used[pos[known]] = now
+                new &= ~known
+
+            if new.any():
+                recent = self._recent
+                n = int(new.sum())
+                self._recent = _Segment(
+                    np.concatenate([recent.index.to_numpy(), keys[new]]),
+                    np.concatenate([recent.values, values[new]]),
+                    np.concatenate([recent.expires, np.full(n, expires)]),
+                    np.concatenate([recent.last_used, np.full(n, now)]),
+                )
+
+            if len(self._recent) >= max(MERGE_MIN, len(self._main) // MERGE_RATIO) or len(self) > self.max_entries:
+                self._merge(now)
+
+    def _merge(self, now: float) -> None:
+        # Caller holds self._lock
+        main, recent = self._main, self._recent
+        keys = np.concatenate([main.index.to_numpy(), recent.index.to_numpy()])
+        values = np.concatenate([main.values, recent.values])
+        expires = np.concatenate([main.expires, recent.expires])
+        last_used = np.concatenate([main.last_used, recent.last_used])
+
+        # TTL first, then least recently used beyond the size bound
+        keep = np.flatnonzero(expires >= now)
+        if len(keep) > self.max_entries:
+            keep = keep[np.argpartition(-last_used[keep], self.max_entries - 1)[:self.max_entries]]
+
+        self._main = _Segment(keys[keep], values[keep], expires[keep], last_used[keep])
+        self._recent = _Segment()
+
+    def cached(self, keys: np.ndarray, compute_fn) -> np.ndarray:
+        """
+        Scores for every key; compute_fn(miss_mask) -> scores is called for the misses only
+        (and not at all on a full hit).
+        """
+        values, hit = self.lookup(keys)
+        miss = ~hit
+        if miss.any():
+            computed = np.asarray(compute_fn(miss), dtype=np.float64)
+            values[miss] = computed
+            self.store(np.asarray(keys, dtype=np.uint64)[miss], computed)
+        return values
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+def graph_key(df: pd.DataFrame, signals: dict, mode: str, counterparty_col: str) -> bytes:
+    """Digest of everything graph momentum is computed from: cases (in order), counterparties, signals, mode."""
+    h = hashlib.blake2b(mode.encode("utf-8"), digest_size=16)
+    h.update(pd.util.hash_pandas_object(df["case_id"], index=False).to_numpy().tobytes())
+    if counterparty_col in df.columns:
+        h.update(pd.util.hash_pandas_object(df[counterparty_col].astype(str), index=False).to_numpy().tobytes())
+    for cid, events in signals.items():
+        h.update(repr((cid, [tuple(e) for e in events])).encode("utf-8"))
+    return h.digest()
+
+
+class GraphCache:
+    """
+    Graph momentum per batch (graph_key -> graph_raw vector), LRU + TTL.
+    Propagated momentum depends on the whole batch, so whole batches are the cache unit:
+    re-posting the same portfolio and signals skips the graph build and power iteration.
+    """
+
+    def __init__(self, max_entries: int = GRAPH_CACHE_SIZE, ttl: float = SCORE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # key -> (graph_raw, expires)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def cached(self, key: bytes, compute_fn) -> np.ndarray:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] >= now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0].copy()
+            self.misses += 1
+
+        values = np.asarray(compute_fn(), dtype=np.float64)
+        with self._lock:
+            self._entries[key] = (values.copy(), now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return values
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+# GLOBAL CACHES (ML prior per feature hash, graph momentum per batch)
+SCORE_CACHE = ScoreCache()
+GRAPH_CACHE = GraphCache()
@@ -1,7 +1,13 @@
 
+import numpy as np
 import pandas as pd
-from engines.ml_engine import predict_recovery_probability
-from engines.graph_engine import build_case_graph, compute_case_rank
+from engines.ml_engine import recovery_probability
+from engines.graph_engine import COUNTERPARTY_COLUMN, build_case_graph, compute_case_rank
+from engines.feature_schema import HEURISTIC_SCHEMA
+from engines.model_registry import MODEL_REGISTRY
+from services.metrics import stage_timer
+from services.parallel_scoring import should_parallelize, parallel_recovery_probability
+from services.score_cache import GRAPH_CACHE, SCORE_CACHE, feature_keys, graph_key
 
 ALPHA = 0.6
 BETA = 0.4
@@ -10,63 +16,133 @@ BETA = 0.4
 MAX_EXPECTED_MOMENTUM = 10.0
 
 
-def generate_sop(row) -> list:
-    score = row["final_priority_score"]
-
-    if score >= 0.75:
-        return [
-            "⚡ PRIORITY: Call within 1 hour",
-            "💰 Offer Plan A (10% waiver)"
-        ]
-    elif score <= 0.30:
-        return [
-            "📧 AUTO: Send Email Nudge",
-            "🚫 No outbound calls"
-        ]
-    else:
-        return [
-            "📞 Standard Call",
-            "📅 Schedule follow-up"
-        ]
-
-
-def determine_action(row) -> str:
-    ml = row["recovery_probability"]
-    g  = row["graph_score"]
-    p  = row["final_priority_score"]
-
-    if p >= 0.80 or (g >= 0.70 and ml >= 0.60):
-        return "IMMEDIATE_ESCALATION"
-    elif p <= 0.30:
-        return "DIGITAL_ONLY"
-    else:
-        return "STANDARD_QUEUE"
-
-
-def compute_scores(df: pd.DataFrame, signals: dict) -> pd.DataFrame:
-    df = df.copy()
+# SOP TEMPLATES (interned: every case references one shared tuple per tier)
+SOP_PRIORITY, SOP_STANDARD, SOP_DIGITAL = 0, 1, 2
 
-    # ML PRIOR (STATIC)
-    df = predict_recovery_probability(df)
+SOP_TEMPLATES = {
+    SOP_PRIORITY: (
+        "⚡ PRIORITY: Call within 1 hour",
+        "💰 Offer Plan A (10% waiver)"
+    ),
+    SOP_STANDARD: (
+        "📞 Standard Call",
+        "📅 Schedule follow-up"
+    ),
+    SOP_DIGITAL: (
+        "📧 AUTO: Send Email Nudge",
+        "🚫 No outbound calls"
+    ),
+}
 
-    # GRAPH MOMENTUM (DYNAMIC)
-    G = build_case_graph(df, signals)
-    momentum_scores = compute_case_rank(G)
+_SOP_TABLE = np.empty(len(SOP_TEMPLATES), dtype=object)
+for _tier, _steps in SOP_TEMPLATES.items():
+    _SOP_TABLE[_tier] = _steps
+
+ACTION_TYPES = np.array(["IMMEDIATE_ESCALATION", "STANDARD_QUEUE", "DIGITAL_ONLY"], dtype=object)
+
+
+def generate_sop_tier(final_priority_score) -> np.ndarray:
+    p = np.asarray(final_priority_score, dtype=np.float64)
+    return np.select([p >= 0.75, p <= 0.30], [SOP_PRIORITY, SOP_DIGITAL], default=SOP_STANDARD).astype(np.int8)
 
-    df["graph_raw"] = df["case_id"].map(momentum_scores).fillna(0.0)
 
-    # EMANTIC NORMALIZATION
-    df["graph_score"] = (df["graph_raw"] / MAX_EXPECTED_MOMENTUM).clip(0.0, 1.0)
+def sop_steps_for(tiers) -> np.ndarray:
+    # Object array of references into the interned template table (no per-case lists)
+    return _SOP_TABLE[np.asarray(tiers, dtype=np.intp)]
 
-    # HYBRID PRIORITY SCORE
-    df["final_priority_score"] = (
-        ALPHA * df["recovery_probability"]
-        + BETA * df["graph_score"]
+
+def determine_action(recovery_probability, graph_score, final_priority_score) -> np.ndarray:
+    ml = np.asarray(recovery_probability, dtype=np.float64)
+    g  = np.asarray(graph_score, dtype=np.float64)
+    p  = np.asarray(final_priority_score, dtype=np.float64)
+
+    code = np.select(
+        [(p >= 0.80) | ((g >= 0.70) & (ml >= 0.60)), p <= 0.30],
+        [0, 2],
+        default=1,
     )
+    return ACTION_TYPES[code]
+
+
+def priority_scores(recovery_probability, graph_raw):
+    """(graph_score, final_priority_score) from the ML prior and raw momentum; any array shape."""
+    graph_score = np.clip(np.asarray(graph_raw, dtype=np.float64) / MAX_EXPECTED_MOMENTUM, 0.0, 1.0)
+    return graph_score, ALPHA * np.asarray(recovery_probability, dtype=np.float64) + BETA * graph_score
+
+
+def _encode(df: pd.DataFrame):
+    """(FeatureMatrix, model bundle): the batch encoded once for the model it is scored with."""
+    bundle = MODEL_REGISTRY.get()
+    return (bundle.schema if bundle is not None else HEURISTIC_SCHEMA).encode(df), bundle
 
-    # OPERATIONAL LAYER
-    df["sop_steps"] = df.apply(generate_sop, axis=1)
-    df["action_type"] = df.apply(determine_action, axis=1)
+
+def _ml_prior(features, bundle, parallel: bool) -> np.ndarray:
+    if parallel:
+        try:
+            return parallel_recovery_probability(features, bundle)
+        except Exception as e:
+            print(f"⚠️ Parallel scoring failed ({e}). Scoring sequentially.")
+    return recovery_probability(features, bundle)
+
+
+def _cached_ml_prior(df: pd.DataFrame, parallel: bool) -> np.ndarray:
+    # Encoded once: the cache keys and the model (or the heuristic) read the same matrix
+    features, bundle = _encode(df)
+    # Cached scores are only valid for the model that produced them
+    SCORE_CACHE.sync_model_version(bundle.version if bundle is not None else None)
+
+    def score_misses(miss):
+        use_parallel = should_parallelize(int(miss.sum())) if parallel is None else parallel
+        return _ml_prior(features.take(miss), bundle, use_parallel)
+
+    return SCORE_CACHE.cached(feature_keys(features), score_misses)
+
+
+def _graph_raw(df: pd.DataFrame, signals: dict, momentum_mode: str) -> np.ndarray:
+    G = build_case_graph(df, signals)
+    momentum_scores = compute_case_rank(G, mode=momentum_mode)
+    return df["case_id"].map(momentum_scores).fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def compute_scores(df: pd.DataFrame, signals: dict, momentum_mode: str = "sum", momentum_index=None,
+                   as_of: float = None, parallel: bool = None, use_cache: bool = True) -> pd.DataFrame:
+    """
+    With a MomentumIndex, graph_raw is read from its decayed accumulators as of `as_of`
+    (signals are expected to be recorded there already); otherwise it is rebuilt from `signals`.
+    parallel=None shards the ML prior across processes once the batch reaches PARALLEL_MIN_BATCH.
+    use_cache: reuse the ML prior of cases whose features were scored before (same model version),
+    and the rebuilt graph momentum of a batch seen before (same cases, signals and mode).
+    """
+    df = df.copy()
+    use_cache = use_cache and SCORE_CACHE.enabled
+
+    # ML PRIOR (STATIC)
+    with stage_timer("ml_scoring"):
+        if use_cache:
+            df["recovery_probability"] = _cached_ml_prior(df, parallel)
+        else:
+            features, bundle = _encode(df)
+            use_parallel = should_parallelize(len(df)) if parallel is None else parallel
+            df["recovery_probability"] = _ml_prior(features, bundle, use_parallel)
+
+    # GRAPH MOMENTUM (DYNAMIC)
+    with stage_timer("graph"):
+        if momentum_index is not None:
+            df["graph_raw"] = momentum_index.values(df["case_id"], now=as_of)
+        elif use_cache and GRAPH_CACHE.enabled:
+            key = graph_key(df, signals, momentum_mode, COUNTERPARTY_COLUMN)
+            df["graph_raw"] = GRAPH_CACHE.cached(key, lambda: _graph_raw(df, signals, momentum_mode))
+        else:
+            df["graph_raw"] = _graph_raw(df, signals, momentum_mode)
+
+    with stage_timer("priority"):
+        # SEMANTIC NORMALIZATION + HYBRID PRIORITY SCORE
+        df["graph_score"], df["final_priority_score"] = priority_scores(df["recovery_probability"], df["graph_raw"])
+
+        # OPERATIONAL LAYER (vectorized rules)
+        df["sop_tier"] = generate_sop_tier(df["final_priority_score"])
+        df["sop_steps"] = sop_steps_for(df["sop_tier"])
+        df["action_type"] = determine_action(df["recovery_probability"], df["graph_score"], df["final_priority_score"])
 
    
-    return df.rename(columns={"recovery_probability": "ml_score"})
+    return df.rename(columns={"recovery_probability": "ml_score"})
\ No newline at end of file
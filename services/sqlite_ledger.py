@@ -0,0 +1,276 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from services.capacity_ledger import AgencySlot, MAX_OPTIMISTIC_RETRIES, assignment_changes, held_counts, unique_case_ids
+
+# How long a writer waits for another process's transaction before giving up
+BUSY_TIMEOUT_MS = 10_000
+
+# Case ids per "IN (...)" lookup (below SQLite's bound-parameter limit)
+SQL_CHUNK = 500
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS agencies (
+        dca_id TEXT PRIMARY KEY,
+        position INTEGER NOT NULL,
+        max_capacity INTEGER NOT NULL,
+        current_load INTEGER NOT NULL,
+        success REAL NOT NULL,
+        sla REAL NOT NULL
+    )
+    """,
+    # Agency held by each case that has a slot; updated in the same transaction as the loads
+    """
+    CREATE TABLE IF NOT EXISTS assignments (
+        case_id TEXT PRIMARY KEY,
+        dca_id TEXT NOT NULL
+    )
+    """,
+)
+
+
+class SQLiteCapacityLedger:
+    """
+    Capacity ledger shared by every process that opens the same database file
+    (e.g. `uvicorn --workers N`). Same interface as CapacityLedger.
+
+    Loads and case assignments live in SQLite tables in WAL mode. A reservation is a
+    single short BEGIN IMMEDIATE transaction of conditional UPDATEs, so capacity is
+    enforced across all workers (and a case re-posted to any worker moves its slot),
+    and readers never block writers. SQLite's own WAL makes the state durable, so no
+    separate journal is needed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # Static agency attributes (ids, limits, scores), cached per process
+        self._agencies = ()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # isolation_level=None: transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def load(self, records, restore: bool = True) -> None:
+        """
+        Upserts agency limits from `records`. Loads already in the database are kept
+        (another worker may be using them) unless restore=False.
+        """
+        records = list(records)
+        conn = self._conn()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO agencies (dca_id, position, max_capacity, current_load, success, sla) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(dca_id) DO UPDATE SET position = excluded.position, "
+                "max_capacity = excluded.max_capacity, success = excluded.success, sla = excluded.sla"
+                + ("" if restore else ", current_load = excluded.current_load"),
+                [
+                    (r["dca_id"], i, int(r["max_capacity"]), int(r["current_load"]), float(r["success"]), float(r["sla"]))
+                    for i, r in enumerate(records)
+                ],
+            )
+            # Agencies dropped from the profiles go away for every worker
+            ids = [r["dca_id"] for r in records]
+            placeholders = ",".join("?" * len(ids)) or "NULL"
+            conn.execute(f"DELETE FROM agencies WHERE dca_id NOT IN ({placeholders})", ids)
+            if restore:
+                conn.execute(f"DELETE FROM assignments WHERE dca_id NOT IN ({placeholders})", ids)
+            else:
+                conn.execute("DELETE FROM assignments")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        self._agencies = tuple(AgencySlot(*row) for row in self._rows(conn))
+
+    def _rows(self, conn) -> list:
+        return conn.execute(
+            "SELECT dca_id, max_capacity, current_load, success, sla FROM agencies ORDER BY position"
+        ).fetchall()
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+    @property
+    def empty(self) -> bool:
+        return len(self._agencies) == 0
+
+    def agencies(self) -> tuple:
+        return self._agencies
+
+    def _remaining(self, conn, agencies) -> np.ndarray:
+        free = dict(conn.execute("SELECT dca_id, max_capacity - current_load FROM agencies").fetchall())
+        return np.array([free.get(a.dca_id, 0) for a in agencies], dtype=np.int64)
+
+    def remaining(self, agencies=None) -> np.ndarray:
+        agencies = self._agencies if agencies is None else agencies
+        return self._remaining(self._conn(), agencies)
+
+    def _held(self, conn, case_ids: list) -> list:
+        found = {}
+        for start in range(0, len(case_ids), SQL_CHUNK):
+            chunk = case_ids[start:start + SQL_CHUNK]
+            found.update(conn.execute(
+                f"SELECT case_id, dca_id FROM assignments WHERE case_id IN ({','.join('?' * len(chunk))})", chunk,
+            ).fetchall())
+        return [found.get(cid) for cid in case_ids]
+
+    def held(self, case_ids) -> list:
+        """Agency id currently held by each case (None = no slot), as seen by every worker."""
+        return self._held(self._conn(), list(case_ids))
+
+    def snapshot(self) -> list:
+        """Current loads as seen by every worker."""
+        return [AgencySlot(*row).to_dict() for row in self._rows(self._conn())]
+
+    def _apply(self, conn, counts, agencies) -> bool:
+        # Caller holds the write transaction
+        for agency, n in zip(agencies, counts):
+            if n == 0:
+                continue
+            cur = conn.execute(
+                "UPDATE agencies SET current_load = current_load + ? "
+                "WHERE dca_id = ? AND (? <= 0 OR current_load + ? <= max_capacity)",
+                (int(n), agency.dca_id, int(n), int(n)),
+            )
+            if cur.rowcount == 0:
+                return False
+        return True
+
+    def try_reserve(self, counts, agencies=None) -> bool:
+        """Atomically adds counts[j] to agency j if every agency stays within capacity."""
+        agencies = self._agencies if agencies is None else agencies
+        counts = np.asarray(counts, dtype=np.int64)
+        if not counts.any():
+            return True
+
+        conn = self._transaction()
+        try:
+            ok = self._apply(conn, counts, agencies)
+            conn.execute("COMMIT" if ok else "ROLLBACK")
+            return ok
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, counts, agencies=None) -> None:
+        agencies = self._agencies if agencies is None else agencies
+        counts = np.asarray(counts, dtype=np.int64)
+        if not counts.any():
+            return
+
+        conn = self._transaction()
+        try:
+            conn.executemany(
+                "UPDATE agencies SET current_load = MAX(0, current_load - ?) WHERE dca_id = ?",
+                [(int(n), a.dca_id) for a, n in zip(agencies, counts) if n != 0],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _assign(self, conn, case_ids, held, picks, agencies) -> None:
+        # Caller holds the write transaction
+        changes = assignment_changes(case_ids, held, picks, agencies)
+        conn.executemany(
+            "INSERT INTO assignments (case_id, dca_id) VALUES (?, ?) "
+            "ON CONFLICT(case_id) DO UPDATE SET dca_id = excluded.dca_id",
+            [(cid, dca_id) for cid, dca_id in changes.items() if dca_id is not None],
+        )
+        conn.executemany(
+            "DELETE FROM assignments WHERE case_id = ?",
+            [(cid,) for cid, dca_id in changes.items() if dca_id is None],
+        )
+
+    def reserve_with(self, plan_fn, agencies=None, case_ids=None, max_retries: int = MAX_OPTIMISTIC_RETRIES):
+        """
+        Same optimistic loop as CapacityLedger.reserve_with: plans run outside any
+        transaction; after max_retries the plan is made inside the write transaction,
+        which locks out every other worker until it commits.
+        """
+        agencies = self._agencies if agencies is None else agencies
+        if case_ids is not None:
+            return self._reassign_with(plan_fn, agencies, unique_case_ids(case_ids), max_retries)
+
+        for _ in range(max_retries):
+            result, counts = plan_fn(self.remaining(agencies))
+            if self.try_reserve(counts, agencies):
+                return result
+
+        conn = self._transaction()
+        try:
+            result, counts = plan_fn(self._remaining(conn, agencies))
+            if not self._apply(conn, np.asarray(counts, dtype=np.int64), agencies):
+                raise RuntimeError("Capacity plan exceeded the free capacity it was given")
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _reassign_with(self, plan_fn, agencies, case_ids: list, max_retries: int):
+        for _ in range(max_retries):
+            conn = self._conn()
+            held = self._held(conn, case_ids)
+            freed = held_counts(held, agencies)
+            picks, counts = plan_fn(self._remaining(conn, agencies) + freed)
+            picks = np.asarray(picks)
+
+            conn = self._transaction()
+            try:
+                # Another worker moved one of these cases, or took the capacity, since the plan was made
+                ok = self._held(conn, case_ids) == held and self._apply(conn, np.asarray(counts) - freed, agencies)
+                if ok:
+                    self._assign(conn, case_ids, held, picks, agencies)
+                conn.execute("COMMIT" if ok else "ROLLBACK")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            if ok:
+                return picks
+
+        conn = self._transaction()
+        try:
+            held = self._held(conn, case_ids)
+            freed = held_counts(held, agencies)
+            picks, counts = plan_fn(self._remaining(conn, agencies) + freed)
+            picks = np.asarray(picks)
+            if not self._apply(conn, np.asarray(counts) - freed, agencies):
+                raise RuntimeError("Capacity plan exceeded the free capacity it was given")
+            self._assign(conn, case_ids, held, picks, agencies)
+            conn.execute("COMMIT")
+            return picks
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
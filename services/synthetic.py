@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from engines.momentum_index import SIGNAL_WEIGHTS
+
+BASE_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+SEED_PATH = os.path.join(BASE_DIR, "demo_cases_bulk.csv")
+
+# Relative share of each signal type among generated events
+SIGNAL_MIX = {name: 1.0 for name in SIGNAL_WEIGHTS}
+
+# Average number of signal events per case
+SIGNALS_PER_CASE = 0.5
+
+# Continuous columns get jitter of this fraction of their std
+JITTER = 0.05
+
+
+def load_seed(path: str = SEED_PATH) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+def generate_portfolio(n_cases: int, seed: int = 0, seed_df: pd.DataFrame = None, chunk_size: int = 1_000_000) -> pd.DataFrame:
+    """
+    Synthetic portfolio with the feature distributions of demo_cases_bulk.csv.
+    Rows are bootstrapped from the seed file (keeps the joint distribution of the
+    one-hot columns); continuous columns are jittered and clipped to the observed range.
+    """
+    seed_df = load_seed() if seed_df is None else seed_df
+    rng = np.random.default_rng(seed)
+
+    features = seed_df.drop(columns=["case_id"])
+    binary = [c for c in features.columns if set(features[c].dropna().unique()) <= {0, 1}]
+    continuous = [c for c in features.columns if c not in binary]
+
+    values = features.to_numpy(dtype=np.float64)
+    col_pos = {c: i for i, c in enumerate(features.columns)}
+    lo, hi = features[continuous].min().to_numpy(), features[continuous].max().to_numpy()
+    std = features[continuous].std().fillna(0).to_numpy()
+
+    chunks = []
+    for start in range(0, n_cases, chunk_size):
+        size = min(chunk_size, n_cases - start)
+        rows = values[rng.integers(0, len(values), size)]
+
+        cont_idx = [col_pos[c] for c in continuous]
+        noise = rng.normal(0.0, 1.0, (size, len(continuous))) * (JITTER * std)
+        rows[:, cont_idx] = np.clip(rows[:, cont_idx] + noise, lo, hi)
+
+        chunk = pd.DataFrame(rows, columns=features.columns)
+        for c in binary:
+            chunk[c] = chunk[c].astype(np.int8)
+        if "loan_amnt" in chunk.columns:
+            chunk["loan_amnt"] = chunk["loan_amnt"].round()
+
+        chunk.insert(0, "case_id", [f"S{i:08d}" for i in range(start, start + size)])
+        chunks.append(chunk)
+
+    if not chunks:
+        return pd.DataFrame(columns=seed_df.columns)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def generate_signals(case_ids, seed: int = 0, per_case: float = SIGNALS_PER_CASE, mix: dict = None) -> dict:
+    """Poisson number of events per case, types drawn from the signal mix, weights from SIGNAL_WEIGHTS."""
+    mix = SIGNAL_MIX if mix is None else mix
+    rng = np.random.default_rng(seed + 1)
+
+    names = list(mix)
+    p = np.array([mix[n] for n in names], dtype=np.float64)
+    p /= p.sum()
+
+    case_ids = np.asarray(case_ids, dtype=object)
+    counts = rng.poisson(per_case, len(case_ids))
+    owners = np.repeat(case_ids, counts)
+    types = rng.choice(len(names), size=len(owners), p=p)
+
+    signals = {}
+    for cid, t in zip(owners.tolist(), types.tolist()):
+        signals.setdefault(cid, []).append((names[t], SIGNAL_WEIGHTS[names[t]]))
+    return signals
+
+
+def to_payload(df: pd.DataFrame, signals: dict) -> dict:
+    """/allocate request body for a generated portfolio."""
+    features = df.drop(columns=["case_id"])
+    columns = list(features.columns)
+    return {
+        "cases": [
+            {"case_id": cid, "features": dict(zip(columns, row))}
+            for cid, row in zip(df["case_id"].tolist(), features.to_numpy(dtype=np.float64).tolist())
+        ],
+        "signals": [
+            {"case_id": cid, "signal_type": name, "weight": weight}
+            for cid, sigs in signals.items() for name, weight in sigs
+        ],
+    }
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from engines.model_registry import MODEL_REGISTRY
+from services.optimal_allocation import plan_optimal_allocation
+from services.scoring_service import compute_scores
+
+# Attempts per warm-up run, waiting WARMUP_BACKOFF * 2**n seconds after failure n
+WARMUP_RETRIES = int(os.environ.get("DCA_WARMUP_RETRIES", 5))
+WARMUP_BACKOFF = float(os.environ.get("DCA_WARMUP_BACKOFF", 1.0))
+
+# Readiness reported by GET /ready (liveness stays on "/")
+READINESS = {"ready": False, "model_loaded": False, "warmup_seconds": None, "error": None, "attempts": 0}
+
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+
+
+def _warmup_case() -> pd.DataFrame:
+    bundle = MODEL_REGISTRY.get()
+    features = bundle.features if bundle is not None else []
+    return pd.DataFrame([{"case_id": "__warmup__", **{f: 0.0 for f in features}}])
+
+
+def warm_up() -> dict:
+    """
+    Loads the model and runs one synthetic case through scoring (graph propagation
+    included) and the optimal planner, so the lazily imported engines are in place
+    before real traffic. Touches no live state (capacity ledger, case store, score cache).
+    """
+    start = time.perf_counter()
+    READINESS["attempts"] += 1
+    try:
+        # Load the recovery model once; later requests reuse it until the files change
+        READINESS["model_loaded"] = MODEL_REGISTRY.warm()
+
+        compute_scores(_warmup_case(), {"__warmup__": [("CALL_ANSWERED", 1.5)]}, momentum_mode="propagate", use_cache=False)
+        plan_optimal_allocation(np.array([0.5]), np.array([1.0]), np.array([1]))
+
+        READINESS["ready"] = True
+        READINESS["error"] = None
+    except Exception as e:
+        READINESS["error"] = str(e)
+        print(f"⚠️ Warm-up failed: {e}")
+    READINESS["warmup_seconds"] = time.perf_counter() - start
+    return READINESS
+
+
+def _warm_up_with_retry(retries: int, backoff: float) -> None:
+    for attempt in range(retries):
+        if warm_up()["ready"]:
+            return
+        if attempt + 1 < retries:
+            time.sleep(backoff * 2 ** attempt)
+
+
+def start_warm_up(retries: int = None, backoff: float = None) -> bool:
+    """
+    Runs warm_up() in a background thread, retrying with exponential backoff.
+    No-op while a run is in progress or once ready; GET /ready calls it again
+    after a run has given up, so a transient failure does not leave the pod unready.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if READINESS["ready"] or (_warmup_thread is not None and _warmup_thread.is_alive()):
+            return False
+        _warmup_thread = threading.Thread(
+            target=_warm_up_with_retry, name="warm-up", daemon=True,
+            args=(WARMUP_RETRIES if retries is None else retries, WARMUP_BACKOFF if backoff is None else backoff),
+        )
+        _warmup_thread.start()
+    return True
@@ -0,0 +1,113 @@
+import os
+import tempfile
+
+# Tests never read or write the persisted capacity state, the jobs spool or a shared DB.
+# Set before any app / services import (the services read these at import time).
+_TMP = tempfile.mkdtemp(prefix="dca-tests-")
+os.environ["DCA_STATE_DIR"] = ""
+os.environ["DCA_CAPACITY_BACKEND"] = "memory"
+os.environ["DCA_JOB_DIR"] = os.path.join(_TMP, "jobs")
+
+import pandas as pd
+import pytest
+
+from services import case_store
+from services.score_cache import GRAPH_CACHE, SCORE_CACHE
+
+# Agency profiles used by the API tests (same shape as data/dca_profiles.csv)
+PROFILES = [
+    {"dca_id": "DCA_TOP", "max_capacity": 50, "current_load": 0, "success": 0.85, "sla": 0.95},
+    {"dca_id": "DCA_STANDARD", "max_capacity": 100, "current_load": 0, "success": 0.70, "sla": 0.90},
+    {"dca_id": "DCA_BULK", "max_capacity": 200, "current_load": 0, "success": 0.55, "sla": 0.85},
+]
+
+
+def make_cases(n: int, seed: int = 0, prefix: str = "C") -> pd.DataFrame:
+    """Small synthetic portfolio with the demo feature columns."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    rent = rng.integers(0, 2, n)
+    return pd.DataFrame({
+        "case_id": [f"{prefix}{i}" for i in range(n)],
+        "loan_amnt": rng.integers(1_000, 40_000, n).astype(float),
+        "annual_inc": rng.uniform(15_000, 150_000, n),
+        "dti": rng.uniform(0, 45, n),
+        "revol_util": rng.uniform(0, 110, n),
+        "int_rate": rng.uniform(5, 28, n),
+        "home_ownership_RENT": rent,
+        "home_ownership_OWN": (1 - rent) * rng.integers(0, 2, n),
+        "emp_length_10+ years": rng.integers(0, 2, n),
+    })
+
+
+def to_allocate_payload(df: pd.DataFrame, signals: dict = None, **options) -> dict:
+    features = df.drop(columns=["case_id"])
+    return {
+        "cases": [
+            {"case_id": cid, "features": dict(zip(features.columns, row))}
+            for cid, row in zip(df["case_id"], features.to_numpy(dtype=float).tolist())
+        ],
+        "signals": [
+            {"case_id": cid, "signal_type": name, "weight": weight}
+            for cid, events in (signals or {}).items() for name, weight in events
+        ],
+        **options,
+    }
+
+
+@pytest.fixture
+def ledger():
+    """Fresh agency capacity (CSV profiles, nothing persisted)."""
+    from services.allocation_service import DCA_LEDGER
+
+    DCA_LEDGER.load(PROFILES, restore=False)
+    return DCA_LEDGER
+
+
+def _fresh_store(monkeypatch) -> case_store.CaseStore:
+    import app.routes
+
+    fresh = case_store.CaseStore()
+    monkeypatch.setattr(case_store, "CASE_STORE", fresh)
+    monkeypatch.setattr(app.routes, "CASE_STORE", fresh)
+    SCORE_CACHE.clear()
+    GRAPH_CACHE.clear()
+    return fresh
+
+
+@pytest.fixture
+def store(monkeypatch, ledger):
+    """Empty case store (and score cache) for one test."""
+    return _fresh_store(monkeypatch)
+
+
+@pytest.fixture
+def reset(monkeypatch, ledger, store):
+    """Call to start again from fresh capacity and an empty case store within one test."""
+    def _reset():
+        ledger.load(PROFILES, restore=False)
+        return _fresh_store(monkeypatch)
+
+    return _reset
+
+
+@pytest.fixture
+def client(store):
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    return TestClient(app)
+
+
+def load_demo_cases() -> pd.DataFrame:
+    """data/demo_cases_bulk.csv: real client payloads, including rows with several one-hot flags set."""
+    return pd.read_csv(os.path.join(os.path.dirname(__file__), "..", "data", "demo_cases_bulk.csv"))
+
+
+def raw_dense(df: pd.DataFrame, features: list, imputation: dict) -> "np.ndarray":
+    """Model input built straight from the sent columns (float64, no schema): missing -> imputation / 0."""
+    import numpy as np
+
+    X = df.reindex(columns=features).astype(np.float64)
+    return X.fillna({f: imputation.get(f, 0.0) for f in features}).to_numpy()
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.allocation_service import (
+    HOLD_QUEUE, PRIORITY_THRESHOLD, allocate_cases_with_state, dca_scores, plan_allocation,
+)
+from tests.conftest import PROFILES
+
+
+def _greedy_loop(priorities, scores, remaining):
+    """The original per-case loop: best eligible agency above the threshold, cheapest below."""
+    remaining = np.array(remaining, dtype=np.int64)
+    picks = []
+    for p in priorities:
+        eligible = np.flatnonzero(remaining > 0)
+        if len(eligible) == 0:
+            picks.append(-1)
+            continue
+        # Stable sort: ties keep profile order
+        order = eligible[np.argsort(-scores[eligible] if p > PRIORITY_THRESHOLD else scores[eligible], kind="stable")]
+        picks.append(int(order[0]))
+        remaining[order[0]] -= 1
+    return np.array(picks, dtype=np.int64)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_plan_matches_greedy_loop(seed):
+    rng = np.random.default_rng(seed)
+    n, m = int(rng.integers(0, 80)), int(rng.integers(1, 6))
+    priorities = rng.uniform(0, 1, n)
+    if seed % 2:
+        priorities = -np.sort(-priorities)
+    # Repeated scores exercise tie-breaking
+    scores = rng.choice([0.5, 0.6, 0.7], m)
+    remaining = rng.integers(0, 15, m)
+
+    picks, used = plan_allocation(priorities, scores, remaining)
+    np.testing.assert_array_equal(picks, _greedy_loop(priorities, scores, remaining))
+    np.testing.assert_array_equal(used, np.bincount(picks[picks >= 0], minlength=m))
+    assert (used <= remaining).all()
+
+
+def test_plan_handles_empty_inputs():
+    picks, used = plan_allocation(np.array([]), np.array([0.5]), np.array([3]))
+    assert len(picks) == 0 and used.tolist() == [0]
+    picks, used = plan_allocation(np.array([0.9, 0.1]), np.array([]), np.array([]))
+    assert picks.tolist() == [-1, -1]
+
+
+def test_allocate_cases_with_state_matches_greedy_loop(ledger):
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({"case_id": [f"C{i}" for i in range(400)], "final_priority_score": rng.uniform(0, 1, 400)})
+
+    out = allocate_cases_with_state(df.copy())
+
+    scores = dca_scores([p["success"] for p in PROFILES], [p["sla"] for p in PROFILES])
+    remaining = [p["max_capacity"] - p["current_load"] for p in PROFILES]
+    expected = _greedy_loop(out["final_priority_score"].to_numpy(), scores, remaining)
+    ids = np.array([p["dca_id"] for p in PROFILES] + [HOLD_QUEUE], dtype=object)
+    assert out["assigned_dca"].tolist() == ids[expected].tolist()
+
+    loads = {a["dca_id"]: a["current_load"] for a in ledger.snapshot()}
+    assert loads == {p["dca_id"]: p["max_capacity"] for p in PROFILES}
+    assert (out["assigned_dca"] == HOLD_QUEUE).sum() == 400 - sum(remaining)
@@ -0,0 +1,97 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from services.allocation_service import HOLD_QUEUE, allocate_cases_with_state
+from services.capacity_ledger import CapacityLedger
+from tests.conftest import PROFILES
+
+
+def _run_threads(target, n_threads=16):
+    barrier = threading.Barrier(n_threads)
+
+    def run(i):
+        barrier.wait()
+        target(i)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test_try_reserve_is_all_or_nothing():
+    ledger = CapacityLedger()
+    ledger.load(PROFILES, restore=False)
+    assert ledger.try_reserve([50, 0, 0])
+    assert not ledger.try_reserve([1, 1, 0])
+    assert ledger.remaining().tolist() == [0, 100, 200]
+
+
+def test_concurrent_reservations_never_exceed_capacity():
+    ledger = CapacityLedger()
+    ledger.load(PROFILES, restore=False)
+    granted = []
+    lock = threading.Lock()
+
+    def reserve(i):
+        rng = np.random.default_rng(i)
+        for _ in range(200):
+            counts = rng.integers(0, 4, 3)
+            if ledger.try_reserve(counts):
+                with lock:
+                    granted.append(counts)
+
+    _run_threads(reserve)
+
+    loads = np.array([a["current_load"] for a in ledger.snapshot()])
+    assert (loads <= [p["max_capacity"] for p in PROFILES]).all()
+    np.testing.assert_array_equal(loads, np.sum(granted, axis=0))
+
+
+def test_concurrent_reserve_with_assigns_each_slot_once():
+    ledger = CapacityLedger()
+    ledger.load(PROFILES, restore=False)
+    taken = []
+    lock = threading.Lock()
+
+    def plan(remaining):
+        # Take up to 7 slots from the first agency that has room
+        counts = np.zeros(len(remaining), dtype=np.int64)
+        free = np.flatnonzero(remaining > 0)
+        if len(free):
+            counts[free[0]] = min(7, remaining[free[0]])
+        return counts, counts
+
+    def reserve(i):
+        for _ in range(10):
+            counts = ledger.reserve_with(plan)
+            with lock:
+                taken.append(counts)
+
+    _run_threads(reserve)
+
+    loads = np.array([a["current_load"] for a in ledger.snapshot()])
+    assert loads.tolist() == [p["max_capacity"] for p in PROFILES]
+    np.testing.assert_array_equal(np.sum(taken, axis=0), loads)
+
+
+def test_concurrent_batches_fill_capacity_exactly(ledger):
+    total = sum(p["max_capacity"] for p in PROFILES)
+    results = [None] * 8
+
+    def allocate(i):
+        rng = np.random.default_rng(i)
+        df = pd.DataFrame({"case_id": [f"T{i}-{k}" for k in range(60)], "final_priority_score": rng.uniform(0, 1, 60)})
+        results[i] = allocate_cases_with_state(df)
+
+    _run_threads(allocate, n_threads=8)
+
+    assigned = pd.concat(results)["assigned_dca"]
+    counts = assigned[assigned != HOLD_QUEUE].value_counts()
+    loads = {a["dca_id"]: a["current_load"] for a in ledger.snapshot()}
+    assert loads == {p["dca_id"]: p["max_capacity"] for p in PROFILES}
+    assert counts.to_dict() == loads
+    assert (assigned == HOLD_QUEUE).sum() == 8 * 60 - total
@@ -0,0 +1,197 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from services import allocation_service
+from services.capacity_journal import CapacityJournal
+from services.capacity_ledger import CapacityLedger
+from services.sqlite_ledger import SQLiteCapacityLedger
+from tests.conftest import PROFILES, make_cases, to_allocate_payload
+
+
+def _journal_ledger(path, **journal_options):
+    return CapacityLedger(CapacityJournal(str(path), **journal_options))
+
+
+BACKENDS = {
+    "journal": lambda tmp_path: _journal_ledger(tmp_path),
+    "sqlite": lambda tmp_path: SQLiteCapacityLedger(str(tmp_path / "capacity.db")),
+}
+
+
+def _crash(ledger) -> None:
+    """A killed process: its files close (releasing the journal lock) without a final snapshot."""
+    ledger._journal._wal.close()
+    ledger._journal._lock_file.close()
+
+
+def _loads(ledger) -> dict:
+    return {a["dca_id"]: a["current_load"] for a in ledger.snapshot()}
+
+
+@pytest.fixture(params=list(BACKENDS))
+def restartable(request, tmp_path, monkeypatch, reset):
+    """Returns start(): a fresh process's view of the same persisted capacity state."""
+    ledgers = []
+
+    def start():
+        if ledgers:
+            ledgers[-1].close()
+        ledger = BACKENDS[request.param](tmp_path)
+        ledger.load(PROFILES, restore=len(ledgers) > 0)
+        ledgers.append(ledger)
+        monkeypatch.setattr(allocation_service, "DCA_LEDGER", ledger)
+        # A restarted worker has no resident cases
+        reset()
+        return ledger
+
+    yield start
+    ledgers[-1].close()
+
+
+def test_repost_after_restart_does_not_double_count(client, restartable):
+    payload = to_allocate_payload(make_cases(50), signals={"C1": [("PAYMENT", 3.0)]})
+
+    ledger = restartable()
+    first = {r["case_id"]: r["assigned_dca"] for r in client.post("/allocate", json=payload).json()}
+    loads = _loads(ledger)
+    assert sum(loads.values()) == 50
+
+    for _ in range(3):
+        ledger = restartable()
+        assert _loads(ledger) == loads
+        again = {r["case_id"]: r["assigned_dca"] for r in client.post("/allocate", json=payload).json()}
+        assert again == first
+        assert _loads(ledger) == loads
+
+
+def test_moves_and_holds_survive_restart(restartable):
+    ledger = restartable()
+    ids = ["A", "B", "C"]
+    ledger.reserve_with(lambda remaining: ([0, 1, 2], [1, 1, 1]), case_ids=ids)
+    # B moves to agency 0, C goes to the hold queue
+    ledger.reserve_with(lambda remaining: ([0, -1], [1, 0, 0]), case_ids=["B", "C"])
+
+    ledger = restartable()
+    assert ledger.held(ids + ["D"]) == ["DCA_TOP", "DCA_TOP", None, None]
+    assert _loads(ledger) == {"DCA_TOP": 2, "DCA_STANDARD": 0, "DCA_BULK": 0}
+
+
+def test_restore_false_discards_assignments(restartable):
+    ledger = restartable()
+    ledger.reserve_with(lambda remaining: ([0], [1, 0, 0]), case_ids=["A"])
+    ledger.load(PROFILES, restore=False)
+    assert ledger.held(["A"]) == [None]
+    assert sum(_loads(ledger).values()) == 0
+
+
+def test_torn_wal_line_is_ignored(tmp_path):
+    ledger = _journal_ledger(tmp_path)
+    ledger.load(PROFILES, restore=False)
+    ledger.reserve_with(lambda remaining: ([0, 0], [2, 0, 0]), case_ids=["A", "B"])
+    ledger.reserve_with(lambda remaining: ([2], [0, 0, 1]), case_ids=["C"])
+    # Simulated crash: no final snapshot, half-written last line
+    _crash(ledger)
+    with open(tmp_path / "capacity.wal", "a", encoding="utf-8") as f:
+        f.write('{"seq": 99, "d": {"DCA_TOP": 5}, "a": {"X"')
+
+    restarted = _journal_ledger(tmp_path)
+    restarted.load(PROFILES)
+    assert _loads(restarted) == {"DCA_TOP": 2, "DCA_STANDARD": 0, "DCA_BULK": 1}
+    assert restarted.held(["A", "B", "C", "X"]) == ["DCA_TOP", "DCA_TOP", "DCA_BULK", None]
+
+
+def test_snapshots_hold_the_same_state_as_the_log(tmp_path):
+    ledger = _journal_ledger(tmp_path, snapshot_every=3)
+    ledger.load(PROFILES, restore=False)
+    for i in range(10):
+        ledger.reserve_with(lambda remaining: ([i % 3], [1 if j == i % 3 else 0 for j in range(3)]), case_ids=[f"K{i}"])
+
+    with open(tmp_path / "capacity.snapshot.json", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["seq"] == 9
+    assert len(snapshot["assignments"]) == 9
+
+    _crash(ledger)
+    restarted = _journal_ledger(tmp_path)
+    restarted.load(PROFILES)
+    assert _loads(restarted) == {"DCA_TOP": 4, "DCA_STANDARD": 3, "DCA_BULK": 3}
+    assert restarted.held([f"K{i}" for i in range(10)]) == [PROFILES[i % 3]["dca_id"] for i in range(10)]
+
+
+def test_second_process_cannot_open_the_same_journal(tmp_path):
+    ledger = _journal_ledger(tmp_path)
+    ledger.load(PROFILES, restore=False)
+
+    snippet = (
+        "import sys; from services.capacity_journal import CapacityJournal, JournalLockedError\n"
+        "try:\n    CapacityJournal(sys.argv[1]).recover()\n"
+        "except JournalLockedError as e:\n    print(e)"
+    )
+    out = subprocess.check_output([sys.executable, "-c", snippet, str(tmp_path)], env=dict(os.environ, PYTHONPATH=os.getcwd()),
+                                  text=True)
+    assert "DCA_CAPACITY_BACKEND=sqlite" in out
+    # Nothing was written by the refused process
+    assert _loads(ledger) == {r["dca_id"]: r["current_load"] for r in PROFILES}
+
+    ledger.close()
+    restarted = _journal_ledger(tmp_path)
+    restarted.load(PROFILES)
+    restarted.close()
+
+
+def test_benchmark_reset_never_touches_persisted_state(tmp_path):
+    snippet = (
+        "import benchmarks.run as run; run._reset_capacity(); "
+        "from services import allocation_service as a; print(repr(a.STATE_DIR), a.CAPACITY_BACKEND)"
+    )
+    env = dict(os.environ, DCA_STATE_DIR=str(tmp_path), DCA_CAPACITY_BACKEND="sqlite",
+               DCA_CAPACITY_DB=str(tmp_path / "capacity.db"), PYTHONPATH=os.getcwd())
+    out = subprocess.check_output([sys.executable, "-c", snippet], env=env, text=True, stderr=subprocess.DEVNULL)
+    assert out.strip().splitlines()[-1] == "'' memory"
+    assert os.listdir(tmp_path) == []
+
+
+def test_benchmark_reset_refuses_persisted_state(monkeypatch):
+    import benchmarks.run
+
+    monkeypatch.setattr(allocation_service, "STATE_DIR", "data/state")
+    with pytest.raises(RuntimeError):
+        benchmarks.run._reset_capacity()
+
+
+@pytest.mark.parametrize("backend", list(BACKENDS))
+def test_concurrent_reposts_of_the_same_cases_hold_one_slot_each(tmp_path, backend):
+    import threading
+
+    import numpy as np
+
+    from services.allocation_service import plan_allocation
+
+    ledger = BACKENDS[backend](tmp_path)
+    ledger.load(PROFILES, restore=False)
+    agencies = ledger.agencies()
+    scores = np.array([0.9, 0.7, 0.5])
+
+    def repost(seed):
+        rng = np.random.default_rng(seed)
+        for _ in range(10):
+            # Overlapping subsets of the same 300 cases, in random priority order
+            ids = [f"C{i}" for i in sorted(rng.choice(300, 120, replace=False))]
+            priorities = rng.uniform(0, 1, len(ids))
+            ledger.reserve_with(lambda remaining: plan_allocation(priorities, scores, remaining), agencies, case_ids=ids)
+
+    threads = [threading.Thread(target=repost, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    held = ledger.held([f"C{i}" for i in range(300)])
+    loads = _loads(ledger)
+    assert loads == {a.dca_id: sum(h == a.dca_id for h in held) for a in agencies}
+    assert all(loads[p["dca_id"]] <= p["max_capacity"] for p in PROFILES)
+    ledger.close()
@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+
+from services import case_store
+from services.allocation_service import HOLD_QUEUE
+from tests.conftest import make_cases, to_allocate_payload
+
+
+def _loads(client) -> dict:
+    return {a["dca_id"]: a["current_load"] for a in client.get("/dca-capacity").json()}
+
+
+def _assigned(store) -> dict:
+    counts = store.results()["assigned_dca"].value_counts()
+    return {k: int(v) for k, v in counts.items() if k != HOLD_QUEUE}
+
+
+def test_repost_does_not_double_count(client, store):
+    payload = to_allocate_payload(make_cases(120, seed=1))
+    client.post("/allocate", json=payload)
+    loads = _loads(client)
+    for _ in range(3):
+        client.post("/allocate", json=payload)
+    assert _loads(client) == loads
+    assert len(store) == 120
+    assert {k: v for k, v in loads.items() if v} == _assigned(store)
+
+
+def test_signals_move_only_affected_cases(client, store):
+    client.post("/allocate", json=to_allocate_payload(make_cases(60, seed=2)))
+    before = store.results().set_index("case_id")
+
+    response = client.post("/signals", json={"signals": [
+        {"case_id": "C3", "signal_type": "PARTIAL_PAYMENT", "weight": 6.0},
+        {"case_id": "C3", "signal_type": "PROMISE_TO_PAY", "weight": 4.0},
+        {"case_id": "unknown", "signal_type": "PARTIAL_PAYMENT", "weight": 6.0},
+    ]})
+    assert response.status_code == 200
+    assert [r["case_id"] for r in response.json()] == ["C3"]
+
+    after = store.results().set_index("case_id")
+    assert after.loc["C3", "final_priority_score"] > before.loc["C3", "final_priority_score"]
+    unchanged = after.index.drop("C3")
+    assert after.loc[unchanged, "assigned_dca"].equals(before.loc[unchanged, "assigned_dca"])
+    assert {k: v for k, v in _loads(client).items() if v} == _assigned(store)
+
+
+def test_signals_reallocate_with_the_original_mode(client, store, monkeypatch):
+    client.post("/allocate", json=to_allocate_payload(make_cases(30, seed=3, prefix="O"), allocation_mode="optimal"))
+    client.post("/allocate", json=to_allocate_payload(make_cases(30, seed=4, prefix="G")))
+    # Re-posting a case with another mode switches it
+    client.post("/allocate", json=to_allocate_payload(make_cases(30, seed=3, prefix="O").iloc[[5]]))
+
+    calls = []
+    allocate = case_store.allocate_cases_with_state
+    monkeypatch.setattr(case_store, "allocate_cases_with_state",
+                        lambda df, mode="greedy": calls.append((mode, sorted(df["case_id"]))) or allocate(df, mode=mode))
+
+    response = client.post("/signals", json={"signals": [
+        {"case_id": cid, "signal_type": "PROMISE_TO_PAY", "weight": 4.0} for cid in ("O1", "O2", "O5", "G1", "G7")
+    ]})
+    assert response.status_code == 200
+    assert sorted(calls) == [("greedy", ["G1", "G7", "O5"]), ("optimal", ["O1", "O2"])]
+    # One response, highest priority first, every case once
+    scores = [r["final_priority_score"] for r in response.json()]
+    assert scores == sorted(scores, reverse=True) and len(scores) == 5
+    assert {k: v for k, v in _loads(client).items() if v} == _assigned(store)
+
+
+def test_signals_for_unknown_cases_return_404(client):
+    response = client.post("/signals", json={"signals": [{"case_id": "nope", "signal_type": "X", "weight": 1.0}]})
+    assert response.status_code == 404
+
+
+def test_store_lock_is_not_held_while_scoring(client, store, monkeypatch):
+    free_during_scoring = []
+    compute_scores = case_store.compute_scores
+
+    def probe(*args, **kwargs):
+        def try_lock():
+            acquired = store.lock.acquire(blocking=False)
+            if acquired:
+                store.lock.release()
+            free_during_scoring.append(acquired)
+
+        t = threading.Thread(target=try_lock)
+        t.start()
+        t.join()
+        return compute_scores(*args, **kwargs)
+
+    monkeypatch.setattr(case_store, "compute_scores", probe)
+    client.post("/allocate", json=to_allocate_payload(make_cases(5)))
+    client.post("/signals", json={"signals": [{"case_id": "C1", "signal_type": "SMS_REPLIED", "weight": 1.0}]})
+    assert free_during_scoring == [True, True]
+
+
+def test_store_evicts_least_recently_allocated_cases(client, monkeypatch):
+    bounded = case_store.CaseStore(max_cases=50)
+    monkeypatch.setattr(case_store, "CASE_STORE", bounded)
+    import app.routes
+    monkeypatch.setattr(app.routes, "CASE_STORE", bounded)
+
+    old = make_cases(40, prefix="OLD", seed=1)
+    client.post("/allocate", json=to_allocate_payload(old, {"OLD0": [("PAYMENT", 5.0)]}))
+    client.post("/allocate", json=to_allocate_payload(make_cases(30, prefix="NEW", seed=2)))
+
+    assert len(bounded) == 50
+    kept = set(bounded.results()["case_id"])
+    evicted = sorted(set(old["case_id"]) - kept)
+    assert {f"NEW{i}" for i in range(30)} <= kept and len(evicted) == 20
+    assert not any(cid in bounded.momentum for cid in evicted)
+    assert len(bounded.features(sorted(kept))) == 50
+    assert len(bounded.allocation_modes(sorted(kept))) == 50 and len(bounded._modes) == 50
+
+    # Evicted cases keep their agency slot: a re-post moves it rather than taking another
+    loads = _loads(client)
+    assert sum(loads.values()) == 70
+    client.post("/allocate", json=to_allocate_payload(old[old["case_id"].isin(evicted)]))
+    assert _loads(client) == loads
+
+    response = client.post("/signals", json={"signals": [{"case_id": "NEW0", "signal_type": "X", "weight": 1.0}]})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("n_threads", [8])
+def test_concurrent_allocate_and_signals_stay_consistent(client, store, n_threads):
+    client.post("/allocate", json=to_allocate_payload(make_cases(200, seed=3)))
+    errors = []
+
+    def worker(i):
+        try:
+            if i % 2:
+                client.post("/allocate", json=to_allocate_payload(make_cases(200, seed=3).iloc[i * 10: i * 10 + 60]))
+            else:
+                client.post("/signals", json={"signals": [
+                    {"case_id": f"C{k}", "signal_type": "PROMISE_TO_PAY", "weight": 4.0} for k in range(i, 200, 7)
+                ]})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    total = sum(_loads(client).values())
+    assert total <= 350 and len(store) == 200
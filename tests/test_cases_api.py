@@ -0,0 +1,74 @@
+import pytest
+
+from tests.conftest import make_cases, to_allocate_payload
+
+
+@pytest.fixture
+def portfolio(client):
+    df = make_cases(230, seed=9)
+    # Repeated priorities exercise the case_id tie-break of the cursor
+    df.loc[:40, ["annual_inc", "dti", "revol_util", "int_rate", "loan_amnt"]] = [60000, 15, 40, 10, 5000]
+    df.loc[:40, ["home_ownership_RENT", "home_ownership_OWN", "emp_length_10+ years"]] = 0
+    return client.post("/allocate", json=to_allocate_payload(df)).json(), df
+
+
+def _pages(client, **params):
+    pages, cursor = [], None
+    while True:
+        body = client.get("/cases", params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        pages.append(body["cases"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_cover_every_case_once_in_priority_order(client, portfolio):
+    rows, _ = portfolio
+    pages = _pages(client, limit=50)
+    cases = [c for page in pages for c in page]
+
+    assert [len(p) for p in pages] == [50, 50, 50, 50, 30]
+    expected = sorted(rows, key=lambda r: (-r["final_priority_score"], r["case_id"]))
+    assert [c["case_id"] for c in cases] == [r["case_id"] for r in expected]
+    # Features are returned with the scores
+    assert "loan_amnt" in cases[0] and "assigned_dca" in cases[0]
+
+
+def test_filters_apply_before_pagination(client, portfolio):
+    rows, _ = portfolio
+    dcas = ["DCA_TOP", "DCA_BULK"]
+    cases = [c for page in _pages(client, limit=7, assigned_dca=dcas) for c in page]
+    assert sorted(c["case_id"] for c in cases) == sorted(r["case_id"] for r in rows if r["assigned_dca"] in dcas)
+
+    action = rows[0]["action_type"]
+    cases = [c for page in _pages(client, limit=1000, action_type=[action]) for c in page]
+    assert {c["action_type"] for c in cases} == {action}
+
+
+def test_invalid_cursor_and_limit(client, portfolio):
+    assert client.get("/cases", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/cases", params={"limit": 0}).status_code == 422
+    assert client.get("/cases", params={"limit": 100_000}).status_code == 422
+
+
+def test_kpis_match_the_cases(client, portfolio):
+    rows, df = portfolio
+    exposure = dict(zip(df["case_id"], df["loan_amnt"]))
+    kpis = client.get("/cases/kpis").json()
+
+    assert kpis["n_cases"] == len(rows)
+    assert kpis["exposure"] == pytest.approx(sum(exposure.values()))
+    assert kpis["mean_score"] == pytest.approx(sum(r["final_priority_score"] for r in rows) / len(rows))
+    assert kpis["escalations"] == sum(r["action_type"] == "IMMEDIATE_ESCALATION" for r in rows)
+    for dca, stats in kpis["by_dca"].items():
+        mine = [r for r in rows if r["assigned_dca"] == dca]
+        assert stats["cases"] == len(mine)
+        assert stats["exposure"] == pytest.approx(sum(exposure[r["case_id"]] for r in mine))
+
+    filtered = client.get("/cases/kpis", params={"assigned_dca": "DCA_TOP"}).json()
+    assert filtered["n_cases"] == kpis["by_dca"].get("DCA_TOP", {"cases": 0})["cases"]
+
+
+def test_empty_store(client):
+    assert client.get("/cases").json() == {"cases": [], "next_cursor": None}
+    assert client.get("/cases/kpis").json()["n_cases"] == 0
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from tests.conftest import make_cases, to_allocate_payload
+
+SIGNALS = {"C1": [("PAYMENT", 2.0)], "C4": [("BROKEN_PROMISE", -1.5), ("CONTACT", 0.5)]}
+
+
+def _columnar_payload(df, **options):
+    return {
+        "case_ids": df["case_id"].tolist(),
+        "features": {c: df[c].tolist() for c in df.columns if c != "case_id"},
+        "signals": [
+            {"case_id": cid, "signal_type": n, "weight": w} for cid, events in SIGNALS.items() for n, w in events
+        ],
+        **options,
+    }
+
+
+@pytest.mark.parametrize("sop_mode", ["inline", "reference"])
+def test_columnar_matches_allocate(client, reset, sop_mode):
+    df = make_cases(60, seed=2)
+    rows = client.post("/allocate", json=to_allocate_payload(df, SIGNALS, sop_mode=sop_mode)).json()
+    if sop_mode == "reference":
+        templates, rows = rows["sop_templates"], rows["cases"]
+
+    reset()
+    columns = client.post("/allocate/columnar", json=_columnar_payload(df, sop_mode=sop_mode)).json()
+
+    assert columns["case_id"] == [r["case_id"] for r in rows]
+    for field in rows[0]:
+        expected = [r[field] for r in rows]
+        if isinstance(expected[0], float):
+            expected = pytest.approx(expected)
+        assert columns[field] == expected, field
+    if sop_mode == "reference":
+        assert columns["sop_templates"] == templates
+        assert "sop_steps" not in columns
+    else:
+        assert "sop_templates" not in columns
+
+
+def test_columnar_missing_values_and_dtypes(client):
+    df = make_cases(5)
+    payload = _columnar_payload(df, dtypes={"loan_amnt": "int64", "home_ownership_RENT": "int8"})
+    payload["features"]["dti"][0] = None
+    payload["features"]["loan_amnt"][1] = None
+
+    response = client.post("/allocate/columnar", json=payload)
+    assert response.status_code == 200
+    assert np.isfinite(response.json()["final_priority_score"]).all()
+
+
+def test_columnar_rejects_ragged_columns(client):
+    payload = _columnar_payload(make_cases(3))
+    payload["features"]["dti"] = payload["features"]["dti"][:2]
+    assert client.post("/allocate/columnar", json=payload).status_code == 422
+
+
+def test_columnar_empty_batch(client):
+    response = client.post("/allocate/columnar", json={"case_ids": []})
+    assert response.status_code == 200
+    assert response.json()["case_id"] == []
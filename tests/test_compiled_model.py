@@ -0,0 +1,134 @@
+import os
+import shutil
+import subprocess
+import sys
+import warnings
+
+import joblib
+import numpy as np
+import pytest
+
+import pandas as pd
+
+from engines.compiled_model import CompiledModel, _check_rows, export
+from engines.model_registry import COMPILED_MODEL_PATH, FEATURES_PATH, IMPUTATION_PATH, MODEL_PATH, ModelRegistry
+from tests.conftest import load_demo_cases, make_cases, raw_dense
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    for path in (MODEL_PATH, FEATURES_PATH, IMPUTATION_PATH, COMPILED_MODEL_PATH):
+        shutil.copy(path, tmp_path / os.path.basename(path))
+    return tmp_path
+
+
+def _registry(model_dir) -> ModelRegistry:
+    return ModelRegistry(
+        model_path=str(model_dir / "recovery_model.pkl"),
+        features_path=str(model_dir / "model_features.pkl"),
+        imputation_path=str(model_dir / "imputation_values.pkl"),
+        compiled_path=str(model_dir / "recovery_model.npz"),
+    )
+
+
+def _pickles():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return joblib.load(MODEL_PATH), list(joblib.load(FEATURES_PATH))
+
+
+def _predict_proba(model, X: np.ndarray) -> np.ndarray:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return model.predict_proba(X)
+
+
+def test_compiled_matches_predict_proba():
+    model, features = _pickles()
+    compiled = CompiledModel.load(COMPILED_MODEL_PATH)
+    X = _check_rows(features, 2_000, seed=7)
+    np.testing.assert_allclose(compiled.predict_proba(X), _predict_proba(model, X), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("cases", ["demo", "random"])
+def test_encoded_scoring_matches_predict_proba_on_sent_columns(cases):
+    # Reference input is built from the payload columns, not from the encoding under test;
+    # the demo rows include cases with several home_ownership flags set
+    model, features = _pickles()
+    compiled = CompiledModel.load(COMPILED_MODEL_PATH)
+    df = load_demo_cases() if cases == "demo" else make_cases(300, seed=4)
+    df.loc[::7, "dti"] = np.nan
+    expected = _predict_proba(model, raw_dense(df, features, compiled.imputation))
+
+    fm = compiled.schema.encode(df)
+    # float32 numeric inputs: well below any score resolution
+    np.testing.assert_allclose(compiled.predict_proba_encoded(fm), expected, rtol=0, atol=1e-6)
+    # The pickled-model path reads the dense expansion
+    np.testing.assert_allclose(_predict_proba(model, fm.dense()), expected, rtol=0, atol=1e-6)
+
+
+def test_raw_categories_score_like_their_one_hot_columns():
+    model, features = _pickles()
+    compiled = CompiledModel.load(COMPILED_MODEL_PATH)
+    raw = make_cases(6, seed=2).drop(columns=["home_ownership_RENT", "home_ownership_OWN", "emp_length_10+ years"])
+    raw["home_ownership"] = ["RENT", "OWN", "MORTGAGE", "ANY", "RENT", "OTHER"]
+    raw["emp_length"] = ["10+ years", "1 year", "< 1 year", "3 years", "10+ years", "9 years"]
+    raw["term"] = [" 60 months", " 36 months"] * 3
+
+    one_hot = pd.concat([raw, pd.get_dummies(raw[["home_ownership", "emp_length", "term"]], dtype=float)], axis=1)
+    expected = _predict_proba(model, raw_dense(one_hot, features, compiled.imputation))
+    np.testing.assert_allclose(compiled.predict_proba_encoded(compiled.schema.encode(raw)), expected,
+                               rtol=0, atol=1e-6)
+
+
+def test_shipped_export_is_current(model_dir):
+    bundle = _registry(model_dir).get()
+    assert isinstance(bundle.model, CompiledModel)
+
+
+def test_stale_export_falls_back_to_pickles(model_dir):
+    # Retrained model without a re-export: the digest no longer matches
+    with open(model_dir / "imputation_values.pkl", "ab") as f:
+        f.write(b"\0")
+    bundle = _registry(model_dir).get()
+    assert bundle is not None and not isinstance(bundle.model, CompiledModel)
+    assert bundle.schema.group_names == ["term", "emp_length", "home_ownership"]
+
+
+def test_unreadable_export_falls_back_to_pickles(model_dir):
+    (model_dir / "recovery_model.npz").write_bytes(b"not an npz")
+    bundle = _registry(model_dir).get()
+    assert bundle is not None and not isinstance(bundle.model, CompiledModel)
+
+
+def test_export_round_trip(tmp_path):
+    output = str(tmp_path / "out.npz")
+    report = export(output)
+    assert report["max_abs_error"] <= 1e-6 and report["groups"] == 3
+
+    exported, shipped = CompiledModel.load(output), CompiledModel.load(COMPILED_MODEL_PATH)
+    assert exported.digest == shipped.digest
+    np.testing.assert_array_equal(exported.coef_, shipped.coef_)
+
+
+def test_export_refuses_non_linear_models():
+    with pytest.raises(ValueError):
+        CompiledModel.from_estimator(object(), ["a"])
+
+
+def test_serving_never_imports_sklearn():
+    code = (
+        "import sys\n"
+        "from tests.conftest import make_cases\n"
+        "from services.scoring_service import compute_scores\n"
+        "from engines.model_registry import MODEL_REGISTRY\n"
+        "from engines.compiled_model import CompiledModel\n"
+        "assert isinstance(MODEL_REGISTRY.get().model, CompiledModel)\n"
+        "compute_scores(make_cases(50), {'C1': [('CALL_ANSWERED', 1.0)]}, use_cache=False)\n"
+        "print(sorted(m for m in sys.modules if m.split('.')[0] in ('sklearn', 'joblib')))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
@@ -0,0 +1,63 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from engines.feature_schema import CATEGORICAL_FEATURES, HEURISTIC_SCHEMA, FeatureSchema, one_hot_groups
+from engines.model_registry import FEATURES_PATH
+from tests.conftest import load_demo_cases
+
+
+def test_model_features_split_into_numeric_and_groups():
+    features = list(joblib.load(FEATURES_PATH))
+    schema = FeatureSchema(features)
+    assert schema.numeric == ["loan_amnt", "int_rate", "annual_inc", "dti", "revol_util", "total_acc", "mort_acc"]
+    assert schema.group_names == ["term", "emp_length", "home_ownership"]
+    # Baseline categories (dropped at training time) have no column
+    assert [value for value, _ in schema.groups["home_ownership"]] == ["MORTGAGE", "NONE", "OTHER", "OWN", "RENT"]
+    assert schema.groups["term"] == [(" 60 months", "term_ 60 months")]
+
+
+def test_groups_only_come_from_declared_categories():
+    # Prefix guessing would have grouped these as "num_..." / "pub_rec_..." categories
+    features = ["num_accts", "num_bankcards", "pub_rec_bankruptcies", "home_ownership_OWN", "home_ownership_RENT"]
+    schema = FeatureSchema(features)
+    assert schema.numeric == ["num_accts", "num_bankcards", "pub_rec_bankruptcies"]
+    assert schema.group_names == ["home_ownership"]
+    assert one_hot_groups(features, {}) == {}
+    assert set(one_hot_groups(features)) <= set(CATEGORICAL_FEATURES)
+
+
+def test_every_sent_flag_is_kept():
+    df = load_demo_cases()
+    fm = HEURISTIC_SCHEMA.encode(df)
+    for name in ("home_ownership_OWN", "home_ownership_RENT", "emp_length_10+ years"):
+        np.testing.assert_array_equal(fm.flag(name), df[name].to_numpy() == 1)
+    both = (df["home_ownership_OWN"] == 1) & (df["home_ownership_RENT"] == 1)
+    assert both.sum() > 0
+
+
+def test_raw_categories_set_their_flag():
+    features = list(joblib.load(FEATURES_PATH))
+    raw = pd.DataFrame({"home_ownership": ["RENT", " own ", "OWN", "ANY", None], "term": [" 60 months"] * 5})
+    fm = FeatureSchema(features).encode(raw)
+
+    np.testing.assert_array_equal(fm.flag("home_ownership_RENT"), [1, 0, 0, 0, 0])
+    # Category values are matched exactly (after stripping spaces); baseline / unknown set nothing
+    np.testing.assert_array_equal(fm.flag("home_ownership_OWN"), [0, 0, 1, 0, 0])
+    assert fm.flags[3:].sum() == 2 and fm.flag("term_ 60 months").all()
+
+
+def test_threshold_columns_keep_full_precision():
+    df = pd.DataFrame({"annual_inc": [80000.001], "dti": [25.000001], "loan_amnt": [1234.5678]})
+    fm = FeatureSchema(list(joblib.load(FEATURES_PATH))).encode(df)
+    assert fm.column("annual_inc", 0)[0] == 80000.001 and fm.column("dti", 0)[0] == 25.000001
+    # The model inputs stay float32
+    assert fm.numeric.dtype == np.float32
+    assert fm.column("loan_amnt", 0)[0] == np.float32(1234.5678)
+
+
+def test_dense_matches_the_sent_columns():
+    df = load_demo_cases()
+    features = ["annual_inc", "dti", "home_ownership_OWN", "home_ownership_RENT", "emp_length_10+ years"]
+    dense = FeatureSchema(features).encode(df).dense()
+    np.testing.assert_allclose(dense, df[features].to_numpy(dtype=np.float32))
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engines.graph_engine import DAMPING, build_case_graph, compute_case_rank
+
+
+def _signals(case_ids, seed=0, per_case=3):
+    rng = np.random.default_rng(seed)
+    types = ["PAYMENT", "BROKEN_PROMISE", "DISPUTE", "CONTACT"]
+    return {
+        cid: [(types[t], float(w)) for t, w in zip(rng.integers(0, 4, k), rng.uniform(-2, 2, k))]
+        for cid, k in zip(case_ids, rng.integers(0, per_case + 1, len(case_ids)))
+    }
+
+
+def _dense_propagate(case_ids, signals, counterparty=None, damping=DAMPING, iters=500):
+    """Reference: explicit case-case matrix, one link per shared signal type / counterparty."""
+    n = len(case_ids)
+    momentum = np.array([sum(w for _, w in signals.get(c, [])) for c in case_ids])
+    types = [{name for name, _ in signals.get(c, [])} for c in case_ids]
+
+    A = np.zeros((n, n))
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                A[i, j] = len(types[i] & types[j])
+                if counterparty is not None and counterparty[i] == counterparty[j]:
+                    A[i, j] += 1
+    degree = A.sum(axis=1)
+
+    r = momentum.copy()
+    for _ in range(iters):
+        spread = np.where(degree > 0, A @ r / np.where(degree > 0, degree, 1), r)
+        r = (1 - damping) * momentum + damping * spread
+    return r
+
+
+def test_sum_mode_matches_summed_weights():
+    case_ids = [f"C{i}" for i in range(30)]
+    signals = _signals(case_ids)
+    signals["UNKNOWN"] = [("PAYMENT", 5.0)]
+
+    rank = compute_case_rank(build_case_graph(pd.DataFrame({"case_id": case_ids}), signals))
+    assert set(rank) == set(case_ids)
+    for cid in case_ids:
+        assert rank[cid] == pytest.approx(sum(w for _, w in signals.get(cid, [])))
+
+
+def test_signals_with_timestamps_are_accepted():
+    df = pd.DataFrame({"case_id": ["A"]})
+    rank = compute_case_rank(build_case_graph(df, {"A": [("PAYMENT", 1.5, 1_700_000_000.0), ("CONTACT", 0.5)]}))
+    assert rank["A"] == pytest.approx(2.0)
+
+
+def test_propagate_matches_dense_reference():
+    case_ids = [f"C{i}" for i in range(25)]
+    signals = _signals(case_ids, seed=1)
+    rank = compute_case_rank(build_case_graph(pd.DataFrame({"case_id": case_ids}), signals), mode="propagate")
+    np.testing.assert_allclose([rank[c] for c in case_ids], _dense_propagate(case_ids, signals), atol=1e-6)
+
+
+def test_propagate_links_counterparties():
+    case_ids = [f"C{i}" for i in range(12)]
+    counterparty = [f"P{i % 3}" for i in range(12)]
+    signals = _signals(case_ids, seed=2, per_case=1)
+    df = pd.DataFrame({"case_id": case_ids, "counterparty_id": counterparty})
+
+    rank = compute_case_rank(build_case_graph(df, signals), mode="propagate")
+    expected = _dense_propagate(case_ids, signals, counterparty)
+    np.testing.assert_allclose([rank[c] for c in case_ids], expected, atol=1e-6)
+
+
+def test_isolated_cases_keep_their_momentum():
+    df = pd.DataFrame({"case_id": ["A", "B"]})
+    rank = compute_case_rank(build_case_graph(df, {"A": [("PAYMENT", 2.0)], "B": [("DISPUTE", -1.0)]}),
+                             mode="propagate")
+    assert rank == pytest.approx({"A": 2.0, "B": -1.0})
+
+
+def test_unknown_mode_raises():
+    G = build_case_graph(pd.DataFrame({"case_id": ["A"]}), {})
+    with pytest.raises(ValueError):
+        compute_case_rank(G, mode="bogus")
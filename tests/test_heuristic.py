@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engines.ml_engine import financial_risk_heuristic, financial_risk_heuristic_row
+from tests.conftest import load_demo_cases, make_cases
+
+
+def _row_scores(df: pd.DataFrame) -> np.ndarray:
+    return np.array([financial_risk_heuristic_row(row) for _, row in df.iterrows()])
+
+
+def test_matches_row_rules_on_random_cases():
+    df = make_cases(500, seed=3)
+    np.testing.assert_allclose(financial_risk_heuristic(df), _row_scores(df), rtol=0, atol=1e-12)
+
+
+def test_matches_row_rules_on_edge_rows():
+    df = pd.DataFrame({
+        # Exactly on each threshold, either side of it, and missing
+        "annual_inc": [80000, 80000.5, 30000, 29999.5, np.nan, 0, 1e9],
+        "dti": [25, 25.5, 12, 11.5, np.nan, 0, 200],
+        "revol_util": [70, 70.5, 30, 29.5, np.nan, 0, 150],
+        "int_rate": [15, 15.5, 10, 5, np.nan, 0, 40],
+        "home_ownership_OWN": [1, 0, 0, 1, np.nan, 0, 1],
+        "home_ownership_RENT": [0, 1, 0, 0, np.nan, 2, 0],
+        "emp_length_10+ years": [1, 1, 0, 0, np.nan, 0, 1],
+    })
+    np.testing.assert_allclose(financial_risk_heuristic(df), _row_scores(df), rtol=0, atol=1e-12)
+
+
+def test_matches_row_rules_on_demo_cases():
+    # Several rows send both home_ownership_OWN and home_ownership_RENT
+    df = load_demo_cases()
+    np.testing.assert_allclose(financial_risk_heuristic(df), _row_scores(df), rtol=0, atol=1e-12)
+
+
+def test_matches_row_rules_just_above_thresholds():
+    # Each value rounds onto its threshold in float32
+    df = pd.DataFrame({
+        "annual_inc": [80000.001, 29999.999], "dti": [25.000001, 11.999999],
+        "revol_util": [70.000001, 29.999999], "int_rate": [15.0000001, 15.0],
+    })
+    expected = _row_scores(df)
+    np.testing.assert_allclose(financial_risk_heuristic(df), expected, rtol=0, atol=1e-12)
+    assert expected[0] == pytest.approx(0.5)
+
+
+@pytest.mark.parametrize("missing", ["annual_inc", "dti", "revol_util", "int_rate", "home_ownership_OWN"])
+def test_missing_columns_use_row_defaults(missing):
+    df = make_cases(50, seed=4).drop(columns=[missing])
+    np.testing.assert_allclose(financial_risk_heuristic(df), _row_scores(df), rtol=0, atol=1e-12)
+
+
+def test_scores_are_clipped():
+    best = pd.DataFrame({"annual_inc": [1e6], "dti": [1], "revol_util": [1], "home_ownership_OWN": [1],
+                         "emp_length_10+ years": [1], "int_rate": [1]})
+    worst = pd.DataFrame({"annual_inc": [1], "dti": [99], "revol_util": [99], "home_ownership_RENT": [1],
+                          "int_rate": [30]})
+    assert financial_risk_heuristic(best)[0] == pytest.approx(0.99)
+    assert financial_risk_heuristic(worst)[0] == pytest.approx(0.25)
@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+
+import pytest
+
+import app.jobs
+import app.routes
+from app.jobs import CANCELLED, FINISHED, SUCCEEDED, JobManager, JobQueueFull
+from tests.conftest import make_cases, to_allocate_payload
+
+
+@pytest.fixture
+def manager(monkeypatch, tmp_path):
+    """Job manager with small chunks and one worker, swapped in for the API."""
+    jobs = JobManager(workers=1, max_pending=1, directory=str(tmp_path), chunk_size=40)
+    monkeypatch.setattr(app.routes, "JOB_MANAGER", jobs)
+    yield jobs
+    jobs.shutdown()
+
+
+@pytest.fixture
+def blocked(monkeypatch):
+    """Holds every job in its first chunk until the event is set."""
+    release = threading.Event()
+    allocate = app.jobs.allocate_and_store
+
+    def slow(*args, **kwargs):
+        release.wait(10)
+        return allocate(*args, **kwargs)
+
+    monkeypatch.setattr(app.jobs, "allocate_and_store", slow)
+    yield release
+    release.set()
+
+
+def _wait(client, job_id: str, timeout: float = 10.0) -> dict:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(f"/allocate/jobs/{job_id}").json()
+        if status["status"] in FINISHED:
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_results_match_allocate(client, manager, reset):
+    df = make_cases(150, seed=3)
+    payload = to_allocate_payload(df, {"C1": [("BROKEN_PROMISE", 1.0)]})
+
+    submitted = client.post("/allocate/jobs", json=payload)
+    assert submitted.status_code == 202
+    status = _wait(client, submitted.json()["job_id"])
+    assert status["status"] == SUCCEEDED
+    assert status["processed"] == 150 and status["progress"] == 1.0
+
+    results = client.get(status["results_url"])
+    assert results.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in results.text.splitlines()]
+
+    # Chunking does not change any score: same cases and priorities as one /allocate on fresh capacity
+    reset()
+    expected = client.post("/allocate", json=payload).json()
+    assert sorted(r["case_id"] for r in rows) == sorted(r["case_id"] for r in expected)
+    by_id = {r["case_id"]: r for r in expected}
+    for row in rows:
+        assert row["final_priority_score"] == pytest.approx(by_id[row["case_id"]]["final_priority_score"])
+
+
+def test_queue_full_and_cancel_queued(client, manager, blocked):
+    payload = to_allocate_payload(make_cases(10, seed=1))
+
+    running = client.post("/allocate/jobs", json=payload).json()
+    deadline = time.time() + 5
+    while client.get(f"/allocate/jobs/{running['job_id']}").json()["status"] != "running":
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+    queued = client.post("/allocate/jobs", json=payload).json()
+    assert queued["status"] == "queued"
+    assert client.post("/allocate/jobs", json=payload).status_code == 429
+
+    cancelled = client.post(f"/allocate/jobs/{queued['job_id']}/cancel").json()
+    assert cancelled["status"] == CANCELLED and cancelled["processed"] == 0
+    # Results of a job that never ran are not available
+    assert client.get(f"/allocate/jobs/{queued['job_id']}/results").status_code == 409
+
+    blocked.set()
+    assert _wait(client, running["job_id"])["status"] == SUCCEEDED
+
+
+def test_cancel_running_job_keeps_committed_chunks(client, manager, blocked):
+    payload = to_allocate_payload(make_cases(200, seed=2))
+    job_id = client.post("/allocate/jobs", json=payload).json()["job_id"]
+    while client.get(f"/allocate/jobs/{job_id}").json()["status"] != "running":
+        time.sleep(0.01)
+
+    client.post(f"/allocate/jobs/{job_id}/cancel")
+    blocked.set()
+    status = _wait(client, job_id)
+
+    # The chunk in flight completes, the rest is skipped
+    assert status["status"] == CANCELLED
+    assert status["processed"] == manager.chunk_size
+    rows = client.get(status["results_url"]).text.splitlines()
+    assert len(rows) == manager.chunk_size
+
+
+def test_unknown_job(client, manager):
+    assert client.get("/allocate/jobs/missing").status_code == 404
+    assert client.get("/allocate/jobs/missing/results").status_code == 404
+    assert client.post("/allocate/jobs/missing/cancel").status_code == 404
+
+
+def test_manager_rejects_past_max_pending(tmp_path, blocked):
+    jobs = JobManager(workers=1, max_pending=0, directory=str(tmp_path))
+    try:
+        with pytest.raises(JobQueueFull):
+            jobs.submit(make_cases(5), {})
+    finally:
+        jobs.shutdown()
@@ -0,0 +1,60 @@
+import re
+import time
+
+import pytest
+
+import app.routes
+from services.metrics import Histogram, STAGE_SECONDS, stage_timer
+from tests.conftest import make_cases, to_allocate_payload
+
+
+def _sample(text: str, name: str) -> float:
+    match = re.search(rf"^{re.escape(name)} (\S+)$", text, re.M)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("x_seconds", "test", buckets=(1, 2))
+    for v in (0.5, 1.5, 1.5, 3):
+        h.observe(v, stage="a")
+    lines = h.render()
+    assert 'x_seconds_bucket{stage="a",le="1.0"} 1' in lines
+    assert 'x_seconds_bucket{stage="a",le="2.0"} 3' in lines
+    assert 'x_seconds_bucket{stage="a",le="+Inf"} 4' in lines
+    assert 'x_seconds_count{stage="a"} 4' in lines
+    assert 'x_seconds_sum{stage="a"} 6.5' in lines
+
+
+def test_stage_timer_records_on_error():
+    before = STAGE_SECONDS._series.get((("stage", "test_error"),), [0])[-1]
+    with pytest.raises(RuntimeError):
+        with stage_timer("test_error"):
+            raise RuntimeError
+    assert STAGE_SECONDS._series[(("stage", "test_error"),)][-1] == before + 1
+
+
+def test_metrics_exposes_stages_loads_and_cache(client):
+    client.post("/allocate", json=to_allocate_payload(make_cases(10)))
+    text = client.get("/metrics").text
+
+    for stage in ("parse", "ml_scoring", "graph", "priority", "allocation", "serialize"):
+        assert _sample(text, f'dca_stage_duration_seconds_count{{stage="{stage}"}}') >= 1, stage
+    assert sum(_sample(text, f'dca_current_load{{dca_id="{d}"}}') for d in ("DCA_TOP", "DCA_STANDARD", "DCA_BULK")) == 10
+    assert _sample(text, "dca_score_cache_misses_total") >= 10
+
+
+@pytest.mark.parametrize("sop_mode", ["inline", "reference"])
+def test_serialize_stage_includes_response_validation_and_encoding(client, monkeypatch, sop_mode):
+    render = app.routes.render_model
+
+    def slow_render(adapter, obj):
+        time.sleep(0.05)
+        return render(adapter, obj)
+
+    monkeypatch.setattr(app.routes, "render_model", slow_render)
+    name = 'dca_stage_duration_seconds_sum{stage="serialize"}'
+    before = _sample(client.get("/metrics").text, name)
+
+    response = client.post("/allocate", json=to_allocate_payload(make_cases(5), sop_mode=sop_mode))
+    assert response.status_code == 200
+    assert _sample(client.get("/metrics").text, name) - before >= 0.05
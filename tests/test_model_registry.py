@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engines import ml_engine
+from engines.model_registry import FEATURES_PATH, IMPUTATION_PATH, MODEL_PATH, ModelRegistry
+from tests.conftest import make_cases
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    for path in (MODEL_PATH, FEATURES_PATH, IMPUTATION_PATH):
+        shutil.copy(path, tmp_path / os.path.basename(path))
+    return tmp_path
+
+
+def _registry(model_dir, **paths) -> ModelRegistry:
+    kwargs = {
+        "model_path": str(model_dir / "recovery_model.pkl"),
+        "features_path": str(model_dir / "model_features.pkl"),
+        "imputation_path": str(model_dir / "imputation_values.pkl"),
+        # Pickles only: the compiled export has its own tests
+        "compiled_path": str(model_dir / "missing.npz"),
+    }
+    kwargs.update(paths)
+    return ModelRegistry(**kwargs)
+
+
+def test_model_is_loaded_once(model_dir):
+    registry = _registry(model_dir)
+    bundle = registry.get()
+    assert bundle is not None
+    assert registry.get() is bundle
+
+
+def test_model_is_reloaded_when_a_file_changes(model_dir):
+    registry = _registry(model_dir)
+    bundle = registry.get()
+
+    features = model_dir / "model_features.pkl"
+    st = os.stat(features)
+    os.utime(features, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    reloaded = registry.get()
+    assert reloaded is not bundle
+    assert reloaded.features == bundle.features
+
+
+def test_missing_model_returns_none(model_dir):
+    registry = _registry(model_dir, model_path=str(model_dir / "nope.pkl"))
+    assert registry.get() is None
+
+
+def test_imputation_keys_are_mapped_to_features(model_dir):
+    bundle = _registry(model_dir).get()
+    assert set(bundle.imputation) <= set(bundle.features)
+    assert "revol_util" in bundle.imputation
+
+
+def test_batch_scoring_matches_single_case_scoring():
+    df = make_cases(40, seed=1)
+    df.loc[::5, "dti"] = np.nan
+
+    batch = ml_engine.predict_recovery_probability(df)["recovery_probability"].to_numpy()
+    single = np.array([
+        ml_engine.predict_recovery_probability(df.iloc[[i]])["recovery_probability"].iloc[0]
+        for i in range(len(df))
+    ])
+    np.testing.assert_allclose(batch, single, rtol=0, atol=1e-12)
+
+
+def test_scoring_falls_back_to_heuristic_without_model(monkeypatch):
+    monkeypatch.setattr(ml_engine.MODEL_REGISTRY, "get", lambda: None)
+    df = make_cases(10)
+    scored = ml_engine.predict_recovery_probability(df)
+    np.testing.assert_allclose(scored["recovery_probability"], ml_engine.financial_risk_heuristic(df))
+    assert isinstance(scored, pd.DataFrame) and len(scored) == 10
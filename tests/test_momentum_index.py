@@ -0,0 +1,86 @@
+import threading
+
+import numpy as np
+import pytest
+
+from engines.momentum_index import DAY, MomentumIndex
+
+
+def _replay(events, half_lives, now):
+    """Reference: decay every event individually from its own timestamp."""
+    return sum(w * (1.0 if half_lives.get(t) is None else 0.5 ** ((now - ts) / half_lives[t])) for t, w, ts in events)
+
+
+def test_value_halves_after_one_half_life():
+    index = MomentumIndex({"PAYMENT": DAY})
+    index.add("A", "PAYMENT", 4.0, timestamp=0.0)
+    assert index.value("A", now=0.0) == pytest.approx(4.0)
+    assert index.value("A", now=DAY) == pytest.approx(2.0)
+    assert index.value("A", now=3 * DAY) == pytest.approx(0.5)
+
+
+def test_accumulators_match_full_replay():
+    half_lives = {"PAYMENT": 2 * DAY, "CALL": 0.5 * DAY, "LEGAL": None}
+    index = MomentumIndex(half_lives, default_half_life=DAY)
+    half_lives_with_default = {**half_lives, "OTHER": DAY}
+    rng = np.random.default_rng(0)
+
+    events = []
+    for _ in range(200):
+        t = str(rng.choice(list(half_lives_with_default)))
+        w, ts = float(rng.uniform(-2, 2)), float(rng.uniform(0, 10 * DAY))
+        # Out of order on purpose: late events are decayed to the accumulator clock
+        index.add("A", t, w, timestamp=ts)
+        events.append((t, w, ts))
+
+    for now in (10 * DAY, 12 * DAY, 30 * DAY):
+        assert index.value("A", now=now) == pytest.approx(_replay(events, half_lives_with_default, now))
+
+
+def test_undecayed_signal_types_never_fade():
+    index = MomentumIndex({"LEGAL": None})
+    index.add("A", "LEGAL", 1.5, timestamp=0.0)
+    assert index.value("A", now=1000 * DAY) == pytest.approx(1.5)
+
+
+def test_replace_and_reset():
+    index, other = MomentumIndex(), MomentumIndex()
+    index.add_events("A", [("PAYMENT", 1.0)], default_timestamp=0.0)
+    index.add_events("B", [("PAYMENT", 1.0)], default_timestamp=0.0)
+    other.add_events("A", [("PAYMENT", 3.0, 0.0)])
+
+    index.replace(["A", "B"], other)
+    assert index.value("A", now=0.0) == pytest.approx(3.0)
+    assert "B" not in index
+
+    index.reset(["A"])
+    assert index.values(["A", "unknown"], now=0.0).tolist() == [0.0, 0.0]
+
+
+def test_concurrent_adds_are_not_lost():
+    index = MomentumIndex({"PAYMENT": None})
+
+    def add():
+        for _ in range(1000):
+            index.add("A", "PAYMENT", 1.0, timestamp=0.0)
+
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert index.value("A", now=0.0) == 8000.0
+
+
+def test_signal_deltas_use_decayed_momentum(client):
+    payload = {
+        "cases": [{"case_id": "A", "features": {"annual_inc": 60000}}],
+        "signals": [{"case_id": "A", "signal_type": "PAYMENT", "weight": 2.0, "timestamp": "2000-01-01T00:00:00Z"}],
+    }
+    stale = client.post("/allocate", json=payload).json()[0]["graph_score"]
+
+    fresh = client.post("/signals", json={"signals": [{"case_id": "A", "signal_type": "PAYMENT", "weight": 2.0}]})
+    assert fresh.status_code == 200
+    # A 2000-era event has fully decayed; the new one counts at full weight
+    assert stale == pytest.approx(0.0, abs=1e-9)
+    assert fresh.json()[0]["graph_score"] > stale
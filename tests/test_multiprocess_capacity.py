@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+
+from services.sqlite_ledger import SQLiteCapacityLedger
+from tests.conftest import PROFILES
+
+# One worker process: overlapping batches of the same 400 cases, allocated through the shared SQLite ledger
+_WORKER = """
+import json, sys
+import numpy as np
+import pandas as pd
+from services.allocation_service import DCA_LEDGER, allocate_cases_with_state
+
+profiles, seed, rounds, size = json.loads(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+DCA_LEDGER.load(profiles)
+rng = np.random.default_rng(seed)
+for _ in range(rounds):
+    ids = [f"C{i}" for i in rng.choice(400, size, replace=False)]
+    allocate_cases_with_state(pd.DataFrame({"case_id": ids, "final_priority_score": rng.uniform(0, 1, len(ids))}))
+"""
+
+
+def _run_workers(db_path, n_workers: int, rounds: int = 15, size: int = 150):
+    env = dict(os.environ, PYTHONPATH=os.getcwd(), DCA_STATE_DIR="", DCA_CAPACITY_BACKEND="sqlite",
+               DCA_CAPACITY_DB=str(db_path))
+    procs = [
+        subprocess.Popen([sys.executable, "-c", _WORKER, json.dumps(PROFILES), str(seed), str(rounds), str(size)], env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        for seed in range(n_workers)
+    ]
+    for p in procs:
+        _, err = p.communicate(timeout=120)
+        assert p.returncode == 0, err
+
+
+def test_workers_share_capacity_and_assignments(tmp_path):
+    db = tmp_path / "capacity.db"
+    ledger = SQLiteCapacityLedger(str(db))
+    ledger.load(PROFILES, restore=False)
+
+    _run_workers(db, n_workers=4)
+
+    held = ledger.held([f"C{i}" for i in range(400)])
+    loads = {a["dca_id"]: a["current_load"] for a in ledger.snapshot()}
+    # Every slot in use belongs to exactly one case, whichever worker allocated it last
+    assert loads == {p["dca_id"]: sum(h == p["dca_id"] for h in held) for p in PROFILES}
+    assert all(loads[p["dca_id"]] <= p["max_capacity"] for p in PROFILES)
+    ledger.close()
+
+
+def test_repost_on_another_worker_does_not_double_count(tmp_path):
+    db = tmp_path / "capacity.db"
+    ledger = SQLiteCapacityLedger(str(db))
+    ledger.load(PROFILES, restore=False)
+
+    # One batch of 60 cases, well below total capacity
+    _run_workers(db, n_workers=1, rounds=1, size=60)
+    first = {a["dca_id"]: a["current_load"] for a in ledger.snapshot()}
+    assert sum(first.values()) == 60
+    # The same batch again from a different process
+    _run_workers(db, n_workers=1, rounds=1, size=60)
+    assert {a["dca_id"]: a["current_load"] for a in ledger.snapshot()} == first
+    ledger.close()
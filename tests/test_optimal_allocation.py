@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from services.allocation_service import plan_allocation
+from services.optimal_allocation import allocation_objective, plan_optimal_allocation
+from tests.conftest import make_cases, to_allocate_payload
+
+
+def _sorted_optimum(priorities, scores, remaining) -> float:
+    """Value x score is a product, so the optimum pairs the highest priorities with the best agencies."""
+    slots = np.repeat(np.sort(scores)[::-1], np.maximum(remaining, 0)[np.argsort(-scores, kind="stable")])
+    top = np.sort(priorities)[::-1][: len(slots)]
+    return float(np.sum(top * slots[: len(top)]))
+
+
+@pytest.mark.parametrize("seed", range(15))
+def test_optimal_respects_capacity_and_beats_greedy(seed):
+    rng = np.random.default_rng(seed)
+    n, m = int(rng.integers(1, 300)), int(rng.integers(1, 5))
+    # Few distinct priorities: one bucket per value, so the solve is exact
+    priorities = np.round(rng.uniform(0, 1, n), 2)
+    scores = rng.uniform(0.3, 0.9, m)
+    remaining = rng.integers(0, 80, m)
+
+    picks, used, objective = plan_optimal_allocation(priorities, scores, remaining)
+
+    assert (used <= remaining).all()
+    np.testing.assert_array_equal(used, np.bincount(picks[picks >= 0], minlength=m))
+    assert objective == pytest.approx(allocation_objective(priorities, scores, picks))
+    assert objective == pytest.approx(_sorted_optimum(priorities, scores, remaining))
+
+    greedy_picks, _ = plan_allocation(-np.sort(-priorities), scores, remaining)
+    assert objective >= allocation_objective(-np.sort(-priorities), scores, greedy_picks) - 1e-9
+
+
+def test_bucketed_solve_stays_close_to_optimum():
+    rng = np.random.default_rng(0)
+    priorities, scores, remaining = rng.uniform(0, 1, 5000), np.array([0.9, 0.7, 0.5]), np.array([500, 1000, 2000])
+    _, used, objective = plan_optimal_allocation(priorities, scores, remaining, n_buckets=64)
+    assert (used <= remaining).all()
+    assert objective == pytest.approx(_sorted_optimum(priorities, scores, remaining), rel=1e-2)
+
+
+def test_empty_inputs():
+    picks, used, objective = plan_optimal_allocation(np.array([]), np.array([0.5]), np.array([2]))
+    assert len(picks) == 0 and used.tolist() == [0] and objective == 0.0
+
+
+def test_optimal_mode_reports_objective_header(client):
+    response = client.post("/allocate", json=to_allocate_payload(make_cases(40), allocation_mode="optimal"))
+    assert response.status_code == 200
+    assert float(response.headers["X-Allocation-Objective"]) > 0
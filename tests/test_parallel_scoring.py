@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from engines.ml_engine import predict_recovery_probability
+from engines.model_registry import MODEL_REGISTRY
+from services import parallel_scoring
+from services.score_cache import SCORE_CACHE
+from services.scoring_service import compute_scores
+from tests.conftest import load_demo_cases, make_cases
+
+
+@pytest.fixture
+def small_shards(monkeypatch):
+    # Several shards over two workers even for a small test batch
+    monkeypatch.setattr(parallel_scoring, "PARALLEL_WORKERS", 2)
+    monkeypatch.setattr(parallel_scoring, "MIN_SHARD_ROWS", 100)
+    yield
+    parallel_scoring.shutdown_pool()
+
+
+def test_parallel_matches_sequential(small_shards):
+    df = make_cases(1000, seed=6)
+    df.loc[::7, "dti"] = np.nan
+
+    expected = predict_recovery_probability(df)["recovery_probability"].to_numpy()
+    bundle = MODEL_REGISTRY.get()
+    parallel = parallel_scoring.parallel_recovery_probability(bundle.schema.encode(df), bundle)
+    np.testing.assert_allclose(parallel, expected, rtol=0, atol=1e-12)
+
+
+def _raw_categorical_cases(n: int):
+    df = make_cases(n, seed=11).drop(columns=["home_ownership_RENT", "home_ownership_OWN", "emp_length_10+ years"])
+    rng = np.random.default_rng(11)
+    df["home_ownership"] = rng.choice(["RENT", "OWN", "MORTGAGE", "ANY"], n)
+    df["emp_length"] = rng.choice(["10+ years", "< 1 year", "3 years", "1 year"], n)
+    df["term"] = rng.choice([" 36 months", " 60 months"], n)
+    return df
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_parallel_matches_sequential_with_raw_categories(small_shards, capsys, use_cache):
+    df = _raw_categorical_cases(600)
+    SCORE_CACHE.clear()
+    parallel = compute_scores(df, {}, parallel=True, use_cache=use_cache)["ml_score"].to_numpy()
+    assert "Parallel scoring failed" not in capsys.readouterr().out
+
+    SCORE_CACHE.clear()
+    sequential = compute_scores(df, {}, parallel=False, use_cache=False)["ml_score"].to_numpy()
+    np.testing.assert_allclose(parallel, sequential, rtol=0, atol=1e-12)
+    # The categories do move the scores (they are not read as missing)
+    assert not np.allclose(sequential, compute_scores(df.drop(columns=["home_ownership", "term"]), {},
+                                                      parallel=False, use_cache=False)["ml_score"])
+
+
+def test_parallel_matches_sequential_on_demo_cases(small_shards, monkeypatch):
+    monkeypatch.setattr(parallel_scoring, "MIN_SHARD_ROWS", 7)
+    df = load_demo_cases()
+    parallel = compute_scores(df, {}, parallel=True, use_cache=False)["ml_score"]
+    sequential = compute_scores(df, {}, parallel=False, use_cache=False)["ml_score"]
+    np.testing.assert_allclose(parallel, sequential, rtol=0, atol=1e-12)
+
+
+def test_compute_scores_parallel_matches_sequential(small_shards, capsys):
+    df = make_cases(500, seed=7)
+    signals = {"C1": [("PAYMENT", 2.0)]}
+    parallel = compute_scores(df, signals, parallel=True, use_cache=False)
+    # No silent fallback to sequential scoring
+    assert "Parallel scoring failed" not in capsys.readouterr().out
+    sequential = compute_scores(df, signals, parallel=False, use_cache=False)
+    np.testing.assert_allclose(parallel["final_priority_score"], sequential["final_priority_score"], atol=1e-12)
+
+
+def test_should_parallelize_threshold(monkeypatch):
+    monkeypatch.setattr(parallel_scoring, "PARALLEL_WORKERS", 4)
+    monkeypatch.setattr(parallel_scoring, "PARALLEL_MIN_BATCH", 1000)
+    assert not parallel_scoring.should_parallelize(999)
+    assert parallel_scoring.should_parallelize(1000)
+    monkeypatch.setattr(parallel_scoring, "PARALLEL_WORKERS", 1)
+    assert not parallel_scoring.should_parallelize(10**9)
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from engines.feature_schema import HEURISTIC_SCHEMA
+from engines.model_registry import MODEL_REGISTRY
+from services.score_cache import GRAPH_CACHE, SCORE_CACHE, GraphCache, ScoreCache, feature_keys
+from services.scoring_service import compute_scores
+from tests.conftest import make_cases
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    SCORE_CACHE.clear()
+    GRAPH_CACHE.clear()
+
+
+def _keys(df):
+    return feature_keys(MODEL_REGISTRY.get().schema.encode(df))
+
+
+def test_second_batch_is_served_from_cache():
+    df = make_cases(300, seed=1)
+    before = SCORE_CACHE.stats()
+    first = compute_scores(df, {})
+    second = compute_scores(df.sample(frac=1, random_state=0), {})
+
+    stats = SCORE_CACHE.stats()
+    assert stats["misses"] - before["misses"] == 300
+    assert stats["hits"] - before["hits"] == 300
+    pd.testing.assert_series_equal(
+        first.set_index("case_id")["ml_score"], second.set_index("case_id")["ml_score"].loc[first["case_id"]],
+    )
+
+
+def test_keys_ignore_case_id_column_order_and_int_float():
+    df = make_cases(20)
+    other = df[df.columns[::-1]].copy()
+    other["case_id"] = [f"X{i}" for i in range(20)]
+    other["loan_amnt"] = other["loan_amnt"].astype(np.int64)
+    np.testing.assert_array_equal(_keys(df), _keys(other))
+
+
+def test_string_categories_get_distinct_keys():
+    df = pd.DataFrame({
+        "case_id": ["A", "B", "C", "D"],
+        "annual_inc": [50000] * 4,
+        "home_ownership": ["RENT", "OWN", "MORTGAGE", "RENT"],
+        "term": [" 60 months", " 36 months", " 60 months", " 60 months"],
+    })
+    keys = _keys(df)
+    assert len(set(keys[:3])) == 3
+    assert keys[0] == keys[3]
+
+
+def test_cached_scores_match_uncached_for_mixed_inputs():
+    df = pd.DataFrame({
+        "case_id": [f"C{i}" for i in range(7)],
+        "annual_inc": [50000, "n/a", "unknown", None, "90000", 20000, 50000],
+        "dti": [10, 30, 30, 12, 5, 40, 10],
+        # C6 differs from C0 only by its category
+        "home_ownership": ["RENT", "OWN", "OWN", "OTHER", "RENT", "weird", "OWN"],
+    })
+    uncached = compute_scores(df, {}, use_cache=False)["ml_score"].to_numpy()
+    assert uncached[0] != uncached[6]
+    # Twice: the second pass is all hits
+    for _ in range(2):
+        np.testing.assert_allclose(compute_scores(df, {})["ml_score"], uncached, rtol=0, atol=1e-12)
+
+
+def test_heuristic_keys_depend_on_which_columns_were_sent():
+    with_column = pd.DataFrame({"case_id": ["A"], "dti": [np.nan]})
+    without = pd.DataFrame({"case_id": ["A"]})
+    assert feature_keys(HEURISTIC_SCHEMA.encode(with_column))[0] != feature_keys(HEURISTIC_SCHEMA.encode(without))[0]
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    monkeypatch.setattr("services.score_cache.MERGE_MIN", 1)
+    cache = ScoreCache(max_entries=3, ttl=3600)
+    cache.store(np.array([1, 2, 3], dtype=np.uint64), np.array([0.1, 0.2, 0.3]))
+    cache.lookup(np.array([1], dtype=np.uint64))
+    cache.store(np.array([4], dtype=np.uint64), np.array([0.4]))
+    _, hit = cache.lookup(np.array([1, 2, 3, 4], dtype=np.uint64))
+    assert len(cache) == 3 and hit[0] and hit[3] and hit.sum() == 3
+
+    expired = ScoreCache(max_entries=10, ttl=-1)
+    expired.store(np.array([1], dtype=np.uint64), np.array([0.5]))
+    assert not expired.lookup(np.array([1], dtype=np.uint64))[1][0]
+
+
+def test_model_version_change_drops_entries():
+    cache = ScoreCache()
+    cache.sync_model_version("v1")
+    cache.store(np.array([1], dtype=np.uint64), np.array([0.5]))
+    cache.sync_model_version("v1")
+    assert len(cache) == 1
+    cache.sync_model_version("v2")
+    assert len(cache) == 0
+
+
+def test_graph_momentum_is_cached_per_batch():
+    df = make_cases(50, seed=2)
+    df["counterparty_id"] = [f"P{i % 5}" for i in range(50)]
+    signals = {"C1": [("PAYMENT", 2.0)], "C7": [("BROKEN_PROMISE", -1.0)]}
+
+    expected = compute_scores(df, signals, momentum_mode="propagate", use_cache=False)["graph_raw"]
+    first = compute_scores(df, signals, momentum_mode="propagate")["graph_raw"]
+    second = compute_scores(df, signals, momentum_mode="propagate")["graph_raw"]
+    assert GRAPH_CACHE.stats()["hits"] >= 1
+    np.testing.assert_allclose(first, expected)
+    np.testing.assert_allclose(second, expected)
+
+    # Any change to the inputs is a different batch
+    hits = GRAPH_CACHE.stats()["hits"]
+    changed = compute_scores(df, {**signals, "C2": [("PAYMENT", 1.0)]}, momentum_mode="propagate")["graph_raw"]
+    summed = compute_scores(df, signals, momentum_mode="sum")["graph_raw"]
+    assert GRAPH_CACHE.stats()["hits"] == hits
+    assert not np.allclose(changed, expected)
+    assert summed.sum() == pytest.approx(1.0)
+
+
+def test_graph_cache_lru_bound():
+    cache = GraphCache(max_entries=2)
+    for key in (b"a", b"b", b"c"):
+        cache.cached(key, lambda: np.zeros(1))
+    assert len(cache) == 2
+    calls = []
+    cache.cached(b"a", lambda: calls.append(1) or np.zeros(1))
+    assert calls == [1]
+
+
+def test_batch_is_encoded_once(monkeypatch):
+    from engines.feature_schema import FeatureSchema
+
+    calls = []
+    encode = FeatureSchema.encode
+    monkeypatch.setattr(FeatureSchema, "encode", lambda self, df: calls.append(len(df)) or encode(self, df))
+
+    df = make_cases(120, seed=8)
+    compute_scores(df.iloc[:60], {}, parallel=False)
+    calls.clear()
+    # Half hits, half misses: the misses are scored from the rows already encoded for the keys
+    scored = compute_scores(df, {}, parallel=False)
+    assert calls == [120]
+    expected = compute_scores(df, {}, parallel=False, use_cache=False)["ml_score"]
+    np.testing.assert_allclose(scored["ml_score"], expected, rtol=0, atol=1e-12)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.scoring_service import (
+    ALPHA, BETA, MAX_EXPECTED_MOMENTUM, compute_scores, determine_action, generate_sop_tier, sop_steps_for,
+)
+from tests.conftest import make_cases
+
+
+def _sop_row(score) -> list:
+    """The original per-row SOP rules."""
+    if score >= 0.75:
+        return ["⚡ PRIORITY: Call within 1 hour", "💰 Offer Plan A (10% waiver)"]
+    elif score <= 0.30:
+        return ["📧 AUTO: Send Email Nudge", "🚫 No outbound calls"]
+    return ["📞 Standard Call", "📅 Schedule follow-up"]
+
+
+def _action_row(ml, g, p) -> str:
+    """The original per-row action rules."""
+    if p >= 0.80 or (g >= 0.70 and ml >= 0.60):
+        return "IMMEDIATE_ESCALATION"
+    elif p <= 0.30:
+        return "DIGITAL_ONLY"
+    return "STANDARD_QUEUE"
+
+
+# Every threshold, either side of it, and the range ends
+EDGES = np.array([0.0, 0.2999, 0.30, 0.3001, 0.5, 0.5999, 0.60, 0.6999, 0.70, 0.7499, 0.75, 0.7999, 0.80, 1.0])
+
+
+def test_sop_steps_match_row_rules():
+    rng = np.random.default_rng(0)
+    scores = np.concatenate([EDGES, rng.uniform(0, 1, 500)])
+    steps = sop_steps_for(generate_sop_tier(scores))
+    assert [list(s) for s in steps] == [_sop_row(p) for p in scores]
+
+
+def test_action_matches_row_rules():
+    ml, g, p = (a.ravel() for a in np.meshgrid(EDGES, EDGES, EDGES))
+    expected = [_action_row(*row) for row in zip(ml, g, p)]
+    assert determine_action(ml, g, p).tolist() == expected
+
+
+def test_sop_steps_share_one_tuple_per_tier():
+    steps = sop_steps_for(generate_sop_tier([0.9, 0.95, 0.1]))
+    assert steps[0] is steps[1]
+    assert steps[0] is not steps[2]
+
+
+def test_compute_scores_matches_row_pipeline():
+    df = make_cases(200, seed=8)
+    signals = {"C3": [("PAYMENT", 4.0)], "C7": [("PAYMENT", 30.0)], "C9": [("BROKEN_PROMISE", -2.0)]}
+    scored = compute_scores(df, signals, use_cache=False)
+
+    raw = df["case_id"].map(lambda c: sum(w for _, w in signals.get(c, []))).to_numpy()
+    graph_score = np.clip(raw / MAX_EXPECTED_MOMENTUM, 0.0, 1.0)
+    np.testing.assert_allclose(scored["graph_score"], graph_score)
+    np.testing.assert_allclose(scored["final_priority_score"], ALPHA * scored["ml_score"] + BETA * graph_score)
+
+    rows = zip(scored["ml_score"], scored["graph_score"], scored["final_priority_score"])
+    assert scored["action_type"].tolist() == [_action_row(*r) for r in rows]
+    assert [list(s) for s in scored["sop_steps"]] == [_sop_row(p) for p in scored["final_priority_score"]]
+
+
+def test_compute_scores_keeps_the_input_frame():
+    df = make_cases(5)
+    before = df.copy()
+    compute_scores(df, {}, use_cache=False)
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_compute_scores_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        compute_scores(make_cases(3), {}, momentum_mode="bogus", use_cache=False)
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from app import serialization
+from tests.conftest import make_cases, to_allocate_payload
+
+SIGNALS = {"C2": [("PAYMENT", 3.0)], "C5": [("BROKEN_PROMISE", -1.0)]}
+
+
+@pytest.fixture(params=["orjson", "fallback"])
+def encoder(request, monkeypatch):
+    if request.param == "fallback":
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    return request.param
+
+
+@pytest.mark.parametrize("sop_mode", ["inline", "reference"])
+def test_fast_response_matches_default(client, reset, encoder, sop_mode):
+    payload = to_allocate_payload(make_cases(80, seed=4), SIGNALS, sop_mode=sop_mode)
+
+    default = client.post("/allocate", json=payload)
+    reset()
+    fast = client.post("/allocate", json=payload, params={"fast": "true"})
+
+    assert default.status_code == fast.status_code == 200
+    assert fast.headers["content-type"] == "application/json"
+    assert json.loads(fast.content) == json.loads(default.content)
+
+
+@pytest.mark.parametrize("sop_mode", ["inline", "reference"])
+def test_fast_empty_batch_matches_default(client, encoder, sop_mode):
+    payload = {"cases": [], "sop_mode": sop_mode}
+    default = client.post("/allocate", json=payload).json()
+    assert client.post("/allocate", json=payload, params={"fast": "true"}).json() == default
+
+
+def test_dumps_writes_int_keys_as_strings(encoder):
+    assert json.loads(serialization.dumps({0: ["a"], 2: []})) == {"0": ["a"], "2": []}
+
+
+def test_non_finite_floats_are_null(encoder):
+    import pandas as pd
+
+    df = pd.DataFrame({"x": [1.5, float("nan"), float("inf")]})
+    assert json.loads(serialization.encode_records(df, ["x"])) == [{"x": 1.5}, {"x": None}, {"x": None}]
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+
+import pyarrow as pa
+import pytest
+
+from tests.conftest import PROFILES, make_cases
+
+
+def _ndjson(df, signals=None) -> bytes:
+    features = df.drop(columns=["case_id"])
+    lines = []
+    for cid, row in zip(df["case_id"], features.to_dict(orient="records")):
+        line = {"case_id": cid, "features": row}
+        if signals and cid in signals:
+            line["signals"] = [{"signal_type": n, "weight": w} for n, w in signals[cid]]
+        lines.append(json.dumps(line))
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def _arrow(df, file_format: bool) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    writer = pa.ipc.new_file if file_format else pa.ipc.new_stream
+    with writer(sink, table.schema) as w:
+        # Several record batches
+        for batch in table.to_batches(max_chunksize=7):
+            w.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def _post(client, body: bytes, content_type: str, **params):
+    response = client.post("/allocate/stream", content=body, headers={"content-type": content_type}, params=params)
+    records = [json.loads(line) for line in response.text.splitlines() if line]
+    return response, records
+
+
+def test_ndjson_stream_scores_every_case(client):
+    df = make_cases(25)
+    response, records = _post(client, _ndjson(df, {"C0": [("PAYMENT", 2.0)]}), "application/x-ndjson", chunk_size=10)
+    assert response.status_code == 200
+    assert len(records) == 25
+    assert {r["case_id"] for r in records} == set(df["case_id"])
+    assert next(r for r in records if r["case_id"] == "C0")["graph_score"] > 0
+
+
+@pytest.mark.parametrize("file_format", [False, True])
+def test_arrow_stream_and_file_match_ndjson(client, ledger, file_format):
+    df = make_cases(30, seed=5)
+    _, expected = _post(client, _ndjson(df), "application/x-ndjson")
+
+    ledger.load(PROFILES, restore=False)
+    media = "application/vnd.apache.arrow.file" if file_format else "application/vnd.apache.arrow.stream"
+    response, records = _post(client, _arrow(df, file_format), media, chunk_size=4)
+
+    assert response.status_code == 200
+    key = lambda r: r["case_id"]
+    assert sorted(records, key=key) == pytest.approx(sorted(expected, key=key))
+
+
+@pytest.mark.parametrize("param", ["momentum_mode", "allocation_mode"])
+def test_unknown_mode_is_rejected_before_streaming(client, param):
+    response, _ = _post(client, _ndjson(make_cases(3)), "application/x-ndjson", **{param: "bogus"})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("media", ["application/vnd.apache.arrow.stream", "application/vnd.apache.arrow.file"])
+def test_invalid_arrow_body_reports_an_error_record(client, media):
+    response, records = _post(client, b"not arrow at all", media)
+    assert response.status_code == 200
+    assert list(records[-1]) == ["error"]
+
+
+def test_truncated_arrow_stream_reports_an_error_record(client):
+    body = _arrow(make_cases(30), file_format=False)
+    response, records = _post(client, body[: len(body) // 2], "application/vnd.apache.arrow.stream", chunk_size=5)
+    assert response.status_code == 200
+    assert "Invalid Arrow IPC stream" in records[-1]["error"]
+
+
+def test_invalid_ndjson_line_reports_an_error_record(client):
+    body = _ndjson(make_cases(3)) + b"{not json\n"
+    response, records = _post(client, body, "application/x-ndjson", chunk_size=100)
+    assert response.status_code == 200
+    assert "Invalid NDJSON line" in records[-1]["error"]
+
+
+@pytest.mark.parametrize("chunk_size", [0, 10**9])
+def test_chunk_size_is_bounded(client, chunk_size):
+    response, _ = _post(client, _ndjson(make_cases(3)), "application/x-ndjson", chunk_size=chunk_size)
+    assert response.status_code == 422
+
+
+def test_arrow_stream_is_decoded_while_the_body_arrives(monkeypatch):
+    from app import streaming
+
+    monkeypatch.setattr(streaming, "ARROW_PIPE_BYTES", 1024)
+    body = _arrow(make_cases(60), file_format=False)
+    pieces = [body[i:i + 256] for i in range(0, len(body), 256)]
+    first_chunk = asyncio.Event()
+
+    async def upload():
+        for i, piece in enumerate(pieces):
+            # Deadlocks (and times out) if the reader waited for the whole body
+            if i == len(pieces) // 2:
+                await asyncio.wait_for(first_chunk.wait(), 5)
+            yield piece
+
+    async def read():
+        rows = 0
+        async for df, _ in streaming.iter_arrow_chunks(upload(), chunk_size=5):
+            first_chunk.set()
+            rows += len(df)
+        return rows
+
+    assert asyncio.run(read()) == 60
+
+
+def test_arrow_file_is_read_from_a_spooled_copy(client, monkeypatch):
+    from app import streaming
+
+    mapped = []
+    batches = streaming._arrow_batches
+    monkeypatch.setattr(streaming, "_arrow_batches",
+                        lambda source, file_format: mapped.append(source) or batches(source, file_format))
+
+    response, records = _post(client, _arrow(make_cases(20), file_format=True),
+                              "application/vnd.apache.arrow.file", chunk_size=6)
+    assert response.status_code == 200 and len(records) == 20
+    # A path (memory-mapped), removed once the request is done
+    assert isinstance(mapped[0], str)
+    assert not os.path.exists(mapped[0])
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from services.synthetic import SIGNAL_WEIGHTS, generate_portfolio, generate_signals, load_seed, to_payload
+
+
+def test_portfolio_is_deterministic_per_seed():
+    a = generate_portfolio(500, seed=3)
+    pd.testing.assert_frame_equal(a, generate_portfolio(500, seed=3))
+    assert not a.equals(generate_portfolio(500, seed=4))
+
+
+def test_portfolio_follows_the_seed_file():
+    seed_df = load_seed()
+    df = generate_portfolio(2000, seed=1, seed_df=seed_df)
+
+    assert list(df.columns) == list(seed_df.columns)
+    assert df["case_id"].is_unique
+    for c in df.columns.drop("case_id"):
+        observed = seed_df[c].dropna()
+        if set(observed.unique()) <= {0, 1}:
+            assert df[c].dtype == np.int8
+            assert set(df[c].unique()) <= {0, 1}
+        else:
+            assert df[c].min() >= observed.min() and df[c].max() <= observed.max()
+
+
+def test_chunks_do_not_change_the_row_count():
+    df = generate_portfolio(25, seed=0, chunk_size=10)
+    assert len(df) == 25
+    assert df["case_id"].tolist() == [f"S{i:08d}" for i in range(25)]
+    assert generate_portfolio(0).empty
+
+
+def test_signals_are_deterministic_and_use_the_catalogue():
+    ids = [f"S{i}" for i in range(5000)]
+    signals = generate_signals(ids, seed=2, per_case=0.5)
+    assert signals == generate_signals(ids, seed=2, per_case=0.5)
+
+    events = [e for sigs in signals.values() for e in sigs]
+    assert set(signals) <= set(ids)
+    assert all(w == SIGNAL_WEIGHTS[name] for name, w in events)
+    assert abs(len(events) / len(ids) - 0.5) < 0.05
+
+
+def test_payload_is_accepted_by_allocate(client):
+    df = generate_portfolio(20, seed=0)
+    response = client.post("/allocate", json=to_payload(df, generate_signals(df["case_id"], seed=0)))
+    assert response.status_code == 200
+    assert len(response.json()) == 20
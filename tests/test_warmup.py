@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from services import warmup
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    """Unready state and a warm-up that fails `failures[0]` times before succeeding."""
+    monkeypatch.setitem(warmup.READINESS, "ready", False)
+    monkeypatch.setitem(warmup.READINESS, "error", None)
+    monkeypatch.setitem(warmup.READINESS, "attempts", 0)
+    monkeypatch.setattr(warmup, "_warmup_thread", None)
+    monkeypatch.setattr(warmup, "WARMUP_BACKOFF", 0.0)
+
+    failures = [0]
+    lock = threading.Lock()
+
+    def flaky():
+        with lock:
+            warmup.READINESS["attempts"] += 1
+            if warmup.READINESS["attempts"] <= failures[0]:
+                warmup.READINESS["error"] = "model store unavailable"
+            else:
+                warmup.READINESS.update(ready=True, error=None)
+        return warmup.READINESS
+
+    monkeypatch.setattr(warmup, "warm_up", flaky)
+    return failures
+
+
+def _join():
+    if warmup._warmup_thread is not None:
+        warmup._warmup_thread.join(5)
+
+
+def test_retries_until_ready(readiness):
+    readiness[0] = 2
+    assert warmup.start_warm_up(retries=5)
+    _join()
+    assert warmup.READINESS["ready"] and warmup.READINESS["attempts"] == 3
+    # Once ready nothing runs again
+    assert not warmup.start_warm_up()
+
+
+def test_ready_probe_restarts_a_failed_warm_up(readiness, client):
+    readiness[0] = 2
+    warmup.start_warm_up(retries=1)
+    _join()
+    assert not warmup.READINESS["ready"]
+
+    # Each unready probe starts a new run (the default retries recover here)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    _join()
+    assert client.get("/ready").status_code == 200
+    assert client.get("/ready").json()["error"] is None
+
+
+def test_no_concurrent_runs(readiness, monkeypatch):
+    gate = threading.Event()
+    monkeypatch.setattr(warmup, "_warm_up_with_retry", lambda retries, backoff: gate.wait(5))
+
+    assert warmup.start_warm_up()
+    assert not warmup.start_warm_up()
+    gate.set()
+    _join()